@@ -0,0 +1,113 @@
+"""
+Effect of the Bloom filter pre-screen on name classification.
+
+    python benchmarks/bench_bloom.py -a alldata.txt -l 5000
+
+For both modes the report shows the filter size, the measured false-positive
+rate on random tokens that are not dictionary keys next to the theoretical
+one, the share of contacts the screen rejects and microseconds per contact
+with the screen on and off. Fuzzy matching is off unless --fuzzy is given,
+so the timings isolate the exact dictionary steps the screen skips.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from find_nationality import fio, name_sets, phone  # noqa: E402
+
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщыэюяabcdefghijklmnopqrstuvwxyz"
+
+
+def time_classifier(fn, names, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(name) for name in names]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def measured_fp_rate(bloom, keys, rng, probes):
+    """ Share of random non-key tokens the filter reports as present. """
+    tested = hits = 0
+    while tested < probes:
+        token = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10)))
+        if token in keys:
+            continue
+        tested += 1
+        hits += token in bloom
+    return hits / tested
+
+
+def dictionary_keys(names, suffixes):
+    return {name_sets.normalise(key) for key in list(names) + list(suffixes) if key}
+
+
+def report(label, module, keys, classify, names, args):
+    module.screen_settings["enabled"] = True
+    screen = module.get_name_screen()
+    classify(names[0])  # warm up lazily built indexes
+    screen.checked = screen.rejected = 0
+    on_time, on_results = time_classifier(classify, names, args.repeat)
+    rejected, checked = screen.rejected, screen.checked
+    module.screen_settings["enabled"] = False
+    off_time, off_results = time_classifier(classify, names, args.repeat)
+    module.screen_settings["enabled"] = True
+
+    bloom = screen.bloom
+    fp_rate = measured_fp_rate(bloom, keys, random.Random(args.seed), args.probes)
+    print(f"[{label}]")
+    print(f"filter:            {bloom.bit_count} bits, k={bloom.hash_count}, {bloom.count} keys")
+    print(f"false positives:   {fp_rate:8.2%} measured, {bloom.expected_fp_rate():.2%} expected")
+    print(f"rejected:          {rejected / checked if checked else 0:8.1%} of contacts reaching the screen")
+    print(f"screen on:         {on_time / len(names) * 1e6:8.1f} us/contact")
+    print(f"screen off:        {off_time / len(names) * 1e6:8.1f} us/contact")
+    print(f"speedup:           {off_time / on_time:8.2f}x")
+    print(f"same results:      {on_results == off_results}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the Bloom filter name pre-screen.")
+    arg_parser.add_argument("-a", "--alldata-file", default="alldata.txt",
+                            help="Contacts file in alldata.txt format (default: alldata.txt).")
+    arg_parser.add_argument("-l", "--limit", type=int, default=5000,
+                            help="Number of contacts to read, 0 for all (default: 5000).")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=3,
+                            help="Timed runs per setting; the best one is reported (default: 3).")
+    arg_parser.add_argument("--probes", type=int, default=100000,
+                            help="Random non-key tokens used to measure the false-positive rate (default: 100000).")
+    arg_parser.add_argument("--seed", type=int, default=1,
+                            help="Seed for the random probe tokens (default: 1).")
+    arg_parser.add_argument("--fuzzy", action="store_true",
+                            help="Keep fuzzy matching on in both modes.")
+    args = arg_parser.parse_args()
+
+    names = [name for _, name in phone.read_contacts(args.alldata_file, limit=args.limit or None) if name]
+    if not names:
+        print("No contact names to benchmark.")
+        return
+    print(f"contacts:          {len(names)}")
+    for settings in (phone.fuzzy_settings, fio.fuzzy_settings):
+        settings["enabled"] = args.fuzzy
+
+    phone.ensure_contact_rules()
+    phone_keys = dictionary_keys((name for group in phone.typical_names.values() for name in group),
+                                 (suffix for group in phone.suffixes.values() for suffix in group))
+    report("phone", phone, phone_keys, phone.detect_nationality_from_name, names, args)
+
+    fio.load_name_indexes()
+    fio_names = [name for group in fio.typical_names.values() for name in group]
+    fio_names += list(fio.islamic_names) + list(fio.islamic_names.variants)
+    fio_keys = dictionary_keys(fio_names, (suffix for group in fio.suffixes.values() for suffix in group))
+    report("fio", fio, fio_keys, fio._name_nationality_value, names, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Hot per-contact helpers in fastcore against the code they replaced.
+
+    python benchmarks/bench_fastcore.py -a alldata.txt -l 5000
+
+Each helper runs over the same inputs taken from the contacts file: contact
+names for clean_name, their cleaned parts for the phone and fio suffix
+steps, phone numbers for normalisation, and the
+raw lines for line parsing. The reference versions below are the previous
+implementations, kept here verbatim. The report shows nanoseconds per call
+for both, the speedup and whether every result is identical; it also says
+whether fastcore was loaded as a compiled extension (see fastcore.py).
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from find_nationality import fastcore, fio, phone  # noqa: E402
+from find_nationality.nationality import Nationality  # noqa: E402
+
+
+def reference_clean_name(name):
+    name_cleaned = re.sub(r'[^\w\s]', '', name)
+    name_cleaned = re.sub(r'\d', '', name_cleaned)
+    return name_cleaned.strip()
+
+
+def reference_phone_suffixes(name_parts):
+    matches = {nationality: 0 for nationality in phone.suffixes}
+    for part in name_parts:
+        for nationality, suff in phone.suffixes.items():
+            if any(part.lower().endswith(suffix) for suffix in suff):
+                matches[nationality] += 1
+    selected_nationality = max(matches, key=matches.get)
+    return selected_nationality if matches[selected_nationality] > 0 else Nationality.UNDETERMINED
+
+
+def reference_fio_suffixes(name_parts):
+    for nationality, suffix_list in fio.suffixes.items():
+        for suffix in suffix_list:
+            if any(part.endswith(suffix) for part in name_parts):
+                return nationality
+    return None
+
+
+def reference_normalise_phone(phone_number):
+    if not phone_number or phone_number.lower() == 'none':
+        return None
+    phone_number = phone_number.strip()
+    if phone_number.startswith('+'):
+        phone_number = phone_number[1:]
+    elif phone_number.startswith('00'):
+        phone_number = phone_number[2:]
+    return phone_number
+
+
+def reference_parse_line(line):
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split(',')
+    if len(parts) < 3:
+        return None
+    return parts[0].strip().strip('"'), parts[1].strip().strip('"'), parts[2].strip().strip('"')
+
+
+def time_calls(fn, items, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(item) for item in items]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def report(label, reference, fast, items, repeat):
+    reference_time, expected = time_calls(reference, items, repeat)
+    fast_time, results = time_calls(fast, items, repeat)
+    print(f"{label:<18} {reference_time / len(items) * 1e9:8.0f} ns -> {fast_time / len(items) * 1e9:6.0f} ns"
+          f"  x{reference_time / fast_time:5.2f}  same results: {expected == results}")
+    return expected == results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the fastcore hot-path helpers.")
+    arg_parser.add_argument("-a", "--alldata-file", default="alldata.txt",
+                            help="Contacts file in alldata.txt format (default: alldata.txt).")
+    arg_parser.add_argument("-l", "--limit", type=int, default=5000,
+                            help="Number of lines to read, 0 for all (default: 5000).")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=5,
+                            help="Timed runs per implementation; the best one is reported (default: 5).")
+    args = arg_parser.parse_args()
+
+    with open(args.alldata_file, encoding="utf-8") as f:
+        lines = list(itertools.islice(f, args.limit or None))
+    contacts = [parsed for parsed in map(reference_parse_line, lines) if parsed]
+    if not contacts:
+        print("No contacts to benchmark.")
+        return
+    names = [name for _, _, name in contacts if name]
+    parts = [reference_clean_name(name).split() for name in names]
+    phones = [number for number, _, _ in contacts]
+
+    print(f"fastcore:          {'compiled' if fastcore.COMPILED else 'pure Python'}")
+    print(f"lines:             {len(lines)}")
+    same = [
+        report("clean_name", reference_clean_name, fastcore.clean_name, names, args.repeat),
+        report("phone suffixes", reference_phone_suffixes, phone.match_suffixes, parts, args.repeat),
+        report("fio suffixes", reference_fio_suffixes, fio.detect_nationality_from_suffixes, parts, args.repeat),
+        report("phone number", reference_normalise_phone, fastcore.normalise_phone, phones, args.repeat),
+        report("parse line", reference_parse_line, fastcore.split_contact_line, lines, args.repeat),
+    ]
+    if not all(same):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
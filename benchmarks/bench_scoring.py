@@ -0,0 +1,67 @@
+"""
+Per-contact cost of the scoring mode against the first-hit cascade.
+
+    python benchmarks/bench_scoring.py -a alldata.txt -l 5000
+
+Both classifiers run over the same contact names (phone lookup excluded).
+The report shows microseconds per contact, the scoring/cascade cost ratio
+and how often the two agree on the top nationality.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from find_nationality import phone as mnn  # noqa: E402
+
+
+def time_classifier(fn, names, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(name) for name in names]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark scoring mode against the cascade.")
+    arg_parser.add_argument("-a", "--alldata-file", default="alldata.txt",
+                            help="Contacts file in alldata.txt format (default: alldata.txt).")
+    arg_parser.add_argument("-l", "--limit", type=int, default=5000,
+                            help="Number of contacts to read, 0 for all (default: 5000).")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=3,
+                            help="Timed runs per classifier; the best one is reported (default: 3).")
+    arg_parser.add_argument("--unique", action="store_true",
+                            help="Benchmark each distinct contact name once.")
+    args = arg_parser.parse_args()
+
+    names = [name for _, name in mnn.read_contacts(args.alldata_file, limit=args.limit or None) if name]
+    if args.unique:
+        names = list(dict.fromkeys(names))
+    if not names:
+        print("No contact names to benchmark.")
+        return
+
+    # Warm up lazily built indexes so neither side pays for them
+    mnn.get_fuzzy_index()
+    mnn.score_nationality_from_name(names[0])
+
+    cascade_time, cascade = time_classifier(mnn.detect_nationality_from_name, names, args.repeat)
+    scoring_time, scores = time_classifier(mnn.score_nationality_from_name, names, args.repeat)
+    agree = sum(1 for nationality, score in zip(cascade, scores) if nationality == score.top)
+
+    print(f"contacts:          {len(names)}")
+    print(f"cascade:           {cascade_time / len(names) * 1e6:8.1f} us/contact")
+    print(f"scoring:           {scoring_time / len(names) * 1e6:8.1f} us/contact")
+    print(f"scoring / cascade: {scoring_time / cascade_time:8.2f}x")
+    print(f"same top result:   {agree / len(names):8.1%}")
+
+
+if __name__ == "__main__":
+    main()
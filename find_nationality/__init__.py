@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+find_nationality — определение национальности по ФИО, имени контакта и телефону.
+
+Импорт пакета и его модулей не загружает модели и словари: модель spaCy,
+NamesParser, словари имён и правил загружаются при первом обращении и
+кэшируются. Это позволяет встраивать классификатор в конвейеры без
+стоимости загрузки при импорте.
+
+Режимы:
+    find_nationality.fio     — соединение файла граждан с alldata (ФИО + телефон);
+    find_nationality.phone   — регион по телефону и национальность по имени контакта;
+    find_nationality.cluster — распределённый прогон режимов по шардам.
+
+Командная строка:
+    python -m find_nationality fio     [параметры]
+    python -m find_nationality phone   [параметры]
+    python -m find_nationality cluster {submit,worker,status,merge,run} [параметры] [-- параметры режима]
+"""
+
+import os
+import time
+
+# Начало импорта пакета — точка отсчёта профиля запуска (см. startup.py)
+IMPORT_STARTED = time.perf_counter()
+
+# Каталог с данными (mobile_codes.csv, islam_names.*, json_data/) — корень репозитория
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
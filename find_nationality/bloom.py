@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Фильтр Блума для предварительного отсева токенов имени.
+
+Большинство токенов в «как записан» нет ни в одном словаре, но каждый
+проходит проверки типичных имён, исламских имён и суффиксов (цикл
+endswith по всем национальностям). Фильтр строится из словарных имён и
+их транслитераций, суффиксы хранятся отдельным множеством; всё — в
+нормализованном виде (нижний регистр, ё -> е, см. name_sets.normalise),
+поэтому отрицательный ответ отсева означает, что ни одна из этих проверок
+не сработает ни в каком регистре. Ложноотрицательных ответов нет;
+ложноположительные лишь отправляют токен на обычные проверки, так что
+результат не меняется.
+
+Отсев должен стоить меньше проверок, которые он пропускает, поэтому у
+TokenScreen фильтр с одной хеш-функцией (k = 1, crc32): одна проверка бита
+на токен при массиве примерно в 10 раз больше оптимального по памяти —
+десятки килобайт. Концы токена сравниваются с суффиксами только после
+промаха фильтра. Даже так выигрыш на замерах в пределах шума, и в обоих
+режимах отсев по умолчанию выключен (--bloom включает).
+
+Фильтр сохраняется рядом с остальными скомпилированными данными
+(name_filter_<режим>.bin в каталоге данных) вместе с отпечатком набора
+ключей; при изменении словарей (например, перезагрузке правил) отпечаток
+не совпадёт, и фильтр будет перестроен и перезаписан.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import zlib
+
+from .name_sets import normalise
+
+MAGIC = b"FNBLOOM3"
+DEFAULT_FP_RATE = 0.01
+
+
+def _hashes(key):
+    data = key.encode("utf-8")
+    return zlib.crc32(data), zlib.adler32(data) | 1
+
+
+class BloomFilter:
+    """ Битовый массив из m бит и k хеш-функций. """
+
+    def __init__(self, bit_count, hash_count, bits=None):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bytearray((bit_count + 7) // 8) if bits is None else bytearray(bits)
+        self.count = 0
+
+    @classmethod
+    def for_capacity(cls, capacity, fp_rate=DEFAULT_FP_RATE, hash_count=None):
+        """
+        Оптимальные m = -n·ln p / ln²2 и k = m/n·ln 2 для n ключей и доли
+        ложных срабатываний p. С заданным k — наименьшее m для той же доли:
+        m = -k·n / ln(1 - p^(1/k)); k = 1 — одна проверка бита на ключ ценой
+        примерно в 10 раз большего массива.
+        """
+        capacity = max(1, capacity)
+        if hash_count is None:
+            bit_count = max(8, int(math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)))
+            hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        else:
+            bit_count = max(8, int(math.ceil(-hash_count * capacity / math.log(1 - fp_rate ** (1 / hash_count)))))
+        return cls(bit_count, hash_count)
+
+    def add(self, key):
+        h1, h2 = _hashes(key)
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.bit_count
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        if self.hash_count == 1:
+            position = zlib.crc32(key.encode("utf-8")) % self.bit_count
+            return bool(self.bits[position >> 3] & (1 << (position & 7)))
+        h1, h2 = _hashes(key)
+        bits = self.bits
+        bit_count = self.bit_count
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % bit_count
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def expected_fp_rate(self):
+        """ Теоретическая доля ложных срабатываний: (1 - e^(-kn/m))^k. """
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
+
+
+def fingerprint(keys):
+    """ Отпечаток набора ключей: совпадает, только если совпадают словари. """
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(keys):
+        digest.update(key.encode("utf-8") + b"\0")
+    return digest.digest()
+
+
+def save_filter(path, bloom, keys_fingerprint):
+    """ Атомарная запись: MAGIC, отпечаток, m, k, число ключей, биты. """
+    # Свой временный файл у каждого процесса: воркеры могут перестраивать фильтр одновременно
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + keys_fingerprint)
+        f.write(struct.pack("<QII", bloom.bit_count, bloom.hash_count, bloom.count))
+        f.write(bloom.bits)
+    os.replace(tmp_path, path)
+
+
+def load_filter(path, keys_fingerprint):
+    """
+    Фильтр из файла, если он построен из того же набора ключей и не
+    обрезан (длина битового массива соответствует m); иначе None.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = len(MAGIC) + len(keys_fingerprint)
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC):header] != keys_fingerprint:
+        return None
+    if len(data) < header + 16:
+        return None
+    bit_count, hash_count, count = struct.unpack_from("<QII", data, header)
+    bits = data[header + 16:]
+    if bit_count < 1 or hash_count < 1 or len(bits) != (bit_count + 7) // 8:
+        return None
+    bloom = BloomFilter(bit_count, hash_count, bits)
+    bloom.count = count
+    return bloom
+
+
+def load_or_build(path, keys, fp_rate=DEFAULT_FP_RATE, hash_count=None):
+    """
+    Сохранённый фильтр для этого набора ключей либо новый (и сохранённый).
+    Если каталог данных недоступен для записи, фильтр остаётся в памяти.
+    """
+    keys = set(keys)
+    keys_fingerprint = fingerprint(keys)
+    bloom = load_filter(path, keys_fingerprint) if path else None
+    if bloom is not None and hash_count is not None and bloom.hash_count != hash_count:
+        bloom = None
+    if bloom is None:
+        bloom = BloomFilter.for_capacity(len(keys), fp_rate, hash_count)
+        for key in keys:
+            bloom.add(key)
+        if path:
+            try:
+                save_filter(path, bloom, keys_fingerprint)
+            except OSError:
+                pass
+    return bloom
+
+
+class TokenScreen:
+    """
+    Отсев токенов, который дешевле отсеиваемых проверок. Словарные строки
+    (имена, варианты) — в фильтре с одной проверкой бита на токен (k = 1),
+    суффиксы — в обычном множестве: их мало, и конец токена сравнивается
+    без хеширования. Токен проходит, если он сам может быть в словаре или
+    один из его концов — суффикс. Концы проверяются только после промаха
+    фильтра, и сначала одной проверкой: последние символы токена (длины
+    самого короткого суффикса) должны заканчивать какой-нибудь суффикс.
+    """
+
+    def __init__(self, bloom, suffixes):
+        self.bloom = bloom
+        self.suffixes = frozenset(suffixes)
+        self.suffix_lengths = sorted({len(suffix) for suffix in self.suffixes})
+        # Без суффиксов хвост длины 1 с пустым множеством концов отсекает всё
+        self._tail_length = self.suffix_lengths[0] if self.suffix_lengths else 1
+        self._tails = frozenset(suffix[-self._tail_length:] for suffix in self.suffixes)
+        self.checked = 0
+        self.rejected = 0
+
+    @classmethod
+    def build(cls, names, suffixes, path=None, fp_rate=DEFAULT_FP_RATE):
+        name_keys = {normalise(name) for name in names if name}
+        suffix_keys = {normalise(suffix) for suffix in suffixes if suffix}
+        return cls(load_or_build(path, name_keys, fp_rate, hash_count=1), suffix_keys)
+
+    def might_match(self, token):
+        key = normalise(token)
+        if key in self.bloom:
+            return True
+        if key[-self._tail_length:] not in self._tails:
+            return False
+        suffixes = self.suffixes
+        for length in self.suffix_lengths:
+            if length > len(key):
+                break
+            if key[-length:] in suffixes:
+                return True
+        return False
+
+    def might_match_any(self, tokens, more_tokens=None):
+        """
+        False — ни один токен не пройдёт словарные проверки, их можно пропустить.
+        more_tokens — функция, возвращающая дополнительные токены (например,
+        кириллицу латинских частей); вызывается, только если tokens не прошли.
+        """
+        self.checked += 1
+        for token in tokens:
+            if self.might_match(token):
+                return True
+        if more_tokens is not None:
+            for token in more_tokens():
+                if self.might_match(token):
+                    return True
+        self.rejected += 1
+        return False
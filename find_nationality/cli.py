@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Единая командная строка: python -m find_nationality {fio,phone,cluster} [параметры].
+
+Параметры после имени режима передаются его собственному разбору
+аргументов (см. `python -m find_nationality fio --help`).
+"""
+
+import argparse
+
+COMMANDS = {
+    "fio": "соединение файла граждан с alldata: национальность по ФИО и «как записан», гео по телефону",
+    "phone": "регион по номеру телефона и национальность по имени контакта из alldata",
+    "cluster": "распределённый прогон fio или phone по шардам на нескольких машинах",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="find_nationality",
+        description="Определение национальности по ФИО, имени контакта и телефону.",
+        epilog="\n".join(f"  {name:7} {text}" for name, text in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(COMMANDS), help="режим работы")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="параметры режима")
+    args = parser.parse_args(argv)
+
+    # Режим импортируется только после выбора, второй не загружается вовсе
+    if args.command == "fio":
+        from . import fio as mode
+    elif args.command == "phone":
+        from . import phone as mode
+    else:
+        from . import cluster as mode
+    mode.main(args.args, prog=f"{parser.prog} {args.command}")
@@ -0,0 +1,708 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Распределённый пакетный прогон: входы режима fio или phone делятся на
+шарды, шарды обрабатывают воркеры на нескольких машинах, итог сливается
+в исходном порядке.
+
+Очередь — каталог на общей файловой системе (NFS, SMB, общий том),
+доступный координатору и всем воркерам:
+
+    job.json                  параметры задания и число записей в каждом шарде
+    order.bin                 номер шарда каждой записи (только --split phone)
+    citizens.csv              файл граждан целиком (fio, --split bytes)
+    shards/NNNNN/             входы шарда, выход, файл отказов и журнал попытки
+    todo/NNNNN.K              шард ждёт обработки; K — число неудачных попыток
+    claimed/NNNNN.K@ТОКЕН     шард взят воркером (ТОКЕН — машина, pid, номер)
+    done/NNNNN.K@ТОКЕН        шард готов; его выход — shards/NNNNN/output@ТОКЕН.csv
+    failed/NNNNN.K            попытки шарда исчерпаны
+
+Состояние шарда — имя пустого файла, и каждый переход — один rename
+внутри каталога очереди: из нескольких воркеров, взявшихся за один шард,
+rename удаётся ровно одному. Воркер, пока идёт шард, обновляет mtime
+своей заявки (heartbeat); заявку старше --lease секунд любой воркер
+возвращает в todo (машина или воркер пропали). Ненулевой код выхода
+шарда тоже возвращает его в todo, пока число попыток меньше
+--max-attempts. Выход каждой попытки пишется в свой файл, поэтому
+опоздавшая попытка не портит результат сменившей её.
+
+Деление входа:
+
+* bytes — непрерывные куски alldata примерно равного размера; слияние —
+  просто конкатенация выходов шардов. Для fio каждому шарду нужен весь
+  файл граждан, он копируется в очередь один раз.
+* phone — по crc32 телефона (как партиции hash join): строки одного
+  телефона попадают в один шард, для fio граждане делятся так же, и шарду
+  достаточно своей доли файла граждан. Номер шарда каждой записи пишется
+  в order.bin, по нему слияние восстанавливает исходный порядок.
+
+Шард — обычный запуск режима (python -m find_nationality fio|phone) в
+подпроцессе с теми же параметрами режима, что переданы после «--»;
+выход шарда — CSV. Записи, которые режим пропускает (короткие строки),
+в шарды не попадают. Всё задание локально, с несколькими воркерами на
+одной машине:
+
+    python -m find_nationality cluster run fio --queue q --shards 8 --local-workers 4 -- -w 2
+
+На нескольких машинах — отдельно submit, worker на каждой машине
+(в каталоге, где запускался бы обычный прогон) и merge.
+
+С --verify (run, merge) координатор после слияния прогоняет режим один
+раз без шардов на исходных входах и сравнивает результаты построчно:
+шардирование не должно менять ни одной строки. Расхождение означает, что
+результат контакта зависит от соседей по шарду или от нагрузки (например,
+от бюджета времени), — код возврата 1 и первые отличающиеся строки.
+"""
+
+import argparse
+import array
+import contextlib
+import csv
+import itertools
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+from . import fastcore
+from . import hash_join
+from . import output_sinks
+
+MODES = ("fio", "phone")
+SPLITS = ("bytes", "phone")
+DEFAULT_SHARDS = 4
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_S = 60.0
+DEFAULT_POLL_S = 2.0
+MAX_SHARDS = 65535
+# Записей order.bin на одно чтение или запись
+ORDER_CHUNK = 65536
+# Сколько расхождений --verify печатает
+DEFAULT_VERIFY_SHOW = 5
+
+STATES = ("todo", "claimed", "done", "failed")
+
+# Параметры режима, которые задаёт сам кластер (входы и выход шарда) или которые не дают построчного CSV
+RESERVED_MODE_ARGS = {
+    "-a", "--alldata-file", "-c", "--citizen-file", "-o", "--output-file", "--output-format",
+    "--dead-letters", "-l", "--limit", "--store", "--aggregate", "--sample",
+}
+
+_STATE_NAME = re.compile(r"^(\d+)\.(\d+)(?:@(.+))?$")
+
+
+class ClusterError(RuntimeError):
+    """ Задание нельзя поставить, выполнить или слить. """
+
+
+###############################################################################
+# Деление входов на шарды
+###############################################################################
+def _counted_lines(f, consumed):
+    """ Строки файла; consumed[0] — байты, прочитанные к концу последней строки. """
+    for line in f:
+        consumed[0] += len(line.encode("utf-8"))
+        yield line
+
+
+def _phone_records(alldata_file):
+    """ (телефон, строка, конец записи в байтах) по строкам, дающим строку результата режима phone. """
+    consumed = [0]
+    with open(alldata_file, "r", encoding="utf-8") as f:
+        for line in _counted_lines(f, consumed):
+            parsed = fastcore.split_contact_line(line)
+            if parsed:
+                yield parsed[0], line if line.endswith("\n") else line + "\n", consumed[0]
+
+
+def _fio_records(alldata_file):
+    """ (телефон, поля, конец записи в байтах) по записям, дающим строку результата режима fio. """
+    consumed = [0]
+    with open(alldata_file, "r", encoding="utf-8") as f:
+        for row in csv.reader(_counted_lines(f, consumed), delimiter=","):
+            if len(row) >= 3:
+                yield row[0].strip(), row, consumed[0]
+
+
+class _ShardFiles:
+    """ Открытые файлы одного входа во всех шардах: строки как есть или поля через csv.writer. """
+
+    def __init__(self, queue, name, shards, header=None):
+        self.paths = [os.path.join(queue.shard_dir(shard), name) for shard in range(shards)]
+        self._files = [open(path, "w", encoding="utf-8", newline="") for path in self.paths]
+        self._writers = [csv.writer(f) for f in self._files]
+        if header is not None:
+            for writer in self._writers:
+                writer.writerow(header)
+
+    def write_line(self, shard, line):
+        self._files[shard].write(line)
+
+    def write_row(self, shard, row):
+        self._writers[shard].writerow(row)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+def split_alldata(queue, mode, alldata_file, shards, split):
+    """ Раскладывает alldata по шардам; возвращает число записей в каждом шарде. """
+    total_bytes = max(1, os.path.getsize(alldata_file))
+    counts = [0] * shards
+    files = _ShardFiles(queue, "alldata.txt", shards)
+    # Номера шардов по порядку записей; пишутся в order.bin пачками
+    order = array.array("H")
+    order_file = open(queue.path("order.bin"), "wb") if split == "phone" else None
+    try:
+        records = _phone_records(alldata_file) if mode == "phone" else _fio_records(alldata_file)
+        start = 0
+        for phone, record, end in records:
+            if split == "phone":
+                shard = hash_join.partition_of(phone, shards)
+                order.append(shard)
+                if len(order) >= ORDER_CHUNK:
+                    order.tofile(order_file)
+                    del order[:]
+            else:
+                shard = min(shards - 1, start * shards // total_bytes)
+            start = end
+            if mode == "phone":
+                files.write_line(shard, record)
+            else:
+                files.write_row(shard, record)
+            counts[shard] += 1
+        if order_file is not None:
+            order.tofile(order_file)
+    finally:
+        files.close()
+        if order_file is not None:
+            order_file.close()
+    return counts
+
+
+def split_citizens(queue, citizen_file, shards):
+    """ Граждане по crc32 телефона в те же шарды, что и alldata (--split phone). """
+    with open(citizen_file, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f, delimiter=",")
+        header = next(reader, [])
+        phone_column = header.index("phone") if "phone" in header else None
+        files = _ShardFiles(queue, "citizens.csv", shards, header)
+        try:
+            for row in reader:
+                if not row:
+                    continue
+                phone = row[phone_column].strip() if phone_column is not None and phone_column < len(row) else ""
+                files.write_row(hash_join.partition_of(phone, shards), row)
+        finally:
+            files.close()
+
+
+###############################################################################
+# Очередь на общей файловой системе
+###############################################################################
+def _state_name(shard, attempts, token=None):
+    name = f"{shard:05d}.{attempts}"
+    return f"{name}@{token}" if token else name
+
+
+def _parse_state_name(name):
+    match = _STATE_NAME.match(name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2)), match.group(3)
+
+
+class Claim:
+    """ Шард, взятый воркером: заявка claimed/NNNNN.K@ТОКЕН. """
+
+    def __init__(self, queue, shard, attempts, token):
+        self.queue = queue
+        self.shard = shard
+        self.attempts = attempts
+        self.token = token
+        self.path = queue.path("claimed", _state_name(shard, attempts, token))
+
+    def touch(self):
+        """ Heartbeat; False — заявку забрали (аренда истекла), шард идёт у другого воркера. """
+        try:
+            os.utime(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def output_path(self, kind, extension):
+        return os.path.join(self.queue.shard_dir(self.shard), f"{kind}@{self.token}.{extension}")
+
+    def complete(self):
+        return self.queue.move(self.path, "done", _state_name(self.shard, self.attempts, self.token))
+
+    def fail(self):
+        """ Неудачная попытка: шард снова в todo или, если попытки исчерпаны, в failed. """
+        attempts = self.attempts + 1
+        state = "todo" if attempts < self.queue.job["max_attempts"] else "failed"
+        return self.queue.move(self.path, state, _state_name(self.shard, attempts))
+
+
+class WorkQueue:
+    """ Каталог очереди: задание, шарды и состояния. """
+
+    def __init__(self, root):
+        self.root = root
+        self._job = None
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def shard_dir(self, shard):
+        return self.path("shards", f"{shard:05d}")
+
+    @property
+    def job(self):
+        if self._job is None:
+            try:
+                with open(self.path("job.json"), "r", encoding="utf-8") as f:
+                    self._job = json.load(f)
+            except FileNotFoundError:
+                raise ClusterError(f"В {self.root} нет задания (job.json)")
+        return self._job
+
+    def create(self, shards):
+        """ Каталоги пустой очереди; задание появляется позже, в publish. """
+        if os.path.exists(self.path("job.json")):
+            raise ClusterError(f"В {self.root} уже есть задание; выберите другой каталог очереди")
+        for state in STATES:
+            os.makedirs(self.path(state), exist_ok=True)
+        for shard in range(shards):
+            os.makedirs(self.shard_dir(shard), exist_ok=True)
+
+    def publish(self, job):
+        """ Шарды в todo, затем job.json: воркеры видят задание только целиком. """
+        for shard in range(job["shards"]):
+            open(self.path("todo", _state_name(shard, 0)), "w").close()
+        tmp_path = self.path("job.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path("job.json"))
+        self._job = job
+
+    def entries(self, state):
+        """ [(шард, попытки, токен, имя)] в состоянии state, по номеру шарда. """
+        entries = []
+        for name in os.listdir(self.path(state)):
+            parsed = _parse_state_name(name)
+            if parsed is not None:
+                entries.append(parsed + (name,))
+        return sorted(entries)
+
+    def move(self, source, state, name):
+        """ Атомарный переход; False, если source уже забрал другой воркер. """
+        try:
+            os.rename(source, self.path(state, name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def claim(self, token):
+        """ Первый свободный шард из todo или None. """
+        for shard, attempts, _, name in self.entries("todo"):
+            claim = Claim(self, shard, attempts, token)
+            if self.move(self.path("todo", name), "claimed", os.path.basename(claim.path)):
+                claim.touch()
+                return claim
+        return None
+
+    def requeue_expired(self, lease_s=None):
+        """ Заявки без heartbeat дольше аренды — обратно в todo (или в failed); возвращает их число. """
+        lease_s = self.job["lease_s"] if lease_s is None else lease_s
+        now = time.time()
+        requeued = 0
+        for shard, attempts, token, name in self.entries("claimed"):
+            try:
+                expired = now - os.path.getmtime(self.path("claimed", name)) > lease_s
+            except FileNotFoundError:
+                continue
+            if expired and Claim(self, shard, attempts, token).fail():
+                requeued += 1
+        return requeued
+
+    def status(self):
+        return {state: len(self.entries(state)) for state in STATES}
+
+    def finished(self):
+        """ Больше нечего ждать: все шарды готовы или исчерпали попытки. """
+        counts = self.status()
+        return counts["todo"] == 0 and counts["claimed"] == 0
+
+    def done_outputs(self):
+        """ {шард: (выход, файл отказов)} по готовым шардам. """
+        outputs = {}
+        for shard, _, token, _ in self.entries("done"):
+            shard_dir = self.shard_dir(shard)
+            outputs[shard] = (os.path.join(shard_dir, f"output@{token}.csv"),
+                              os.path.join(shard_dir, f"dead_letters@{token}.csv"))
+        return outputs
+
+
+###############################################################################
+# Координатор: постановка задания и слияние
+###############################################################################
+def check_mode_args(mode_args):
+    reserved = sorted({arg.split("=", 1)[0] for arg in mode_args} & RESERVED_MODE_ARGS)
+    if reserved:
+        raise ClusterError(f"Параметры {', '.join(reserved)} задаёт кластер, их нельзя передавать режиму")
+
+
+def submit(queue, mode, alldata_file, citizen_file=None, shards=DEFAULT_SHARDS, split="bytes", mode_args=(),
+           max_attempts=DEFAULT_MAX_ATTEMPTS, lease_s=DEFAULT_LEASE_S):
+    """ Делит входы на шарды и ставит их в очередь; возвращает задание. """
+    if not 1 <= shards <= MAX_SHARDS:
+        raise ClusterError(f"Число шардов должно быть от 1 до {MAX_SHARDS}")
+    check_mode_args(mode_args)
+    for path in [alldata_file] + ([citizen_file] if mode == "fio" else []):
+        if not os.path.exists(path):
+            raise ClusterError(f"Файл {path} не найден!")
+
+    job = {
+        "mode": mode,
+        "split": split,
+        "shards": shards,
+        "mode_args": list(mode_args),
+        "max_attempts": max_attempts,
+        "lease_s": lease_s,
+        # Исходные входы — для прогона без шардов (merge --verify)
+        "alldata_file": os.path.abspath(alldata_file),
+        "citizen_file": os.path.abspath(citizen_file) if mode == "fio" else None,
+    }
+    queue.create(shards)
+    job["records"] = split_alldata(queue, mode, alldata_file, shards, split)
+    if mode == "fio":
+        if split == "phone":
+            split_citizens(queue, citizen_file, shards)
+        else:
+            shutil.copyfile(citizen_file, queue.path("citizens.csv"))
+    queue.publish(job)
+    return job
+
+
+def _shard_rows(path):
+    f = open(path, "r", encoding="utf-8", newline="")
+    return f, csv.reader(f)
+
+
+def _order(queue):
+    with open(queue.path("order.bin"), "rb") as f:
+        while True:
+            chunk = array.array("H")
+            chunk.frombytes(f.read(chunk.itemsize * ORDER_CHUNK))
+            if not chunk:
+                return
+            yield from chunk
+
+
+def _ordered_rows(readers, order):
+    """ Строки шардов в исходном порядке по номерам шардов из order.bin. """
+    for shard in order:
+        row = next(readers[shard], None)
+        if row is None:
+            raise ClusterError(f"Выход шарда {shard} короче его входа; шард нужно пересчитать")
+        yield row
+
+
+@contextlib.contextmanager
+def _merged_rows(queue):
+    """
+    (заголовок, строки всех шардов в исходном порядке). По исчерпании строк
+    проверяет, что в каждом шарде их ровно столько, сколько в него разложено.
+    """
+    job = queue.job
+    outputs = queue.done_outputs()
+    missing = [shard for shard in range(job["shards"]) if shard not in outputs]
+    if missing:
+        failed = [shard for shard, _, _, _ in queue.entries("failed")]
+        raise ClusterError(f"Не готовы шарды: {', '.join(map(str, missing))}"
+                           + (f" (исчерпали попытки: {', '.join(map(str, failed))})" if failed else ""))
+
+    files, readers, header = [], [], None
+    try:
+        for shard in range(job["shards"]):
+            f, reader = _shard_rows(outputs[shard][0])
+            files.append(f)
+            readers.append(reader)
+            shard_header = next(reader, None)
+            if header is not None and shard_header != header:
+                raise ClusterError(f"Заголовок шарда {shard} отличается от остальных")
+            header = shard_header
+
+        if job["split"] == "phone":
+            rows = _ordered_rows(readers, _order(queue))
+        else:
+            rows = itertools.chain.from_iterable(readers)
+
+        def checked_rows():
+            count = 0
+            for row in rows:
+                count += 1
+                yield row
+            # Строк в каждом шарде ровно столько, сколько в него разложено: лишних быть не должно
+            leftover = [shard for shard, reader in enumerate(readers) if next(reader, None) is not None]
+            if leftover or count != sum(job["records"]):
+                raise ClusterError(f"Строк результата {count}, ожидалось {sum(job['records'])}")
+
+        yield header or [], checked_rows()
+    finally:
+        for f in files:
+            f.close()
+
+
+def merge(queue, output_file, output_format=None):
+    """ Выходы шардов -> output_file в порядке исходного alldata; возвращает (строк, отказов). """
+    job = queue.job
+    with _merged_rows(queue) as (header, rows):
+        written = output_sinks.write_rows(output_sinks.open_sink(output_file, header, output_format), rows)
+
+    outputs = queue.done_outputs()
+    with open(queue.path("dead_letters.csv"), "wb") as merged:
+        for shard in range(job["shards"]):
+            path = outputs[shard][1]
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, merged)
+    with open(queue.path("dead_letters.csv"), "r", encoding="utf-8", newline="") as f:
+        dead_letters = sum(1 for _ in csv.reader(f))
+    return written, dead_letters
+
+
+def verify(queue, show=DEFAULT_VERIFY_SHOW):
+    """
+    Один прогон режима без шардов на исходных входах задания с теми же
+    параметрами режима; его выход сравнивается со слиянием шардов
+    построчно. Возвращает (строк, расхождений, первые show расхождений
+    как (номер строки, строка прогона, строка слияния)).
+    """
+    job = queue.job
+    if not job.get("alldata_file"):
+        raise ClusterError("В задании нет путей исходных входов; оно поставлено до появления --verify")
+    output_file = queue.path("verify_output.csv")
+    command = mode_command(job, job["alldata_file"], output_file, queue.path("verify_dead_letters.csv"),
+                           job.get("citizen_file"))
+    with open(queue.path("verify_log.txt"), "w", encoding="utf-8") as log_file:
+        return_code = subprocess.call(command, stdout=log_file, stderr=subprocess.STDOUT)
+    if return_code != 0:
+        raise ClusterError(f"Прогон без шардов завершился с кодом {return_code}, журнал: "
+                           f"{queue.path('verify_log.txt')}")
+
+    rows, mismatches, shown = 0, 0, []
+    with open(output_file, "r", encoding="utf-8", newline="") as f, _merged_rows(queue) as (header, merged):
+        pairs = itertools.zip_longest(csv.reader(f), itertools.chain([header], merged))
+        for index, (expected, actual) in enumerate(pairs):
+            rows += 1
+            if expected != actual:
+                mismatches += 1
+                if len(shown) < show:
+                    shown.append((index, expected, actual))
+    # Заголовок — не строка результата
+    return rows - 1, mismatches, shown
+
+
+###############################################################################
+# Воркер
+###############################################################################
+def worker_token(worker_id=None):
+    host = re.sub(r"[^0-9A-Za-z-]", "-", worker_id or socket.gethostname())
+    return f"{host}-{os.getpid()}"
+
+
+def mode_command(job, alldata_file, output_file, dead_letters_file, citizen_file=None):
+    """ Обычный запуск режима задания с его параметрами: шард или прогон без шардов (verify). """
+    command = [sys.executable, "-m", "find_nationality", job["mode"],
+               "-a", alldata_file, "-o", output_file, "--dead-letters", dead_letters_file]
+    if job["mode"] == "fio":
+        command += ["-c", citizen_file]
+    else:
+        command += ["-l", "0"]
+    return command + job["mode_args"]
+
+
+def shard_command(queue, job, claim):
+    shard_dir = queue.shard_dir(claim.shard)
+    citizens = None
+    if job["mode"] == "fio":
+        citizens = queue.path("citizens.csv" if job["split"] == "bytes" else os.path.join(
+            "shards", f"{claim.shard:05d}", "citizens.csv"))
+    return mode_command(job, os.path.join(shard_dir, "alldata.txt"), claim.output_path("output", "csv"),
+                        claim.output_path("dead_letters", "csv"), citizens)
+
+
+def run_shard(queue, claim):
+    """ Один шард в подпроцессе с heartbeat; True — готов, False — неудача, None — заявку забрали. """
+    job = queue.job
+    heartbeat_s = max(0.1, job["lease_s"] / 4)
+    with open(claim.output_path("log", "txt"), "w", encoding="utf-8") as log_file:
+        process = subprocess.Popen(shard_command(queue, job, claim), stdout=log_file, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                return_code = process.wait(timeout=heartbeat_s)
+                break
+            except subprocess.TimeoutExpired:
+                if not claim.touch():
+                    process.kill()
+                    process.wait()
+                    return None
+    if return_code == 0 and claim.complete():
+        return True
+    if return_code != 0:
+        claim.fail()
+        return False
+    return None
+
+
+def run_worker(queue, worker_id=None, poll_s=DEFAULT_POLL_S, exit_when_done=False, log=print):
+    """ Берёт шарды, пока они есть; без exit_when_done ждёт новых. Возвращает число обработанных шардов. """
+    token_base = worker_token(worker_id)
+    processed = 0
+    for attempt in itertools.count(1):
+        queue.requeue_expired()
+        claim = queue.claim(f"{token_base}-{attempt}")
+        if claim is None:
+            if exit_when_done and queue.finished():
+                return processed
+            time.sleep(poll_s)
+            continue
+        started = time.monotonic()
+        result = run_shard(queue, claim)
+        elapsed = time.monotonic() - started
+        if result:
+            processed += 1
+            log(f"Шард {claim.shard}: готов за {elapsed:.1f} с")
+        elif result is None:
+            log(f"Шард {claim.shard}: заявка истекла, его продолжает другой воркер")
+        else:
+            log(f"Шард {claim.shard}: ошибка (попытка {claim.attempts + 1}), "
+                f"журнал: {claim.output_path('log', 'txt')}")
+
+
+###############################################################################
+# Командная строка
+###############################################################################
+def _format_status(counts, shards):
+    return (f"Шарды: готово {counts['done']}/{shards}, в работе {counts['claimed']}, "
+            f"в очереди {counts['todo']}, отказ {counts['failed']}")
+
+
+def _add_submit_arguments(parser):
+    parser.add_argument("mode", choices=MODES, help="режим обработки шардов")
+    parser.add_argument("-a", "--alldata-file", default="alldata.txt", help="файл alldata (по умолчанию alldata.txt)")
+    parser.add_argument("-c", "--citizen-file", default="citizen_sample.csv",
+                        help="файл граждан для режима fio (по умолчанию citizen_sample.csv)")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS,
+                        help=f"число шардов (по умолчанию {DEFAULT_SHARDS})")
+    parser.add_argument("--split", choices=SPLITS, default="bytes",
+                        help="деление: bytes — непрерывные куски, phone — по хэшу телефона (по умолчанию bytes)")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f"попыток на шард (по умолчанию {DEFAULT_MAX_ATTEMPTS})")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_S,
+                        help=f"секунд без heartbeat, после которых шард отдаётся другому воркеру "
+                             f"(по умолчанию {DEFAULT_LEASE_S:g})")
+
+
+def _add_merge_arguments(parser):
+    parser.add_argument("-o", "--output-file", default="output_result.csv", help="итоговый файл результата")
+    parser.add_argument("--output-format", choices=output_sinks.FORMATS, default=None,
+                        help="формат итогового файла (по умолчанию — по расширению)")
+    parser.add_argument("--verify", action="store_true",
+                        help="после слияния прогнать режим один раз без шардов на тех же входах и сравнить "
+                             "результаты построчно; код возврата 1 при расхождениях")
+
+
+def main(argv=None, prog=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Всё после «--» — параметры режима для каждого шарда
+    mode_args = []
+    if "--" in argv:
+        split_at = argv.index("--")
+        argv, mode_args = argv[:split_at], argv[split_at + 1:]
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Распределённый прогон fio/phone по шардам через очередь на общей файловой системе. "
+                    "Параметры режима передаются после «--».")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="разделить входы на шарды и поставить их в очередь")
+    _add_submit_arguments(submit_parser)
+
+    worker_parser = commands.add_parser("worker", help="обрабатывать шарды из очереди")
+    worker_parser.add_argument("--id", default=None, help="имя воркера (по умолчанию имя машины)")
+    worker_parser.add_argument("--poll", type=float, default=DEFAULT_POLL_S,
+                               help=f"секунд между проверками очереди (по умолчанию {DEFAULT_POLL_S:g})")
+    worker_parser.add_argument("--exit-when-done", action="store_true",
+                               help="завершиться, когда все шарды готовы или исчерпали попытки")
+
+    status_parser = commands.add_parser("status", help="состояние шардов")
+
+    merge_parser = commands.add_parser("merge", help="слить выходы шардов в исходном порядке")
+    _add_merge_arguments(merge_parser)
+
+    run_parser = commands.add_parser("run", help="submit, локальные воркеры и merge одной командой")
+    _add_submit_arguments(run_parser)
+    _add_merge_arguments(run_parser)
+    run_parser.add_argument("--local-workers", type=int, default=2,
+                            help="число воркеров на этой машине (по умолчанию 2)")
+
+    for sub in (submit_parser, worker_parser, status_parser, merge_parser, run_parser):
+        sub.add_argument("--queue", required=True, help="каталог очереди на общей файловой системе")
+        sub.add_argument("-s", "--silent", action="store_true", help="не печатать ход работы")
+    args = parser.parse_args(argv)
+    if mode_args and args.command not in ("submit", "run"):
+        parser.error("параметры режима после «--» принимают только submit и run")
+
+    def log(message):
+        if not args.silent:
+            print(message, flush=True)
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.command in ("submit", "run"):
+            job = submit(queue, args.mode, args.alldata_file, args.citizen_file, args.shards, args.split,
+                         mode_args, args.max_attempts, args.lease)
+            log(f"Задание {job['mode']}: {sum(job['records'])} записей в {job['shards']} шардах ({job['split']})")
+        if args.command == "worker":
+            run_worker(queue, args.id, args.poll, args.exit_when_done, log)
+        elif args.command == "status":
+            print(_format_status(queue.status(), queue.job["shards"]))
+        elif args.command == "run":
+            command = [sys.executable, "-m", "find_nationality", "cluster", "worker", "--queue", args.queue,
+                       "--exit-when-done", "--poll", "0.5"] + (["--silent"] if args.silent else [])
+            workers = [subprocess.Popen(command + ["--id", f"local{i}"]) for i in range(args.local_workers)]
+            last_status = None
+            while any(worker.poll() is None for worker in workers):
+                status = _format_status(queue.status(), job["shards"])
+                if status != last_status:
+                    log(status)
+                    last_status = status
+                time.sleep(0.5)
+            status = _format_status(queue.status(), job["shards"])
+            if status != last_status:
+                log(status)
+        if args.command in ("merge", "run"):
+            written, dead_letters = merge(queue, args.output_file, args.output_format)
+            log(f"Готово! Результат сохранён в {args.output_file}. Всего строк: {written}.")
+            if dead_letters:
+                log(f"Отказов: {dead_letters}, см. {queue.path('dead_letters.csv')}.")
+            if args.verify:
+                rows, mismatches, shown = verify(queue)
+                if mismatches:
+                    print(f"Слияние расходится с прогоном без шардов: {mismatches} строк из {rows} "
+                          f"(см. {queue.path('verify_output.csv')})", file=sys.stderr)
+                    for index, expected, actual in shown:
+                        print(f"    строка {index}: {expected} != {actual}", file=sys.stderr)
+                    sys.exit(1)
+                log(f"Проверка: слияние совпадает с прогоном без шардов ({rows} строк).")
+    except ClusterError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Дедупликация классификации.
+
+В alldata одна и та же строка «как записан» и один и тот же телефон
+встречаются у многих user_id. В режиме дедупликации строки сначала
+считываются целиком, каждое уникальное имя и каждый уникальный телефон
+классифицируются ровно один раз, а результаты раздаются обратно по строкам.
+"""
+
+
+def classify_unique(items, classify, mapper=map, key=None):
+    """
+    Классифицирует каждый уникальный ключ один раз.
+
+    items    — элементы в порядке строк (с повторами);
+    classify — функция элемент -> результат;
+    mapper   — map или pool.imap-совместимая функция (fn, iterable);
+    key      — функция элемент -> ключ дедупликации (по умолчанию сам элемент).
+    Возвращает словарь {ключ: результат}.
+    """
+    unique = {}
+    for item in items:
+        unique.setdefault(key(item) if key else item, item)
+    return dict(zip(unique, mapper(classify, unique.values())))
+
+
+class DedupStats:
+    """ Счётчики строк и уникальных ключей для отчёта о коэффициенте сжатия. """
+
+    def __init__(self, rows=0):
+        self.rows = rows
+        self.unique = {}
+
+    def add(self, kind, unique_count):
+        self.unique[kind] = unique_count
+
+    def ratio(self, kind):
+        """ Во сколько раз меньше работы по данному виду ключей. """
+        count = self.unique.get(kind, 0)
+        return self.rows / count if count else 0.0
+
+    def summary(self, title="Дедупликация", rows_label="строк", unique_label="уникальных", ratio_label="коэффициент"):
+        """ Строка отчёта на языке режима (виды ключей — как переданы в add). """
+        parts = [f"{rows_label}: {self.rows}"]
+        for kind, count in self.unique.items():
+            parts.append(f"{unique_label} ({kind}): {count}, {ratio_label} {self.ratio(kind):.1f}x")
+        return f"{title} — " + "; ".join(parts)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общие словари и детекторы режимов fio и phone.
+
+Флаги-эмоджи, специфические буквы алфавитов, суффиксы фамилий и
+сопоставление страна -> национальность заданы здесь один раз. Режим
+выбирает из SUFFIXES свои национальности в своём порядке проверки
+(suffix_table) и может исключить отдельные суффиксы, но списки
+суффиксов у национальности одни на оба режима.
+
+Ключевые слова — гео, компании, профессии и семейные связи, ласкательные
+прозвища — лежат в json_data/contact_rules.json (CONTACT_RULES_PATH):
+phone перезагружает его на лету (rules.py), fio читает один раз при
+загрузке словарей. Детекторы ключевых слов получают словари аргументами,
+поэтому проверка одинакова в обоих режимах.
+"""
+
+import os
+import re
+
+from . import DATA_DIR
+from .nationality import Nationality
+from .transliteration import generate_transliterated_names_flatten
+
+CONTACT_RULES_PATH = os.path.join(DATA_DIR, "json_data", "contact_rules.json")
+
+###############################################################################
+# Эмоджи-флаги -> национальность
+###############################################################################
+flag_emoji_nationality = {
+    "🇷🇺": Nationality.RUSSIAN,
+    "🇺🇦": Nationality.UKRAINIAN,
+    "🇧🇾": Nationality.BELARUSIAN,
+    "🇰🇿": Nationality.KAZAKH,
+    "🇺🇿": Nationality.UZBEK,
+    "🇹🇯": Nationality.TAJIK,
+    "🇬🇪": Nationality.GEORGIAN,
+    "🇦🇲": Nationality.ARMENIAN,
+    "🇦🇿": Nationality.AZERBAIJANI,
+    "🇲🇩": Nationality.MOLDOVAN,
+    "🇱🇹": Nationality.LITHUANIAN,
+    "🇱🇻": Nationality.LATVIAN,
+    "🇪🇪": Nationality.ESTONIAN,
+}
+
+
+def detect_nationality_from_flag(contact_name: str):
+    for flag, nationality in flag_emoji_nationality.items():
+        if flag in contact_name:
+            return nationality
+    return None
+
+###############################################################################
+# Специфические буквы в слове -> признак языка
+###############################################################################
+_kazakh_letters = 'ӘәҒғҚқҢңӨөҰұҮүҺһІі'
+
+
+def detect_nationality_from_letters(contact_name: str):
+    # Украинские буквы
+    if re.search(r'[їієґІЇЄҐ]', contact_name):
+        return Nationality.UKRAINIAN
+    # Белорусские буквы
+    if re.search(r'[ўЎ]', contact_name):
+        return Nationality.BELARUSIAN
+    # Грузинский алфавит
+    if re.search(r'[\u10A0-\u10FF]', contact_name):
+        return Nationality.GEORGIAN
+    # Армянский алфавит
+    if re.search(r'[\u0530-\u058F]', contact_name):
+        return Nationality.ARMENIAN
+    # Казахские буквы
+    if re.search(f'[{_kazakh_letters}]', contact_name):
+        return Nationality.KAZAKH
+    # И т.д. можно дополнять
+    return None
+
+###############################################################################
+# Суффиксы фамилий (с транслитерацией)
+###############################################################################
+SUFFIXES = {
+    Nationality.RUSSIAN: [
+        "ов", "ев", "ov", "ev", "ин", "in", "sky", "skiy", "ykh", "ikh",
+        "ий", "oy", "ова", "ева", "ина", "ская", "eva", "ina", "skaya"
+    ],
+    Nationality.UKRAINIAN: [
+        "енко", "enko", "чук", "chuk", "ко", "ko", "ук", "uk", "юк", "yuk", "ык", "yk",
+    ],
+    Nationality.BELARUSIAN: [
+        "вич", "vich", "вичус", "vichus", "вичик", "vichyk"
+    ],
+    Nationality.KAZAKH: [
+        "ұлы", "uly", "кызы", "kyzy", "бек", "bek", "бай", "bay", "тай", "tai"
+    ],
+    Nationality.UZBEK: [
+        "зода", "zoda", "заде", "zade", "zada", "zoda"
+    ],
+    Nationality.GEORGIAN: [
+        "швили", "shvili", "дзе", "dze", "адзе", "adze", "ия", "ia", "ури", "uri"
+    ],
+    Nationality.ARMENIAN: [
+        "ян", "an", "янц", "yants"
+    ],
+    Nationality.AZERBAIJANI: [
+        "оглы", "ogly", "заде", "zade"
+    ],
+    Nationality.TAJIK: [
+        "заде", "zade", "зода", "zoda"
+    ],
+    Nationality.MOLDOVAN: [
+        "ару", "aru", "еску", "escu"
+    ],
+    Nationality.LITHUANIAN: [
+        "ас", "as", "ис", "is", "ус", "us", "юс", "jus",
+        "айтис", "aitis", "йте", "ytė", "ене", "iene"
+    ],
+    Nationality.LATVIAN: [
+        "анс", "ans", "калнс", "kalns", "вецмуктанс",
+        "vecmuktans", "сонс", "sons", "бергс", "bergs"
+    ],
+    Nationality.ESTONIAN: [
+        "мяэ", "mäe", "пылд", "põld", "оя", "oja",
+        "вяли", "väli", "мяги", "mägi", "метс", "mets", "соо", "soo"
+    ],
+    Nationality.CHECHEN: [
+        "хадж", "khadzh", "хаджи", "khadzhi", "хож", "khozh", "хаджиев", "khadzhiev"
+    ],
+    Nationality.DAGESTANI: [
+        "гаджиев", "gadzhiev", "хадж", "khadzh", "гаджи", "gadji"
+    ],
+    Nationality.CAUCASIAN: [
+        "пш", "psh", "шев", "shev"
+    ],
+    Nationality.ASIAN: [
+        "бек", "bek", "баев", "baev", "медов", "medov", "гулов", "gulov", "кулов", "kulov", "гул", "gul"
+    ],
+    Nationality.ANGLO_SAXON: [
+        "сон", "son", "тон", "ton", "лей", "ley", "форд", "ford", "вуд", "wood",
+        "ман", "man", "филд", "field", "брук", "brook"
+    ],
+    Nationality.INGUSH: [
+        "гов", "вов", "ив", "ме"
+    ],
+    Nationality.TATAR: [
+        "уллин", "гуллин", "уллов", "улов"
+    ],
+    Nationality.BURYAT: [
+        "доржиев", "дугаров", "баир"
+    ],
+}
+
+# Применяем транслитерацию к суффиксам
+SUFFIXES = {nationality: generate_transliterated_names_flatten(names) for nationality, names in SUFFIXES.items()}
+
+
+def suffix_table(nationalities, exclude=None):
+    """
+    Суффиксы выбранных национальностей в порядке их проверки режимом.
+    exclude — {национальность: суффиксы (уже с транслитерацией)}, которые
+    режим не проверяет: в phone, например, суффиксы имён «-ина», «-ева»
+    перехватывали бы исламские имена (Амина, Ясмина) до их шага.
+    """
+    exclude = exclude or {}
+    return {nationality: [suffix for suffix in SUFFIXES[nationality] if suffix not in exclude.get(nationality, ())]
+            for nationality in nationalities}
+
+###############################################################################
+# Страна / регион -> национальность
+###############################################################################
+country_to_nationality = {
+    "Russia": Nationality.RUSSIAN,
+    "Ukraine": Nationality.UKRAINIAN,
+    "Belarus": Nationality.BELARUSIAN,
+    "Kazakhstan": Nationality.KAZAKH,
+    "Uzbekistan": Nationality.UZBEK,
+    "Georgia": Nationality.GEORGIAN,
+    "Armenia": Nationality.ARMENIAN,
+    "Azerbaijan": Nationality.AZERBAIJANI,
+    "Moldova": Nationality.MOLDOVAN,
+    "Kyrgyzstan": Nationality.KYRGYZ,
+    "Tajikistan": Nationality.TAJIK,
+    "Turkmenistan": Nationality.TURKMEN,
+    "Latvia": Nationality.LATVIAN,
+    "Lithuania": Nationality.LITHUANIAN,
+    "Estonia": Nationality.ESTONIAN,
+    "Chechnya": Nationality.CHECHEN,
+    "Dagestan": Nationality.DAGESTANI,
+    "Ingushetia": Nationality.INGUSH,
+    "Tatarstan": Nationality.TATAR,
+    "Buryatia": Nationality.BURYAT,
+    "Bashkortostan": Nationality.TATAR,  # Можно использовать как Татарскую национальность
+    "Komi": Nationality.RUSSIAN,  # Возможна классификация по русскому большинству
+    "Kalmykia": Nationality.RUSSIAN,  # Можно добавить Калмыцкую национальность, если нужно
+    "Karelia": Nationality.RUSSIAN,  # Также можно добавить карельскую национальность, если нужно
+    "Sakha (Yakutia)": Nationality.RUSSIAN,  # Можно классифицировать как Якуты или оставить русский
+}
+
+###############################################################################
+# Ключевые слова (словари — из contact_rules.json)
+###############################################################################
+def detect_nationality_from_keywords(contact_name: str, keywords_by_country):
+    """ Гео и компании: первое вхождение ключевого слова страны (без учёта регистра). """
+    lowered = contact_name.lower()
+    for country, keywords in keywords_by_country.items():
+        for keyword in keywords:
+            if keyword.lower() in lowered:
+                return country_to_nationality.get(country)
+    return None
+
+
+def detect_russian_keyword(contact_name: str, words):
+    """ Профессии, семейные связи, ласкательные прозвища -> «русский». """
+    lowered = contact_name.lower()
+    for word in words:
+        if word.lower() in lowered:
+            return Nationality.RUSSIAN
+    return None
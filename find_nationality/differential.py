@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Дифференциальная проверка быстрых путей против эталонных реализаций.
+
+Эталон каждого режима — линейная реализация: в режиме phone это
+process_contact с перебором регулярных выражений mobile_codes.csv и
+city_codes_cis.csv, в режиме fio — detect_phone_geo и каскад
+detect_nationality_from_name по словарям в памяти. Все остальные движки
+(общие mmap-таблицы, дедупликация и любые новые оптимизации) прогоняются
+по тем же входным данным, и каждая строка сравнивается поле за полем
+с эталоном. Заодно для каждого движка замеряется пропускная способность.
+
+Входные данные:
+* сгенерированные: номера из диапазонов mobile_codes.csv (включая границы
+  диапазонов) и кодов city_codes_cis.csv, имена из словарей правил,
+  исламских имён и суффиксов, в том числе в латинице и с «шумом»;
+* фикстуры: любые файлы в формате alldata.txt (-a, можно несколько раз);
+* закреплённые имена (PINNED_NAMES) с ожидаемой национальностью в каждом
+  режиме: их эталонный результат сверяется с ожидаемым, а не только
+  движки между собой.
+
+    python -m find_nationality.differential -n 5000 --seed 1
+    python -m find_nationality.differential -a alldata.txt -l 20000 --mismatches diff.csv
+
+Нечёткое сопоставление и классификация контакта запускаются без лимита
+времени, иначе результат зависел бы от скорости машины. Код возврата 1, если хотя бы
+один движок разошёлся с эталоном.
+
+Новый быстрый путь подключается декоратором register_engine; движок —
+контекстный менеджер, который готовит структуры и отдаёт функцию
+«список контактов -> список строк-словарей».
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from . import DATA_DIR
+from . import detectors
+from . import fio
+from . import hash_join
+from . import name_sets
+from . import phone
+from . import prefix_table
+from . import transliteration
+from .nationality import Nationality
+
+MODES = ("phone", "fio")
+REFERENCE = "linear"
+# Партиций у движка fio.hash: несколько, чтобы слияние прогонов восстанавливало порядок
+HASH_JOIN_PARTITIONS = 4
+
+# {"режим.движок": (описание, фабрика контекстного менеджера, запускать ли по умолчанию)}
+ENGINES = {}
+
+
+def register_engine(name, description, default=True):
+    """
+    Регистрирует движок «режим.имя»; эталон режима называется «режим.linear».
+    default=False — движок намеренно меняет результат (например, другая
+    маршрутизация) и запускается только явно через --engine; его расхождения
+    с эталоном — это отчёт об изменениях для просмотра.
+    """
+    def decorator(factory):
+        ENGINES[name] = (description, factory, default)
+        return factory
+    return decorator
+
+
+def engines_for(mode, requested=None):
+    """ Движки режима: эталон первым, остальные в порядке регистрации. """
+    reference = f"{mode}.{REFERENCE}"
+    return [reference] + [
+        name for name, (_, _, default) in ENGINES.items()
+        if name.startswith(mode + ".") and name != reference
+        and (name in requested if requested else default)
+    ]
+
+
+class HarnessData:
+    """ Таблицы телефонов, загруженные один раз для всех движков (вне замеров). """
+
+    def __init__(self, mobile_codes, city_codes):
+        self.mobile_codes = mobile_codes
+        self.city_codes = city_codes
+        self.pattern_regions = phone.read_patterns_from_csv(mobile_codes)
+        self.cis = phone.read_patterns_cis(city_codes)
+
+
+###############################################################################
+# Движки
+###############################################################################
+@contextlib.contextmanager
+def _screen(module, enabled):
+    """
+    Фильтр Блума на время движка. Эталоны идут без него, остальные движки —
+    с ним (хотя по умолчанию он выключен), чтобы сверка проверяла и фильтр.
+    """
+    previous = module.screen_settings["enabled"]
+    module.screen_settings["enabled"] = enabled
+    try:
+        yield
+    finally:
+        module.screen_settings["enabled"] = previous
+
+
+@register_engine("phone.linear", "process_contact: перебор регулярных выражений, без фильтра Блума (эталон)")
+@contextlib.contextmanager
+def _phone_linear(data):
+    def run(contacts):
+        with _screen(phone, False):
+            return [phone.process_contact(number, name, data.pattern_regions, *data.cis)
+                    for number, name in contacts]
+    yield run
+
+
+@register_engine("phone.shared", "общие mmap-таблицы воркеров, в текущем процессе")
+@contextlib.contextmanager
+def _phone_shared(data):
+    tables_dir = tempfile.mkdtemp(prefix="find_nationality_diff_")
+    try:
+        tables_path = phone.build_shared_tables(os.path.join(tables_dir, "tables.bin"), data.mobile_codes)
+        phone._init_worker(tables_path, *data.cis)
+        with _screen(phone, True):
+            yield lambda contacts: [phone._process_contact_worker(contact) for contact in contacts]
+    finally:
+        phone._shared_tables = None
+        phone._worker_cis = None
+        shutil.rmtree(tables_dir, ignore_errors=True)
+
+
+@register_engine("phone.dedup", "каждый уникальный телефон и имя классифицируются один раз")
+@contextlib.contextmanager
+def _phone_dedup(data):
+    def lookup(number):
+        return phone.lookup_phone_route(number, data.pattern_regions, *data.cis)
+
+    def run(contacts):
+        results, _ = phone.process_contacts_dedup(contacts, lookup, phone.classify_contact_name)
+        return results
+    with _screen(phone, True):
+        yield run
+
+
+def _fio_row(contact):
+    number, name = contact
+    return {"phone_geo": fio.detect_phone_geo(number),
+            "nationality": fio._name_nationality_value(name)}
+
+
+@register_engine("phone.prefix", "одна таблица наибольшего префикса вместо трёх веток", default=False)
+@contextlib.contextmanager
+def _phone_prefix(data):
+    phone.routing_table = prefix_table.compile_table(phone.DEFAULT_PREFIX_SOURCES, data.mobile_codes, data.city_codes)
+    try:
+        yield lambda contacts: [phone.process_contact(number, name, [], *data.cis) for number, name in contacts]
+    finally:
+        phone.routing_table = None
+
+
+@register_engine("phone.ner", "части имени по spaCy (PROPN / PER) вместо проверки подстрок", default=False)
+@contextlib.contextmanager
+def _phone_ner(data):
+    phone.ner_settings["enabled"] = True
+    try:
+        def run(contacts):
+            phone.prime_person_names(name for _, name in contacts)
+            return [phone.process_contact(number, name, data.pattern_regions, *data.cis) for number, name in contacts]
+        yield run
+    finally:
+        phone.ner_settings["enabled"] = False
+
+
+@register_engine("fio.linear", "detect_phone_geo + каскад по словарям в памяти, без фильтра Блума (эталон)")
+@contextlib.contextmanager
+def _fio_linear(data):
+    def run(contacts):
+        with _screen(fio, False):
+            return [_fio_row(contact) for contact in contacts]
+    yield run
+
+
+@register_engine("fio.shared", "шаги 5-7 каскада по общим mmap-таблицам")
+@contextlib.contextmanager
+def _fio_shared(data):
+    tables_dir = tempfile.mkdtemp(prefix="find_nationality_diff_")
+    try:
+        fio._init_worker(fio.build_shared_tables(os.path.join(tables_dir, "tables.bin")))
+        with _screen(fio, True):
+            yield lambda contacts: [_fio_row(contact) for contact in contacts]
+    finally:
+        fio._shared_tables = None
+        shutil.rmtree(tables_dir, ignore_errors=True)
+
+
+@register_engine("fio.hash", f"grace hash join на {HASH_JOIN_PARTITIONS} партициях, порядок — по позиции во входе")
+@contextlib.contextmanager
+def _fio_hash(data):
+    work_dir = tempfile.mkdtemp(prefix="find_nationality_diff_")
+
+    def run(contacts):
+        # Контакты как строки alldata (read_alldata: пустой телефон -> None), граждан нет
+        alldata_rows = ((number or None, str(index), name) for index, (number, name) in enumerate(contacts))
+        rows, _ = hash_join.run_hash_join(iter(()), alldata_rows, work_dir, HASH_JOIN_PARTITIONS,
+                                          fio._build_rows, hash_join.ORDER_BY_POSITION)
+        return [{"phone_geo": row[1], "nationality": row[2]} for row in rows]
+    try:
+        with _screen(fio, True):
+            yield run
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+###############################################################################
+# Генерация входных данных
+###############################################################################
+def _fill_digits(pattern, rng, digit=None):
+    """ Заменяет каждый 'x' цифрой: случайной или заданной (границы диапазона). """
+    return "".join((digit or str(rng.randrange(10))) if ch == "x" else ch for ch in pattern)
+
+
+def mobile_numbers(csv_filename, rng, count):
+    """ Номера из случайных строк mobile_codes.csv: середина, начало и конец диапазона. """
+    with open(csv_filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        patterns = []
+        for row in reader:
+            if len(row) != 4:
+                continue
+            code, number_pattern = row[0].strip(), row[1].strip()
+            if number_pattern.startswith(code + "-"):
+                number_pattern = number_pattern[len(code) + 1:]
+            patterns.append(code + number_pattern)
+    numbers = []
+    for _ in range(count):
+        pattern = rng.choice(patterns)
+        number = _fill_digits(pattern, rng, rng.choice([None, None, "0", "9"]))
+        numbers.append(rng.choice(["7", "7", "+7", "007"]) + number)
+    return numbers
+
+
+def cis_numbers(csv_filename, rng, count):
+    """ Номера «код страны + код города + 4-7 цифр» из city_codes_cis.csv. """
+    with open(csv_filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        codes = [(row[1].strip(), row[2].strip()) for row in reader if len(row) == 4]
+    numbers = []
+    for _ in range(count):
+        country_code, city_code = rng.choice(codes)
+        tail = "".join(str(rng.randrange(10)) for _ in range(rng.randint(4, 7)))
+        numbers.append(rng.choice(["", "", "+", "00"]) + country_code + city_code + tail)
+    return numbers
+
+
+def odd_numbers(rng, count):
+    """ Пустые, «none», казахстанские, короткие и неизвестные номера. """
+    numbers = []
+    for _ in range(count):
+        kind = rng.randrange(5)
+        if kind == 0:
+            numbers.append(rng.choice(["", "none", "None", "+", "7"]))
+        elif kind == 1:
+            numbers.append("77" + "".join(str(rng.randrange(10)) for _ in range(9)))
+        elif kind == 2:
+            numbers.append("".join(str(rng.randrange(10)) for _ in range(rng.randint(1, 6))))
+        else:
+            numbers.append("".join(str(rng.randrange(10)) for _ in range(rng.randint(10, 13))))
+    return numbers
+
+
+def _name_pools():
+    """ Словари, из которых собираются имена контактов. """
+    phone.ensure_contact_rules()
+    rules = phone._active_rules
+    first_names = [name for names in rules.typical_names.values() for name in names]
+    # Множество исламских имён сортируется, чтобы выборка зависела только от зерна
+    first_names += sorted(name_sets.islamic_names())
+    suffixes = sorted({suffix for suffix_list in phone.suffixes.values() for suffix in suffix_list})
+    keywords = (rules.vulgar_words + rules.professions
+                + rules.family_relationships + rules.affectionate_nicknames
+                + list(rules.diminutive_to_formal)
+                + [company for companies in rules.company_keywords.values() for company in companies]
+                + [place for places in rules.geo_keywords.values() for place in places])
+    flags = list(detectors.flag_emoji_nationality)
+    return first_names, suffixes, keywords, flags
+
+
+def contact_names(rng, count):
+    """ Имена контактов по шаблонам: имя, имя+фамилия, ФИО, латиница, ключевые слова, шум. """
+    first_names, suffixes, keywords, flags = _name_pools()
+    names = []
+    for _ in range(count):
+        first = rng.choice(first_names)
+        surname = rng.choice(first_names).rstrip("аяь") + rng.choice(suffixes)
+        kind = rng.randrange(8)
+        if kind == 0:
+            name = first
+        elif kind == 1:
+            name = f"{first} {surname}"
+        elif kind == 2:
+            name = f"{surname} {first} {rng.choice(first_names)}ович"
+        elif kind == 3:
+            name = transliteration.translit_to_latin(f"{first} {surname}").title()
+        elif kind == 4:
+            name = f"{first} {rng.choice(keywords)}"
+        elif kind == 5:
+            name = f"{rng.choice(flags)} {first}"
+        elif kind == 6:
+            name = rng.choice(["", " ", "123", "!!!", rng.choice(keywords)])
+        else:
+            name = f"{first.lower()}{rng.randrange(100)} {surname.upper()}!"
+        names.append(name)
+    return names
+
+
+def generate_contacts(data, rng, count):
+    """ count пар (телефон, имя): 50% мобильные РФ, 35% СНГ, 15% прочие. """
+    mobile = mobile_numbers(data.mobile_codes, rng, count // 2)
+    cis = cis_numbers(data.city_codes, rng, count * 35 // 100)
+    numbers = mobile + cis + odd_numbers(rng, count - len(mobile) - len(cis))
+    rng.shuffle(numbers)
+    return list(zip(numbers, contact_names(rng, count)))
+
+
+def fixture_contacts(filenames, limit=None):
+    """ Пары (телефон, имя) из файлов alldata.txt. """
+    contacts = []
+    for filename in filenames:
+        contacts.extend(islice(phone.iter_contacts(filename), limit))
+    return contacts
+
+
+# Закреплённые имена: (имя, ожидаемая национальность в phone, в fio). Каждое
+# однажды изменило результат из-за правки общих словарей (detectors.py):
+# суффиксы имён «-ина» в phone перехватывали исламские имена и более
+# сильные суффиксы фамилий.
+PINNED_NAMES = [
+    ("Амина", Nationality.ISLAM, Nationality.ISLAM),
+    ("Ясмина", Nationality.ISLAM, Nationality.ISLAM),
+    ("Раина Ханийkalns", Nationality.LATVIAN, Nationality.ISLAM),
+    ("Ясина Любовару", Nationality.MOLDOVAN, Nationality.ISLAM),
+    ("лина28 ФАЭЗИСОО!", Nationality.ESTONIAN, Nationality.UNDETERMINED),
+]
+
+
+def pinned_contacts():
+    """ Закреплённые имена как контакты без телефона: их сверяют и все движки. """
+    return [("", name) for name, _, _ in PINNED_NAMES]
+
+
+def check_pinned(mode):
+    """ Закреплённые имена по эталонному каскаду режима: [(имя, ожидалось, получено)]. """
+    module = phone if mode == "phone" else fio
+    column = 1 if mode == "phone" else 2
+    mismatches = []
+    with _screen(module, False):
+        for entry in PINNED_NAMES:
+            actual = module.detect_nationality_from_name(entry[0])
+            if actual != entry[column]:
+                mismatches.append((entry[0], entry[column], actual))
+    return mismatches
+
+
+###############################################################################
+# Сравнение и замеры
+###############################################################################
+class EngineReport:
+    """ Время лучшего прогона и расхождения одного движка с эталоном. """
+
+    def __init__(self, name, rows, seconds):
+        self.name = name
+        self.rows = rows
+        self.seconds = seconds
+        self.mismatches = []
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+def run_engine(name, data, contacts, repeat=1):
+    """ Прогоняет движок repeat раз; возвращает (строки последнего прогона, лучшее время). """
+    _, factory, _ = ENGINES[name]
+    best = None
+    with factory(data) as run:
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            rows = run(contacts)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def compare_rows(expected_rows, actual_rows, contacts):
+    """ Расхождения построчно: (номер строки, телефон, имя, поле, эталон, движок). """
+    mismatches = []
+    if len(expected_rows) != len(actual_rows):
+        mismatches.append((-1, "", "", "rows", len(expected_rows), len(actual_rows)))
+    for index, (expected, actual, (number, name)) in enumerate(zip(expected_rows, actual_rows, contacts)):
+        for field in sorted(expected.keys() | actual.keys()):
+            if expected.get(field) != actual.get(field):
+                mismatches.append((index, number, name, field, expected.get(field), actual.get(field)))
+    return mismatches
+
+
+def run_mode(mode, data, contacts, engines=None, repeat=1):
+    """ Эталон и движки режима по одним и тем же контактам; список EngineReport. """
+    names = engines_for(mode, engines)
+    reference_rows, seconds = run_engine(names[0], data, contacts, repeat)
+    reports = [EngineReport(names[0], len(contacts), seconds)]
+    for name in names[1:]:
+        rows, seconds = run_engine(name, data, contacts, repeat)
+        report = EngineReport(name, len(contacts), seconds)
+        report.mismatches = compare_rows(reference_rows, rows, contacts)
+        reports.append(report)
+    return reports
+
+
+def print_reports(reports, show):
+    reference = reports[0]
+    for report in reports:
+        status = "эталон" if report is reference else (
+            "совпадает" if not report.mismatches else f"РАСХОЖДЕНИЙ: {len(report.mismatches)}")
+        speedup = reference.seconds / report.seconds if report.seconds else float("inf")
+        print(f"{report.name:14} {report.rows_per_second:12,.0f} строк/с  x{speedup:6.2f}  {status}")
+        for index, number, name, field, expected, actual in report.mismatches[:show]:
+            print(f"    строка {index}: {number!r} {name!r} {field}: {expected!r} != {actual!r}")
+
+
+def write_mismatches(path, reports):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Engine", "Row", "Phone", "Contact", "Field", "Expected", "Actual"])
+        for report in reports:
+            for mismatch in report.mismatches:
+                writer.writerow([report.name, *mismatch])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Сравнение быстрых путей с эталонными реализациями: расхождения и скорость.")
+    parser.add_argument("-a", "--alldata-file", action="append", default=[],
+                        help="Файл-фикстура в формате alldata.txt (можно указать несколько раз).")
+    parser.add_argument("-l", "--limit", type=int, default=0,
+                        help="Не более N контактов из каждой фикстуры, 0 — все (по умолчанию 0).")
+    parser.add_argument("-n", "--generated", type=int, default=5000,
+                        help="Число сгенерированных контактов (по умолчанию 5000).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Зерно генератора входных данных (по умолчанию 0).")
+    parser.add_argument("--mode", choices=MODES, action="append", default=None,
+                        help="Проверяемый режим (по умолчанию оба).")
+    parser.add_argument("--engine", action="append", default=None,
+                        help=f"Проверять только этот движок, например phone.shared (доступны: {', '.join(ENGINES)}).")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="Прогонов каждого движка; в отчёт идёт лучшее время (по умолчанию 1).")
+    parser.add_argument("--no-fuzzy", action="store_true",
+                        help="Отключить нечёткое сопоставление во всех движках.")
+    parser.add_argument("--mobile-codes", default=os.path.join(DATA_DIR, "mobile_codes.csv"),
+                        help="Путь к mobile_codes.csv.")
+    parser.add_argument("--city-codes", default=os.path.join(DATA_DIR, "city_codes_cis.csv"),
+                        help="Путь к city_codes_cis.csv.")
+    parser.add_argument("--mismatches", default=None,
+                        help="Записать все расхождения в этот CSV.")
+    parser.add_argument("--show", type=int, default=5,
+                        help="Сколько расхождений каждого движка печатать (по умолчанию 5).")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.engine or [] if name not in ENGINES]
+    if unknown:
+        parser.error(f"неизвестные движки: {', '.join(unknown)}")
+
+    for settings in (phone.fuzzy_settings, fio.fuzzy_settings):
+        settings.update(enabled=not args.no_fuzzy, time_budget_ms=0)
+    for guard in (phone.contact_guard, fio.name_guard):
+        guard.time_budget_s = 0
+
+    data = HarnessData(args.mobile_codes, args.city_codes)
+    contacts = generate_contacts(data, random.Random(args.seed), args.generated)
+    contacts += fixture_contacts(args.alldata_file, args.limit or None)
+    contacts += pinned_contacts()
+    print(f"Контактов: {len(contacts)} (сгенерировано {args.generated}, закреплённых {len(PINNED_NAMES)}, "
+          f"из фикстур {len(contacts) - args.generated - len(PINNED_NAMES)})")
+
+    reports = []
+    pinned_failed = False
+    for mode in args.mode or MODES:
+        mode_reports = run_mode(mode, data, contacts, args.engine, args.repeat)
+        print_reports(mode_reports, args.show)
+        reports.extend(mode_reports)
+        pinned = check_pinned(mode)
+        print(f"{mode}: закреплённые имена {'совпадают' if not pinned else f'РАСХОЖДЕНИЙ: {len(pinned)}'}")
+        for name, expected, actual in pinned:
+            print(f"    {name!r}: {expected.value} != {actual.value}")
+        pinned_failed = pinned_failed or bool(pinned)
+
+    if args.mismatches:
+        write_mismatches(args.mismatches, reports)
+    sys.exit(1 if pinned_failed or any(report.mismatches for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
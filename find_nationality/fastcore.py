@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Горячие циклы классификации контактов: очистка имени, подсчёт суффиксов
+по частям имени, нормализация номера телефона и разбор строки alldata.
+
+На десятках миллионов строк заметна не логика этих шагов, а накладные
+расходы интерпретатора на каждом контакте: два прохода регулярных
+выражений в clean_name, part.lower() и генератор any() на каждую пару
+(часть имени, суффикс), лишние копии строк. Здесь те же шаги написаны
+с аннотациями типов и без лишних выделений памяти (суффиксы группы —
+один кортеж для str.endswith, быстрый путь для имён из одних букв).
+
+Модуль — обычный Python и работает без компиляции. Он написан на
+подмножестве, которое понимает mypyc, поэтому его можно собрать в
+расширение:
+
+    mypyc find_nationality/fastcore.py
+
+Собранный fastcore.*.so ложится рядом и импортируется вместо .py
+(COMPILED показывает, что загружено); удалить .so — вернуться к
+чистому Python. Результаты в обоих случаях совпадают с прежними
+функциями символ в символ.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+COMPILED: bool = not __file__.endswith(".py")
+
+# То, что прежде удаляли два вызова re.sub: не буква/цифра/пробел, а также цифры
+_NOT_NAME_CHAR = re.compile(r"[^\w\s]|\d")
+
+
+def clean_name(name: str) -> str:
+    """ Имя без эмодзи, знаков препинания и цифр, без пробелов по краям. """
+    if name.isalpha():
+        return name
+    # Буквы и пробелы: удалять нечего, остаётся обрезать края
+    if name.replace(" ", "").isalpha():
+        return name.strip()
+    return _NOT_NAME_CHAR.sub("", name).strip()
+
+
+def suffix_groups(groups: Sequence[Sequence[str]]) -> List[Tuple[str, ...]]:
+    """ Списки суффиксов -> кортежи для str.endswith, в том же порядке. """
+    return [tuple(group) for group in groups]
+
+
+def best_suffix_group(parts: Sequence[str], groups: List[Tuple[str, ...]]) -> int:
+    """
+    Индекс группы, суффиксами которой оканчивается больше всего частей
+    (в нижнем регистре); при равенстве — первая. -1, если ни одной.
+    """
+    counts = [0] * len(groups)
+    for part in parts:
+        lowered = part.lower()
+        for i in range(len(groups)):
+            if lowered.endswith(groups[i]):
+                counts[i] += 1
+    best = -1
+    best_count = 0
+    for i in range(len(counts)):
+        if counts[i] > best_count:
+            best = i
+            best_count = counts[i]
+    return best
+
+
+def first_suffix_group(parts: Sequence[str], groups: List[Tuple[str, ...]]) -> int:
+    """ Индекс первой группы, суффиксом которой оканчивается хоть одна часть (с учётом регистра); -1 — нет. """
+    for i in range(len(groups)):
+        group = groups[i]
+        for part in parts:
+            if part.endswith(group):
+                return i
+    return -1
+
+
+def strip_dial_prefix(phone_number: str) -> str:
+    """ Номер без международного префикса «+» или «00». """
+    if phone_number.startswith("+"):
+        return phone_number[1:]
+    if phone_number.startswith("00"):
+        return phone_number[2:]
+    return phone_number
+
+
+def normalise_phone(phone_number: Optional[str]) -> Optional[str]:
+    """ Номер без пробелов по краям и префикса «+»/«00»; None — номера нет (пусто или «none»). """
+    if not phone_number or (len(phone_number) == 4 and phone_number.lower() == "none"):
+        return None
+    number = phone_number.strip()
+    if number.startswith("+"):
+        return number[1:]
+    if number.startswith("00"):
+        return number[2:]
+    return number
+
+
+def split_contact_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """ (phone, user_id, contact_name) из строки alldata.txt; None для пустых и коротких строк. """
+    parts = line.split(",", 3)
+    if len(parts) < 3:
+        return None
+    return parts[0].strip().strip('"'), parts[1].strip().strip('"'), parts[2].strip().strip('"')
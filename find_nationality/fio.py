@@ -0,0 +1,999 @@
+# -*- coding: utf-8 -*-
+"""
+Режим FIO-join: соединение файла граждан с alldata.txt по телефону.
+
+Импорт модуля ничего не загружает: модель spaCy и словари имён
+загружаются при первой классификации (см. get_nlp, load_name_indexes).
+"""
+
+import csv
+import os
+import re
+import json
+import sys
+import argparse
+import contextlib
+import multiprocessing
+import shutil
+import tempfile
+
+from . import DATA_DIR
+from . import bloom
+from . import dedup
+from . import detectors
+from . import fastcore
+from . import fuzzy_names
+from . import hash_join
+from . import isolation
+from . import metrics
+from . import name_sets
+from . import output_sinks
+from . import prefix_table
+from . import profiles
+from . import progress
+from . import result_store
+from . import rules
+from . import shared_tables
+from . import startup
+from . import transliteration
+from .nationality import Nationality
+
+_nlp = None
+
+
+def get_nlp():
+    """ Русская модель spaCy; загружается при первом вызове. """
+    global _nlp
+    if _nlp is None:
+        import spacy
+        # Проверка: установлена ли русская модель spaCy
+        try:
+            with metrics.load_timer("ru_core_news_md"):
+                _nlp = spacy.load("ru_core_news_md")
+        except OSError:
+            raise RuntimeError(
+                "Не установлена модель 'ru_core_news_md' для spaCy.\n"
+                "Установите командой: python -m spacy download ru_core_news_md"
+            )
+    return _nlp
+
+###############################################################################
+# Суффиксы фамилий в порядке проверки (списки общие с phone, см. detectors.py;
+# латинское «skaya» из списка phone режим fio не проверяет)
+###############################################################################
+suffixes = detectors.suffix_table([
+    Nationality.RUSSIAN, Nationality.UKRAINIAN, Nationality.BELARUSIAN, Nationality.KAZAKH,
+    Nationality.UZBEK, Nationality.GEORGIAN, Nationality.ARMENIAN, Nationality.AZERBAIJANI,
+    Nationality.TAJIK, Nationality.MOLDOVAN, Nationality.LITHUANIAN, Nationality.LATVIAN,
+    Nationality.ESTONIAN,
+], exclude={Nationality.RUSSIAN: ("skaya",)})
+
+###############################################################################
+# Словари имён: typical_names.json (+ уменьшительные) и исламские имена.
+# Загружаются лениво при первой классификации, а не при импорте модуля.
+###############################################################################
+typical_name_index = None
+typical_names = None
+islamic_names = None
+# Ключевые слова из contact_rules.json (общие с phone, см. detectors.py)
+affectionate_nicknames = None
+geo_keywords = None
+company_keywords = None
+professions_and_relations = None
+
+
+def _read_typical_names():
+    """ typical_names.json (если существует) с ключами, приведёнными к Enum. """
+    json_path = os.path.join(DATA_DIR, "json_data", "typical_names.json")
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            typical_names_data = json.load(f)
+    else:
+        typical_names_data = {"typical_names": {}}
+
+    names_by_nationality = {}
+    # Преобразуем ключи в Enum, если получается
+    for key, value in typical_names_data.get("typical_names", {}).items():
+        try:
+            names_by_nationality[Nationality[key]] = value
+        except KeyError:
+            pass
+    return names_by_nationality
+
+
+def _diminutive_names(names_by_nationality):
+    """ Уменьшительные формы (spaCy нужен, только если есть типичные имена). """
+    diminutive_names = {}
+    for nationality, names in names_by_nationality.items():
+        diminutives = []
+        for name in names:
+            doc = get_nlp()(name)
+            for token in doc:
+                if token.pos_ == "PROPN":
+                    diminutive = token.text.lower() + "ка"  # Примитивная эвристика
+                    diminutives.append(diminutive)
+        diminutive_names[nationality] = diminutives
+    return diminutive_names
+
+
+def _load_keywords():
+    """ Словари ключевых слов из contact_rules.json — тот же файл, что у phone. """
+    global affectionate_nicknames, geo_keywords, company_keywords, professions_and_relations
+    data = rules.load_rules_file(detectors.CONTACT_RULES_PATH)
+    affectionate_nicknames = data["affectionate_nicknames"]
+    geo_keywords = data["geo_keywords"]
+    company_keywords = data["company_keywords"]
+    professions_and_relations = data["professions"] + data["family_relationships"]
+
+
+def load_name_indexes():
+    """ Загружает словари имён один раз; повторные вызовы ничего не делают. """
+    global typical_name_index, typical_names, islamic_names
+    if typical_names is not None:
+        return
+    _load_keywords()
+    names_by_nationality = _read_typical_names()
+    diminutive_names = _diminutive_names(names_by_nationality)
+    # Объединяем имена и уменьшительные в общий индекс (кириллица + транслитерация)
+    typical_name_index = transliteration.NameIndex({
+        nationality: names + diminutive_names.get(nationality, [])
+        for nationality, names in names_by_nationality.items()
+    })
+    islamic_names = name_sets.islamic_names()
+    typical_names = typical_name_index.as_flattened_dict()
+
+###############################################################################
+# Ласкательные прозвища, флаги, буквы, гео, компании, профессии / семейные
+# связи — детекторы общие с phone (detectors.py)
+###############################################################################
+def detect_nationality_from_affectionate_nickname(name: str):
+    return detectors.detect_russian_keyword(name, affectionate_nicknames)
+
+
+detect_nationality_from_flag = detectors.detect_nationality_from_flag
+detect_nationality_from_letters = detectors.detect_nationality_from_letters
+
+
+def detect_nationality_from_geo(contact_name: str):
+    return detectors.detect_nationality_from_keywords(contact_name, geo_keywords)
+
+
+def detect_nationality_from_company(contact_name: str):
+    return detectors.detect_nationality_from_keywords(contact_name, company_keywords)
+
+
+def detect_nationality_from_profession_or_relation(contact_name: str):
+    return detectors.detect_russian_keyword(contact_name, professions_and_relations)
+
+###############################################################################
+# Уменьшительные формы
+###############################################################################
+diminutive_to_formal = {
+    "Саша": "Александр",
+    "Коля": "Николай",
+    "Ваня": "Иван",
+    "Дима": "Дмитрий",
+}
+
+def normalize_diminutive(name: str):
+    for diminutive, formal in diminutive_to_formal.items():
+        if diminutive.lower() in name.lower():
+            return name.lower().replace(diminutive.lower(), formal.lower())
+    return name
+
+###############################################################################
+# Типичные имена (точное совпадение, латиница приводится к кириллице)
+###############################################################################
+def _latin_parts_as_cyrillic(name_parts):
+    return [typical_name_index.to_cyrillic(part) for part in name_parts
+            if transliteration.is_latin(part)]
+
+
+def detect_nationality_from_typical_names(name_parts):
+    if _shared_tables is not None:
+        return _typical_names_shared(name_parts)
+    nat = typical_name_index.first_label(name_parts)
+    if nat is None:
+        nat = typical_name_index.first_label(_latin_parts_as_cyrillic(name_parts))
+    return nat
+
+
+def detect_nationality_from_islamic_names(name_parts):
+    names = _shared_tables["islamic_names"] if _shared_tables is not None else islamic_names
+    if any(part in names for part in name_parts):
+        return Nationality.ISLAM
+    return None
+
+
+# Суффиксы национальностей кортежами для str.endswith (порядок — как в suffixes)
+_suffix_nationality_order = list(suffixes)
+_suffix_groups = fastcore.suffix_groups(suffixes.values())
+
+
+def detect_nationality_from_suffixes(name_parts):
+    if _shared_tables is not None:
+        return _suffixes_shared(name_parts)
+    best = fastcore.first_suffix_group(name_parts, _suffix_groups)
+    return _suffix_nationality_order[best] if best >= 0 else None
+
+###############################################################################
+# Нечёткий поиск по типичным и исламским именам (см. fuzzy_names.py)
+###############################################################################
+fuzzy_settings = {
+    "enabled": True,
+    "threshold": fuzzy_names.DEFAULT_THRESHOLD,
+    "time_budget_ms": fuzzy_names.DEFAULT_TIME_BUDGET_MS,
+    "max_candidates": fuzzy_names.DEFAULT_MAX_CANDIDATES,
+}
+_fuzzy_index = None
+
+
+def get_fuzzy_index():
+    """ Индекс строится лениво, при первом промахе точных проверок. """
+    global _fuzzy_index
+    if _fuzzy_index is None:
+        load_name_indexes()
+        groups = {nat.name: names for nat, names in typical_names.items()}
+        groups[Nationality.ISLAM.name] = list(islamic_names)
+        _fuzzy_index = fuzzy_names.FuzzyNameIndex(groups)
+    return _fuzzy_index
+
+
+###############################################################################
+# Фильтр Блума перед шагами 5-7 (см. bloom.py)
+###############################################################################
+# По умолчанию выключен: шаги 5-7 — малая доля времени на контакт, и отсев
+# на замерах (benchmarks/bench_bloom.py) не даёт выигрыша больше шума
+screen_settings = {"enabled": False}
+_name_screen = None
+
+
+def get_name_screen():
+    """ Фильтр по типичным именам (с транслитерацией), исламским именам и суффиксам. """
+    global _name_screen
+    if _name_screen is None:
+        load_name_indexes()
+        names = [name for names in typical_names.values() for name in names]
+        names += list(islamic_names) + list(islamic_names.variants)
+        suffix_list = [suffix for suffix_list in suffixes.values() for suffix in suffix_list]
+        _name_screen = bloom.TokenScreen.build(names, suffix_list, os.path.join(DATA_DIR, "name_filter_fio.bin"))
+    return _name_screen
+
+
+def detect_nationality_fuzzy(name_parts):
+    words = [re.sub(r'[^\w]', '', part) for part in name_parts]
+    hit = get_fuzzy_index().match_parts(
+        words, fuzzy_settings["threshold"], fuzzy_settings["time_budget_ms"], fuzzy_settings["max_candidates"]
+    )
+    return Nationality[hit[0]] if hit else None
+
+###############################################################################
+# Общие таблицы для воркеров пула процессов (см. shared_tables.py)
+###############################################################################
+_shared_tables = None
+
+
+def build_shared_tables(path):
+    """
+    Один раз собирает индексы типичных имён, исламских имён и суффиксов и
+    публикует их файлом для воркеров. Маска ключа хранит все национальности,
+    в списках которых он встречается; младший бит — первая по порядку.
+    """
+    load_name_indexes()
+    name_labels, name_index = shared_tables.build_mask_index(
+        {nat.name: names for nat, names in typical_names.items()}
+    )
+    _, islamic_index = shared_tables.build_mask_index({Nationality.ISLAM.name: islamic_names})
+    suffix_labels, suffix_index = shared_tables.build_mask_index(
+        {nat.name: suffix_list for nat, suffix_list in suffixes.items()}
+    )
+    return shared_tables.write_tables(
+        path,
+        key_tables={
+            "typical_names": name_index,
+            "islamic_names": islamic_index,
+            "suffixes": suffix_index,
+        },
+        labels={
+            "typical_names": name_labels,
+            "suffixes": suffix_labels,
+            "suffix_lengths": shared_tables.suffix_lengths(suffix_index),
+        },
+    )
+
+
+def _typical_names_shared(name_parts):
+    """ Шаг 5 через mmap-индекс: первая национальность по порядку среди всех частей. """
+    names = _shared_tables["typical_names"]
+    for parts in (name_parts, _latin_parts_as_cyrillic(name_parts)):
+        mask = 0
+        for part in parts:
+            mask |= names.get(part)
+        label = shared_tables.lowest_label(mask, _shared_tables.labels["typical_names"])
+        if label:
+            return Nationality[label]
+    return None
+
+
+def _suffixes_shared(name_parts):
+    """ Шаг 7 через mmap-индекс суффиксов. """
+    mask = 0
+    index = _shared_tables["suffixes"]
+    for part in name_parts:
+        for length in _shared_tables.labels["suffix_lengths"]:
+            if len(part) >= length:
+                mask |= index.get(part[-length:])
+    label = shared_tables.lowest_label(mask, _shared_tables.labels["suffixes"])
+    if label:
+        return Nationality[label]
+    return None
+
+
+def _init_worker(tables_path, routing=None):
+    global _shared_tables, routing_table
+    _shared_tables = shared_tables.SharedTables(tables_path)
+    routing_table = routing
+
+
+def _pool_context():
+    # fork: воркеры наследуют уже инициализированный модуль (и модель spaCy)
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+###############################################################################
+# Главная функция определения национальности по любому имени
+###############################################################################
+def detect_nationality_from_name(name: str) -> Nationality:
+    load_name_indexes()
+    # 1. Учитываем уменьшительные
+    name = normalize_diminutive(name)
+
+    # 2. Ласкательные прозвища
+    aff_nat = detect_nationality_from_affectionate_nickname(name)
+    if aff_nat:
+        return aff_nat
+
+    # 3. Флаг-эмоджи
+    flag_nat = detect_nationality_from_flag(name)
+    if flag_nat:
+        return flag_nat
+
+    # 4. Специфические буквы
+    letter_nat = detect_nationality_from_letters(name)
+    if letter_nat:
+        return letter_nat
+
+    name_parts = name.split()
+    # Фильтр Блума: если ни одна часть не может быть в словарях, шаги 5-7 пропускаются
+    maybe_known = (not screen_settings["enabled"]
+                   or get_name_screen().might_match_any(name_parts, lambda: _latin_parts_as_cyrillic(name_parts)))
+    if maybe_known:
+        # 5-7 в воркерах идут по общим mmap-таблицам (та же семантика)
+        # 5. Типичные имена
+        typical_nat = detect_nationality_from_typical_names(name_parts)
+        if typical_nat:
+            return typical_nat
+
+        # 6. Исламские имена
+        islamic_nat = detect_nationality_from_islamic_names(name_parts)
+        if islamic_nat:
+            return islamic_nat
+
+        # 7. Суффиксы
+        suffix_nat = detect_nationality_from_suffixes(name_parts)
+        if suffix_nat:
+            return suffix_nat
+
+    # 8. Гео
+    geo_nat = detect_nationality_from_geo(name)
+    if geo_nat:
+        return geo_nat
+
+    # 9. Компании
+    comp_nat = detect_nationality_from_company(name)
+    if comp_nat:
+        return comp_nat
+
+    # 10. Профессии / семейные связи
+    prof_nat = detect_nationality_from_profession_or_relation(name)
+    if prof_nat:
+        return prof_nat
+
+    # 11. Нечёткое совпадение имён — только когда все точные проверки промахнулись
+    if fuzzy_settings["enabled"]:
+        fuzzy_nat = detect_nationality_fuzzy(name_parts)
+        if fuzzy_nat:
+            return fuzzy_nat
+
+    return Nationality.UNDETERMINED
+
+###############################################################################
+# Определение национальности по ФИО
+###############################################################################
+def detect_nationality_from_fio(fname: str, lname: str, mname: str) -> Nationality:
+    full_name = " ".join(filter(None, [fname, lname, mname])).strip()
+    if not full_name:
+        return Nationality.UNDETERMINED
+    return detect_nationality_from_name(full_name)
+
+###############################################################################
+# Обработка одной строки alldata
+###############################################################################
+# Таблица наибольшего префикса (см. prefix_table.py); задаётся флагом --routing prefix
+routing_table = None
+
+# Файлы префиксов для --routing prefix, если --prefix-source не задан
+DEFAULT_PREFIX_SOURCES = [os.path.join(DATA_DIR, "phone_prefixes.csv")]
+
+
+def detect_phone_geo(phone):
+    """ Упрощённая логика "гео" по номеру телефона (префиксы). """
+    phone_geo = "Не определено"
+    if phone and routing_table is not None:
+        # Страна самого точного префикса из phone_prefixes.csv и city_codes_cis.csv
+        route = routing_table.lookup(fastcore.strip_dial_prefix(phone.strip()))
+        if route is not None:
+            phone_geo = route.country
+    elif phone:
+        if phone.startswith("79") or phone.startswith("+79"):
+            phone_geo = "Россия"
+        elif phone.startswith("77") or phone.startswith("+77"):
+            phone_geo = "Казахстан"
+        elif phone.startswith("375") or phone.startswith("+375"):
+            phone_geo = "Беларусь"
+        elif phone.startswith("380") or phone.startswith("+380"):
+            phone_geo = "Украина"
+        elif phone.startswith("998") or phone.startswith("+998"):
+            phone_geo = "Узбекистан"
+        elif phone.startswith("994") or phone.startswith("+994"):
+            phone_geo = "Азербайджан"
+        elif phone.startswith("995") or phone.startswith("+995"):
+            phone_geo = "Грузия"
+        elif phone.startswith("374") or phone.startswith("+374"):
+            phone_geo = "Армения"
+        elif phone.startswith("996") or phone.startswith("+996"):
+            phone_geo = "Киргизия"
+        elif phone.startswith("992") or phone.startswith("+992"):
+            phone_geo = "Таджикистан"
+        elif phone.startswith("993") or phone.startswith("+993"):
+            phone_geo = "Туркменистан"
+        # Можно расширять при необходимости
+    return phone_geo
+
+
+def classify_citizen(phone, cdata):
+    """
+    Часть выходной строки, зависящая только от телефона: гео по префиксу и
+    данные гражданина из 1-го файла (cdata или None, если не найден).
+    Возвращает (phone_geo, address_anon, fio_nationality, fio_full).
+    """
+    phone_geo = detect_phone_geo(phone)
+
+    if cdata is None:
+        # Нет данных о гражданине в 1-м файле
+        return phone_geo, "", "", ""
+
+    fio_nationality = detect_nationality_from_fio(
+        cdata["fname"], cdata["lname"], cdata["mname"]
+    )
+    # Анонимизация адреса (до улицы)
+    region = cdata["region"]
+    city = cdata["city"]
+    street = cdata["street"]
+    address_anon = ", ".join(filter(None, [region, city, street]))
+
+    fio_full = " ".join(filter(None, [cdata["fname"], cdata["lname"], cdata["mname"]]))
+    return phone_geo, address_anon, fio_nationality.value, fio_full
+
+
+def assemble_output_row(user_id, how_recorded, nationality_2nd_doc, citizen_part):
+    phone_geo, address_anon, fio_nationality, fio_full = citizen_part
+    return [
+        user_id,
+        phone_geo,
+        nationality_2nd_doc,  # из 2-го дока
+        how_recorded,
+        address_anon,
+        fio_nationality,
+        fio_full
+    ]
+
+
+# Доля попаданий в кэш транслитерации для отчёта о ходе (см. progress.py)
+progress.register_cache("translit", lambda: transliteration.latin_to_cyrillic.cache_info()[:2])
+
+# Бюджет времени на одно «как записан» и файл отказов (см. isolation.py)
+name_guard = isolation.ContactGuard()
+
+
+def classify_name(how_recorded):
+    """ Национальность «как записан»; имя, на котором классификатор упал или завис, уходит в отказы. """
+    return name_guard.call(detect_nationality_from_name, how_recorded, Nationality.UNDETERMINED, "как записан")
+
+
+def build_output_row(phone, user_id, how_recorded, cdata):
+    """
+    Формирует выходную строку для записи alldata.
+    cdata — данные гражданина из 1-го файла (или None, если не найден).
+    """
+    # Национальность из "как записан" (2-й док)
+    nat_2nd_doc = classify_name(how_recorded)
+    return assemble_output_row(user_id, how_recorded, nat_2nd_doc.value,
+                               classify_citizen(phone, cdata))
+
+
+def build_output_rows_dedup(tasks, mapper=map):
+    """
+    Режим дедупликации: каждое уникальное «как записан» и каждый уникальный
+    телефон классифицируются один раз, затем результаты раздаются по строкам.
+    Возвращает (строки, DedupStats).
+    """
+    names = dedup.classify_unique((task[2] for task in tasks), _name_nationality_value, mapper)
+    # cdata однозначно определяется телефоном, поэтому ключ — сам телефон
+    citizens = dedup.classify_unique(((task[0], task[3]) for task in tasks),
+                                     _classify_citizen_task, mapper, key=lambda item: item[0])
+    stats = dedup.DedupStats(len(tasks))
+    stats.add("как записан", len(names))
+    stats.add("телефон", len(citizens))
+    rows = [
+        assemble_output_row(user_id, how_recorded, names[how_recorded], citizens[phone])
+        for phone, user_id, how_recorded, cdata in tasks
+    ]
+    return rows, stats
+
+
+def _name_nationality_value(name):
+    return classify_name(name).value
+
+
+def _classify_citizen_task(task):
+    return classify_citizen(*task)
+
+
+def _build_output_row_task(task):
+    return build_output_row(*task)
+
+
+def _build_rows(tasks):
+    return [build_output_row(*task) for task in tasks]
+
+
+def _build_rows_dedup(tasks):
+    return build_output_rows_dedup(tasks)[0]
+
+
+# Запасные результаты для элементов, на которых упал воркер: имя остаётся неопределённым
+def _unclassified_name_value(name):
+    return Nationality.UNDETERMINED.value
+
+
+def _unclassified_row_task(task):
+    phone, user_id, how_recorded, cdata = task
+    return assemble_output_row(user_id, how_recorded, Nationality.UNDETERMINED.value,
+                               classify_citizen(phone, cdata))
+
+
+WORKER_FALLBACKS = {
+    _name_nationality_value: _unclassified_name_value,
+    _build_output_row_task: _unclassified_row_task,
+}
+
+###############################################################################
+# Чтение входных файлов и запись результата
+###############################################################################
+def read_citizens(citizen_file):
+    """ Итератор (phone, cdata) по CSV-файлу с гражданами. """
+    with open(citizen_file, 'r', encoding='utf-8') as cf:
+        reader = csv.DictReader(cf, delimiter=',')
+        for row in reader:
+            phone = row.get("phone", "").strip()
+            if not phone or phone.lower() == "none":
+                continue
+            yield phone, {
+                "id": row.get("id", ""),
+                "fname": row.get("fname", "").strip(),
+                "lname": row.get("lname", "").strip(),
+                "mname": row.get("mname", "").strip(),
+                "region": row.get("region", "").strip(),
+                "city": row.get("city", "").strip(),
+                "street": row.get("street", "").strip(),
+                "house": row.get("house", "").strip(),
+                "apr": row.get("apr", "").strip(),
+                "country": row.get("country", "").strip()
+            }
+
+
+def read_alldata(alldata_file, tracker=None):
+    """
+    Итератор (phone, user_id, how_recorded) по alldata.txt; phone=None, если его нет.
+    tracker — учёт прочитанных байтов для отчёта о ходе (см. progress.py).
+    """
+    with open(alldata_file, 'r', encoding='utf-8') as adf, progress.reading(adf, tracker):
+        reader = csv.reader(adf, delimiter=',')
+        for row in reader:
+            if len(row) < 3:
+                continue
+
+            phone = row[0].strip()
+            user_id = row[1].strip()
+            how_recorded = row[2].strip()
+
+            if phone.lower() == "none" or not phone:
+                phone = None
+            yield phone, user_id, how_recorded
+
+
+def _alldata_phones(alldata_file):
+    """ Телефоны alldata в порядке строк результата (второй потоковый проход по файлу). """
+    return (phone for phone, _, _ in read_alldata(alldata_file))
+
+
+OUTPUT_HEADER = [
+    "ID_Telegram", "Geo_byPhone", "Nationality_2ndDoc",
+    "HowRecorded", "Address_Anonymized",
+    "Nationality_byFIO", "FIO"
+]
+
+
+def _store_records(rows, phones):
+    """ Выходные строки -> записи result_store (телефоны берутся по порядку из phones). """
+    return [
+        (row[0], result_store.phone_key(next(phones)), row[3], row[1], row[2],
+         row[4] or None, row[5] or None, row[6] or None)
+        for row in rows
+    ]
+
+
+def write_results(output_file, rows, output_format=None, background=False,
+                  store_path=None, phones=None):
+    """
+    Записывает строки результата пачками в приёмник по формату (см.
+    output_sinks.py); background — запись в отдельном потоке.
+    store_path — дополнительно сохранить строки в хранилище SQLite
+    (result_store.py); phones — телефоны строк в том же порядке.
+    Возвращает число строк.
+    """
+    sink = output_sinks.open_sink(output_file, OUTPUT_HEADER, output_format)
+    if store_path:
+        phones = iter(phones)
+        store_sink = result_store.StoreSink(result_store.ResultStore(store_path),
+                                            lambda rows: _store_records(rows, phones))
+        sink = output_sinks.TeeSink(sink, store_sink)
+    if background:
+        sink = output_sinks.BackgroundWriter(sink)
+    return output_sinks.write_rows(sink, rows)
+
+
+# Измерения профиля пользователя: (название, номер колонки выходной строки)
+PROFILE_DIMENSIONS = [("Nationality_2ndDoc", 2), ("Nationality_byFIO", 5), ("Geo_byPhone", 1)]
+
+
+def write_profiles(output_file, rows, output_format=None, max_users=profiles.DEFAULT_MAX_USERS,
+                   tmp_dir=None, log=print):
+    """
+    Режим агрегации: строки результата сворачиваются в профили по
+    ID_Telegram (см. profiles.py), в output_file пишется таблица профилей.
+    Возвращает число обработанных строк.
+    """
+    work_dir = tempfile.mkdtemp(prefix="find_nationality_profiles_", dir=tmp_dir)
+    try:
+        aggregator = profiles.ProfileAggregator([name for name, _ in PROFILE_DIMENSIONS], work_dir, max_users)
+        columns = [column for _, column in PROFILE_DIMENSIONS]
+        for row in rows:
+            aggregator.add(row[0], [row[column] for column in columns])
+        log(f"Сброшено на диск прогонов профилей: {aggregator.spilled_runs}")
+        sink = output_sinks.open_sink(output_file, profiles.PROFILE_HEADER, output_format)
+        output_sinks.write_rows(sink, aggregator.profile_rows())
+        return aggregator.rows
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Детекторы каскада и замеряемые поиски; обёртки ставятся только при включённых метриках (см. metrics.py)
+METRIC_DETECTORS = {
+    "nickname": "detect_nationality_from_affectionate_nickname",
+    "flag": "detect_nationality_from_flag",
+    "letters": "detect_nationality_from_letters",
+    "typical_names": "detect_nationality_from_typical_names",
+    "islamic_names": "detect_nationality_from_islamic_names",
+    "suffix": "detect_nationality_from_suffixes",
+    "geo": "detect_nationality_from_geo",
+    "company": "detect_nationality_from_company",
+    "profession": "detect_nationality_from_profession_or_relation",
+    "fuzzy": "detect_nationality_fuzzy",
+}
+METRIC_LOOKUPS = {"name": "classify_name", "phone": "detect_phone_geo"}
+
+
+def start_metrics(port, host=metrics.DEFAULT_HOST):
+    """ Запускает /metrics; воркеры, созданные после этого, наследуют обёртки детекторов. """
+    module = sys.modules[__name__]
+    metrics.instrument_detectors(module, "fio", METRIC_DETECTORS)
+    metrics.instrument_lookups(module, "fio", METRIC_LOOKUPS)
+    metrics.register_collector(metrics.cache_collector(progress.cache_totals))
+    return metrics.serve(port, host)
+
+
+@contextlib.contextmanager
+def _worker_mapper(workers, log):
+    """
+    map-совместимая функция: обычный map либо imap пула воркеров,
+    которым индексы публикуются через общий файл таблиц. Упавший или
+    зависший воркер перезапускается, а строка, на которой он упал,
+    уходит в файл отказов (см. isolation.py).
+    """
+    if workers <= 1:
+        yield map
+        return
+    # Индексы строятся один раз здесь; воркеры только открывают файл через mmap
+    tables_dir = tempfile.mkdtemp(prefix="find_nationality_")
+    try:
+        tables_path = build_shared_tables(os.path.join(tables_dir, "tables.bin"))
+        if fuzzy_settings["enabled"]:
+            get_fuzzy_index()  # строим до fork, чтобы воркеры его унаследовали
+        if screen_settings["enabled"]:
+            get_name_screen()
+        log(f"Общие таблицы: {tables_path}, воркеров: {workers}")
+        with isolation.IsolatedPool(workers, initializer=_init_worker, initargs=(tables_path, routing_table),
+                                    mp_context=_pool_context(), fallbacks=WORKER_FALLBACKS,
+                                    time_budget_s=name_guard.time_budget_s,
+                                    dead_letters=name_guard.dead_letters, stage="строка alldata") as pool:
+            yield lambda fn, items: pool.imap(fn, items, chunksize=256)
+        if pool.restarts:
+            log(f"Пул воркеров перезапущен {pool.restarts} раз, упавших строк: {pool.crashes}")
+    finally:
+        shutil.rmtree(tables_dir, ignore_errors=True)
+
+
+def _report_startup(profile):
+    """
+    --profile-startup: строит заранее то, что иначе строится лениво при
+    первых строках, каждое своим этапом, и печатает отчёт.
+    """
+    if not profile.enabled:
+        return
+    with profile.phase("модель spaCy"):
+        if typical_names is None and _read_typical_names():
+            get_nlp()
+    with profile.phase("словари имён"):
+        load_name_indexes()
+    if fuzzy_settings["enabled"]:
+        with profile.phase("нечёткий индекс"):
+            get_fuzzy_index()
+    if screen_settings["enabled"]:
+        with profile.phase("фильтр Блума"):
+            get_name_screen()
+    profile.report("Профиль запуска (импорт каждого модуля: python -X importtime):", "итого")
+
+###############################################################################
+# Основная логика
+###############################################################################
+def main(argv=None, prog=None):
+    """
+    Считываем два файла:
+    1) CSV с данными о гражданах (id, phone, FIO, адрес и т.д.)
+    2) alldata.txt (phone, user_id, как записан, ...)
+
+    Формируем выходной CSV с объединённой информацией.
+    """
+    global routing_table
+    profile = startup.StartupProfile()
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Скрипт для определения национальностей по данным из двух файлов."
+    )
+    # Взаимоисключающие флаги -v/--verbose и -s/--silent
+    group = parser.add_mutually_exclusive_group(required=False)
+    group.add_argument("-v", "--verbose", action="store_true",
+                       help="Вывести подробную информацию во время работы.")
+    group.add_argument("-s", "--silent", action="store_true",
+                       help="Не выводить никакой дополнительной информации (тихий режим).")
+
+    parser.add_argument("-c", "--citizen-file", default="citizen_sample.csv",
+                        help="Путь к CSV-файлу с данными о гражданах (по умолчанию: citizen_sample.csv).")
+    parser.add_argument("-a", "--alldata-file", default="alldata.txt",
+                        help="Путь к файлу alldata.txt (по умолчанию: alldata.txt).")
+    parser.add_argument("-o", "--output-file", default="output_result.csv",
+                        help="Путь к выходному CSV-файлу (по умолчанию: output_result.csv).")
+    parser.add_argument("--output-format", choices=output_sinks.FORMATS, default=None,
+                        help="Формат результата: csv, csv.gz, csv.zst, jsonl, sqlite "
+                             "(по умолчанию: по расширению выходного файла).")
+    parser.add_argument("--background-writer", action="store_true",
+                        help="Писать результат в отдельном потоке через ограниченную очередь.")
+    parser.add_argument("--store", default=None,
+                        help="Дополнительно сохранить результат в базу SQLite с upsert "
+                             "по (user_id, phone); запросы: python -m find_nationality.result_store <база>.")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="Вместо построчного результата записать профили пользователей: "
+                             "число контактов по национальностям и Geo_byPhone для каждого ID_Telegram.")
+    parser.add_argument("--max-users", type=int, default=profiles.DEFAULT_MAX_USERS,
+                        help="Сколько пользователей держать в памяти в режиме агрегации, "
+                             f"остальное сбрасывается на диск (по умолчанию: {profiles.DEFAULT_MAX_USERS}).")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Число процессов-воркеров (по умолчанию: 1, без пула).")
+    parser.add_argument("--join-mode", choices=["memory", "hash"], default="memory",
+                        help="memory — словарь всех граждан в памяти (по умолчанию); "
+                             "hash — grace hash join через партиции на диске.")
+    parser.add_argument("--memory-budget-mb", type=int, default=hash_join.DEFAULT_MEMORY_BUDGET_MB,
+                        help="Бюджет памяти на одну партицию в режиме hash, МБ "
+                             f"(по умолчанию: {hash_join.DEFAULT_MEMORY_BUDGET_MB}).")
+    parser.add_argument("--partitions", type=int, default=0,
+                        help="Число партиций в режиме hash (по умолчанию: по бюджету памяти).")
+    parser.add_argument("--order", choices=[hash_join.ORDER_BY_POSITION, hash_join.ORDER_BY_USER_ID],
+                        default=hash_join.ORDER_BY_POSITION,
+                        help="Порядок строк результата в режиме hash: как во входе или по user_id.")
+    parser.add_argument("--tmp-dir", default=None,
+                        help="Каталог для временных партиций (по умолчанию: системный).")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Классифицировать каждое уникальное «как записан» и каждый "
+                             "телефон один раз (предварительный проход по файлу).")
+    parser.add_argument("--routing", choices=["legacy", "prefix"], default="legacy",
+                        help="Гео по телефону: legacy — фиксированный список префиксов стран (по умолчанию); "
+                             "prefix — наибольший совпадающий префикс по phone_prefixes.csv и city_codes_cis.csv.")
+    parser.add_argument("--prefix-source", action="append", default=None,
+                        help="CSV префиксов (Префикс,Длина,Страна,Регион,Оператор) для --routing prefix; "
+                             "можно повторять (по умолчанию: phone_prefixes.csv).")
+    parser.add_argument("--city-codes", default=os.path.join(DATA_DIR, "city_codes_cis.csv"),
+                        help="Коды стран и городов для --routing prefix (по умолчанию: city_codes_cis.csv).")
+    parser.add_argument("--no-fuzzy", action="store_true",
+                        help="Отключить нечёткий поиск имён.")
+    parser.add_argument("--fuzzy-threshold", type=int, default=fuzzy_names.DEFAULT_THRESHOLD,
+                        help="Порог сходства 0-100 для нечёткого поиска "
+                             f"(по умолчанию: {fuzzy_names.DEFAULT_THRESHOLD}).")
+    parser.add_argument("--fuzzy-max-candidates", type=int, default=fuzzy_names.DEFAULT_MAX_CANDIDATES,
+                        help="Сколько кандидатов сравнивать на одно слово при нечётком поиске, 0 — всех "
+                             f"(по умолчанию: {fuzzy_names.DEFAULT_MAX_CANDIDATES}).")
+    parser.add_argument("--fuzzy-budget-ms", type=float, default=fuzzy_names.DEFAULT_TIME_BUDGET_MS,
+                        help="Бюджет времени на один нечёткий поиск, мс; 0 — без ограничения "
+                             f"(по умолчанию: {fuzzy_names.DEFAULT_TIME_BUDGET_MS:g}). "
+                             "С бюджетом результат зависит от скорости машины.")
+    parser.add_argument("--contact-timeout", type=float, default=isolation.DEFAULT_TIME_BUDGET_S,
+                        help="Бюджет времени на одно «как записан», секунд; 0 — без ограничения "
+                             f"(по умолчанию: {isolation.DEFAULT_TIME_BUDGET_S}).")
+    parser.add_argument("--dead-letters", default=isolation.DEFAULT_DEAD_LETTERS,
+                        help="Файл для строк, на которых классификация упала или превысила бюджет "
+                             f"(по умолчанию: {isolation.DEFAULT_DEAD_LETTERS}).")
+    parser.add_argument("--progress", action="store_true",
+                        help="Печатать в stderr строки/с, прочитанные байты, оставшееся время, "
+                             "попадания в кэши и загрузку воркеров.")
+    parser.add_argument("--progress-file", default=None,
+                        help="Дописывать те же снимки хода в файл в формате JSON Lines.")
+    parser.add_argument("--progress-interval", type=float, default=progress.DEFAULT_INTERVAL,
+                        help=f"Интервал между снимками хода, секунд (по умолчанию: {progress.DEFAULT_INTERVAL}).")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Отдавать метрики Prometheus на этом порту (/metrics), пока идёт прогон.")
+    parser.add_argument("--metrics-host", default=metrics.DEFAULT_HOST,
+                        help=f"Адрес для метрик (по умолчанию: {metrics.DEFAULT_HOST}).")
+    bloom_group = parser.add_mutually_exclusive_group()
+    bloom_group.add_argument("--bloom", action="store_true",
+                             help="Включить предварительный отсев имён фильтром Блума перед шагами 5-7.")
+    bloom_group.add_argument("--no-bloom", action="store_true",
+                             help="Не отсеивать имена фильтром Блума (по умолчанию).")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Напечатать в stderr время импорта и каждого этапа инициализации.")
+
+    args = parser.parse_args(argv)
+    profile.enabled = args.profile_startup
+    profile.add(f"импорт {__name__}", startup.import_seconds(__name__))
+    profile.mark("разбор аргументов")
+    if args.store and args.aggregate:
+        parser.error("--store и --aggregate несовместимы")
+    if args.store and args.join_mode == "hash" and args.order != hash_join.ORDER_BY_POSITION:
+        parser.error("--store требует порядка строк как во входе (--order position)")
+
+    citizen_file = args.citizen_file
+    alldata_file = args.alldata_file
+    output_file = args.output_file
+    is_verbose = args.verbose
+    is_silent = args.silent
+    fuzzy_settings.update(
+        enabled=not args.no_fuzzy,
+        threshold=args.fuzzy_threshold,
+        time_budget_ms=args.fuzzy_budget_ms,
+        max_candidates=args.fuzzy_max_candidates,
+    )
+    screen_settings["enabled"] = args.bloom
+    name_guard.time_budget_s = args.contact_timeout
+    name_guard.dead_letters = isolation.DeadLetters(args.dead_letters)
+    name_guard.dead_letters.reset()
+    if args.routing == "prefix":
+        with profile.phase("таблица префиксов"):
+            routing_table = prefix_table.compile_table(args.prefix_source or DEFAULT_PREFIX_SOURCES,
+                                                       city_codes=args.city_codes)
+
+    # Если включён verbose-режим, будем печатать сообщения
+    def log(message):
+        if is_verbose and not is_silent:
+            print(message)
+
+    log(f"Файл граждан: {citizen_file}")
+    log(f"Файл alldata: {alldata_file}")
+    log(f"Выходной файл: {output_file}")
+
+    # --- 1) Считываем файл с гражданами
+    if not os.path.exists(citizen_file):
+        print(f"Файл {citizen_file} не найден!")
+        sys.exit(1)
+
+    # --- 2) Считываем alldata.txt
+    if not os.path.exists(alldata_file):
+        print(f"Файл {alldata_file} не найден!")
+        sys.exit(1)
+
+    if args.metrics_port:
+        start_metrics(args.metrics_port, args.metrics_host)
+        log(f"Метрики: http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+    tracker = progress.from_args(args, alldata_file)
+    if tracker is not None:
+        tracker.start()
+
+    def emit(rows):
+        """ Строки результата -> выходной файл (или профили пользователей в режиме агрегации). """
+        rows = progress.counted(rows, tracker)
+        if args.aggregate:
+            return write_profiles(output_file, rows, args.output_format, args.max_users, args.tmp_dir, log)
+        return write_results(output_file, rows, args.output_format, args.background_writer,
+                             args.store, _alldata_phones(alldata_file))
+
+    _report_startup(profile)
+    # Словари имён и spaCy — до первой строки, а не внутри её бюджета времени (воркеры наследуют их)
+    load_name_indexes()
+    with _worker_mapper(args.workers, log) as mapper:
+        if args.join_mode == "hash":
+            # Grace hash join: граждане и alldata разбиваются на партиции по телефону
+            partitions = args.partitions or hash_join.choose_partitions(citizen_file, args.memory_budget_mb)
+            log(f"Партиций hash join: {partitions}")
+            work_dir = tempfile.mkdtemp(prefix="find_nationality_join_", dir=args.tmp_dir)
+            try:
+                rows, count = hash_join.run_hash_join(
+                    read_citizens(citizen_file), read_alldata(alldata_file, tracker), work_dir, partitions,
+                    _build_rows_dedup if args.dedup else _build_rows, args.order, mapper
+                )
+                log(f"Обработано строк alldata: {count}")
+                # --- 3) Записываем результат
+                written = emit(rows)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            # --- 1) Считываем файл с гражданами
+            citizen_dict = dict(read_citizens(citizen_file))
+            log(f"Считано граждан: {len(citizen_dict)}")
+
+            tasks = (
+                (phone, user_id, how_recorded, citizen_dict.get(phone) if phone else None)
+                for phone, user_id, how_recorded in read_alldata(alldata_file, tracker)
+            )
+            if args.dedup:
+                tasks = list(tasks)
+                if tracker is not None:
+                    tracker.total_rows = len(tasks)
+                results, stats = build_output_rows_dedup(tasks, mapper)
+                if not is_silent:
+                    print(stats.summary())
+            else:
+                # Строки пишутся по мере классификации, без списка всех результатов
+                results = mapper(_build_output_row_task, tasks)
+
+            # --- 3) Записываем результат
+            written = emit(results)
+            log(f"Обработано строк alldata: {written}")
+
+    if tracker is not None:
+        tracker.stop()
+    if not is_silent:
+        print(f"Готово! Результат сохранён в {output_file}. Всего строк: {written}.")
+        dead_letters = name_guard.dead_letters.count()
+        if dead_letters:
+            print(f"Отказов: {dead_letters}, см. {name_guard.dead_letters.path}.")
+
+
+# Конец импорта модуля — первая строка отчёта --profile-startup
+startup.module_imported(__name__)
+
+###############################################################################
+# Точка входа
+###############################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Нечёткий поиск имён (опечатки, альтернативные написания: Мухаммад/Мухаммед).
+
+Вместо попарного fuzz.ratio по тысячам имён используется индекс удалений в
+стиле SymSpell: для каждого словарного имени заранее строятся все варианты с
+удалением до max_distance символов. Для запроса строятся такие же варианты, и
+кандидатами становятся только имена с общим вариантом; fuzz.ratio считается
+лишь для них.
+
+Работа на одно слово ограничена детерминированно: слово длиннее самого
+длинного словарного имени плюс допустимое число правок не может иметь
+общего варианта ни с одним именем и сразу отбрасывается, а fuzz.ratio
+считается не более чем для max_candidates кандидатов (в порядке индекса).
+Бюджет по времени (time_budget_ms) по умолчанию выключен: с ним результат
+зависел бы от скорости и загрузки машины.
+"""
+
+import time
+from itertools import combinations
+
+from fuzzywuzzy import fuzz
+
+DEFAULT_THRESHOLD = 85
+DEFAULT_TIME_BUDGET_MS = 0.0
+DEFAULT_MAX_CANDIDATES = 64
+MIN_WORD_LENGTH = 4
+
+
+def _max_distance(word):
+    """ Допустимое число правок зависит от длины слова. """
+    return 1 if len(word) <= 5 else 2
+
+
+def _iter_deletes(word, distance):
+    """ Варианты слова с удалением от 0 до distance символов (возможны повторы). """
+    yield word
+    for d in range(1, min(distance, len(word) - 1) + 1):
+        for positions in combinations(range(len(word)), d):
+            yield "".join(ch for i, ch in enumerate(word) if i not in positions)
+
+
+def _deletes(word, distance):
+    """ Все варианты слова с удалением от 0 до distance символов. """
+    return set(_iter_deletes(word, distance))
+
+
+class FuzzyNameIndex:
+    """
+    Индекс кандидатов для нечёткого поиска.
+
+    groups — упорядоченный словарь {метка: список имён}. Порядок меток задаёт
+    приоритет при равном сходстве (как в каскаде: первая национальность).
+    """
+
+    def __init__(self, groups):
+        self._names = []    # нормализованные словарные имена
+        self._ranks = []    # приоритет метки для каждого имени
+        self._labels = list(groups)
+        self._name_ids = {}
+        self._deletes = {}
+        self._max_length = 0
+        for rank, label in enumerate(self._labels):
+            for name in groups[label]:
+                word = name.strip().lower()
+                if len(word) < MIN_WORD_LENGTH:
+                    continue
+                if word in self._name_ids:
+                    continue  # приоритет у первой метки
+                name_id = len(self._names)
+                self._name_ids[word] = name_id
+                self._names.append(word)
+                self._ranks.append(rank)
+                self._max_length = max(self._max_length, len(word))
+                for variant in _deletes(word, _max_distance(word)):
+                    self._deletes.setdefault(variant, []).append(name_id)
+
+    def __len__(self):
+        return len(self._names)
+
+    def lookup(self, word, threshold=DEFAULT_THRESHOLD, time_budget_ms=DEFAULT_TIME_BUDGET_MS,
+               max_candidates=DEFAULT_MAX_CANDIDATES):
+        """
+        Лучшее словарное имя для слова: (метка, имя, сходство) или None.
+
+        Сравниваются не более max_candidates кандидатов (0 — все). Если
+        задан time_budget_ms, поиск прекращается по его истечении (проверка
+        идёт и при построении вариантов); тогда возвращается лучший из уже
+        проверенных кандидатов.
+        """
+        word = word.strip().lower()
+        distance = _max_distance(word)
+        if len(word) < MIN_WORD_LENGTH or len(word) > self._max_length + distance:
+            return None
+        deadline = time.perf_counter() + time_budget_ms / 1000.0 if time_budget_ms else None
+
+        candidates = set()
+        for variant in _iter_deletes(word, distance):
+            ids = self._deletes.get(variant)
+            if ids:
+                candidates.update(ids)
+            if deadline and time.perf_counter() > deadline:
+                break
+
+        best = None
+        candidates = sorted(candidates)
+        if max_candidates:
+            candidates = candidates[:max_candidates]
+        for name_id in candidates:
+            score = fuzz.ratio(word, self._names[name_id])
+            if score >= threshold:
+                key = (-score, self._ranks[name_id])
+                if best is None or key < best[0]:
+                    best = (key, name_id)
+            if deadline and time.perf_counter() > deadline:
+                break
+        if best is None:
+            return None
+        (neg_score, rank), name_id = best
+        return self._labels[rank], self._names[name_id], -neg_score
+
+    def match_parts(self, name_parts, threshold=DEFAULT_THRESHOLD, time_budget_ms=DEFAULT_TIME_BUDGET_MS,
+                    max_candidates=DEFAULT_MAX_CANDIDATES):
+        """
+        Лучшее совпадение среди частей имени (общий бюджет времени на запрос,
+        предел кандидатов — на каждую часть). Возвращает (метка, имя, сходство) или None.
+        """
+        deadline = time.perf_counter() + time_budget_ms / 1000.0 if time_budget_ms else None
+        best = None
+        for part in name_parts:
+            remaining = None
+            if deadline:
+                remaining = (deadline - time.perf_counter()) * 1000.0
+                if remaining <= 0:
+                    break
+            hit = self.lookup(part, threshold, remaining, max_candidates)
+            if hit and (best is None or (-hit[2], self._labels.index(hit[0])) <
+                        (-best[2], self._labels.index(best[0]))):
+                best = hit
+        return best
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Grace hash join для alldata.txt и CSV граждан, не помещающихся в память.
+
+1. Оба входа разбиваются на партиции по хэшу телефона (crc32, одинаковый во
+   всех процессах) и записываются во временные файлы-бакеты.
+2. Каждая партиция соединяется отдельно: словарь граждан строится только по
+   своему бакету, поэтому в памяти одновременно лежит ~1/N файла граждан.
+   Партиции независимы и могут обрабатываться параллельно.
+3. Результат каждой партиции сортируется по ключу порядка (позиция строки во
+   входе или user_id) и пишется в отсортированный прогон; прогоны сливаются
+   через heapq.merge — исходный порядок восстанавливается потоково.
+"""
+
+import csv
+import heapq
+import math
+import os
+import zlib
+
+# Во сколько раз словарь Python больше исходного CSV (оценка сверху)
+DICT_OVERHEAD = 4
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+CITIZEN_FIELDS = ["id", "fname", "lname", "mname", "region", "city",
+                  "street", "house", "apr", "country"]
+
+ORDER_BY_POSITION = "position"
+ORDER_BY_USER_ID = "user_id"
+
+
+def partition_of(phone, partitions):
+    """ Номер партиции для телефона (None — строки без телефона). """
+    return zlib.crc32((phone or "").encode("utf-8")) % partitions
+
+
+def choose_partitions(citizen_file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """ Число партиций, при котором словарь граждан одной партиции влезает в бюджет. """
+    size = os.path.getsize(citizen_file)
+    budget = max(1, memory_budget_mb) * 1024 * 1024
+    return max(1, math.ceil(size * DICT_OVERHEAD / budget))
+
+
+class _BucketWriters:
+    """ Набор открытых файлов-бакетов с csv.writer на каждый. """
+
+    def __init__(self, directory, prefix, partitions):
+        self.paths = [os.path.join(directory, f"{prefix}_{i:04d}.csv") for i in range(partitions)]
+        self._files = [open(path, "w", encoding="utf-8", newline="") for path in self.paths]
+        self._writers = [csv.writer(f) for f in self._files]
+
+    def write(self, partition, row):
+        self._writers[partition].writerow(row)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+def partition_citizens(citizen_rows, directory, partitions):
+    """
+    citizen_rows — итератор (phone, cdata). Возвращает пути бакетов граждан.
+    Порядок строк внутри бакета сохраняется, поэтому при дублях телефона,
+    как и в обычном режиме, побеждает последняя запись.
+    """
+    buckets = _BucketWriters(directory, "citizen", partitions)
+    try:
+        for phone, cdata in citizen_rows:
+            buckets.write(partition_of(phone, partitions),
+                          [phone] + [cdata[field] for field in CITIZEN_FIELDS])
+    finally:
+        buckets.close()
+    return buckets.paths
+
+
+def partition_alldata(alldata_rows, directory, partitions):
+    """
+    alldata_rows — итератор (phone, user_id, how_recorded). К каждой строке
+    добавляется её позиция во входе. Возвращает (пути бакетов, число строк).
+    """
+    buckets = _BucketWriters(directory, "alldata", partitions)
+    count = 0
+    try:
+        for position, (phone, user_id, how_recorded) in enumerate(alldata_rows):
+            buckets.write(partition_of(phone, partitions),
+                          [position, phone or "", user_id, how_recorded])
+            count += 1
+    finally:
+        buckets.close()
+    return buckets.paths, count
+
+
+def _order_key(order, position, row):
+    if order == ORDER_BY_USER_ID:
+        user_id = row[0]
+        return ((0, int(user_id), "") if user_id.isascii() and user_id.isdigit() else (1, 0, user_id)), position
+    return position
+
+
+def join_partition(citizen_path, alldata_path, run_path, build_rows, order=ORDER_BY_POSITION):
+    """
+    Соединяет одну партицию и пишет отсортированный прогон в run_path.
+
+    build_rows — функция (список задач (phone, user_id, how_recorded, cdata))
+    -> список выходных строк той же длины.
+    Возвращает run_path.
+    """
+    citizen_dict = {}
+    with open(citizen_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            citizen_dict[row[0]] = dict(zip(CITIZEN_FIELDS, row[1:]))
+
+    positions = []
+    tasks = []
+    with open(alldata_path, "r", encoding="utf-8", newline="") as f:
+        for position, phone, user_id, how_recorded in csv.reader(f):
+            phone = phone or None
+            positions.append(int(position))
+            tasks.append((phone, user_id, how_recorded,
+                          citizen_dict.get(phone) if phone else None))
+    del citizen_dict
+
+    rows = build_rows(tasks)
+    keyed = sorted(zip(positions, rows), key=lambda item: _order_key(order, *item))
+    with open(run_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for position, row in keyed:
+            writer.writerow([position] + row)
+    return run_path
+
+
+def _read_run(path, order):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for record in csv.reader(f):
+            position, row = int(record[0]), record[1:]
+            yield _order_key(order, position, row), row
+
+
+def merge_runs(run_paths, order=ORDER_BY_POSITION):
+    """ Потоковое слияние отсортированных прогонов в итоговый порядок. """
+    streams = [_read_run(path, order) for path in run_paths]
+    for _, row in heapq.merge(*streams, key=lambda item: item[0]):
+        yield row
+
+
+def run_hash_join(citizen_rows, alldata_rows, directory, partitions, build_rows,
+                  order=ORDER_BY_POSITION, mapper=map):
+    """
+    Полный grace hash join. mapper — map или pool.imap-совместимая функция
+    для параллельной обработки партиций (задачи — кортежи аргументов
+    join_partition). Возвращает (итератор выходных строк, число строк).
+    """
+    citizen_paths = partition_citizens(citizen_rows, directory, partitions)
+    alldata_paths, count = partition_alldata(alldata_rows, directory, partitions)
+    tasks = [
+        (citizen_paths[i], alldata_paths[i], os.path.join(directory, f"run_{i:04d}.csv"), build_rows, order)
+        for i in range(partitions)
+    ]
+    run_paths = list(mapper(_join_partition_task, tasks))
+    return merge_runs(run_paths, order), count
+
+
+def _join_partition_task(task):
+    return join_partition(*task)
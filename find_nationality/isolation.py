@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Изоляция сбоев при пакетной обработке контактов.
+
+Одно странное имя контакта (огромная строка эмодзи, имя, на котором
+падает NamesParser) не должно останавливать многочасовой прогон. Защита
+в два уровня:
+
+* ContactGuard — в процессе, где идёт классификация: время на контакт
+  ограничено (SIGALRM), исключение или превышение времени записываются в
+  файл отказов (dead letters), а контакт получает запасной результат
+  («не определено»). Работает и без пула, если процесс однопоточный
+  по отношению к классификации (основной поток).
+* IsolatedPool — пул процессов для режима -w N. Если воркер зависает
+  в коде, который не прерывается сигналом, его завершает faulthandler
+  (жёсткий лимит), а падение воркера пул переживает: пул перезапускается,
+  партия с упавшим элементом прогоняется по одному элементу, виновник
+  уходит в файл отказов, а вместо его результата считается запасная
+  функция. Порядок результатов сохраняется.
+
+Файл отказов — CSV без заголовка; строки дописываются одним вызовом
+write в файл, открытый с O_APPEND, поэтому воркеры пишут в него
+одновременно без блокировок. Партии, потерянные при падении пула,
+выполняются заново, поэтому их отказы могут записаться повторно.
+"""
+
+import collections
+import contextlib
+import csv
+import faulthandler
+import io
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import metrics
+from . import progress
+
+DEFAULT_TIME_BUDGET_S = 2.0
+DEFAULT_DEAD_LETTERS = "dead_letters.csv"
+
+# Жёсткий лимит воркера — во столько раз больше мягкого (плюс секунда на запуск)
+HARD_LIMIT_FACTOR = 3
+
+
+class ContactTimeout(BaseException):
+    """
+    Классификация контакта не уложилась в бюджет времени. Наследуется от
+    BaseException, чтобы его не проглотил «except Exception» внутри
+    детекторов (detect_ethnicity_using_parser скрывает все исключения).
+    """
+
+
+class Alarm:
+    """
+    Сработал ли SIGALRM внутри time_limit. Нужен, потому что сторонний код
+    может перехватить и ContactTimeout: DuckDB внутри NamesParser
+    превращает прерывание запроса в RuntimeError("Query interrupted"),
+    а его скрывает «except Exception» детектора — контакт тогда молча
+    классифицировался бы дальше по каскаду.
+    """
+
+    def __init__(self):
+        self.fired = False
+
+
+def _can_use_alarm():
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextlib.contextmanager
+def time_limit(seconds, alarm=None):
+    """
+    Прерывает блок исключением ContactTimeout через seconds секунд и
+    отмечает alarm.fired. Без лимита, если seconds <= 0, нет SIGALRM или
+    это не основной поток.
+    """
+    if not seconds or seconds <= 0 or not _can_use_alarm():
+        yield
+        return
+
+    def _raise_timeout(signum, frame):
+        if alarm is not None:
+            alarm.fired = True
+        raise ContactTimeout()
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class DeadLetters:
+    """ Файл отказов: вид отказа, подробности, этап, поля элемента. """
+
+    def __init__(self, path=DEFAULT_DEAD_LETTERS):
+        self.path = path
+
+    def write(self, kind, detail, stage, fields):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow([time.strftime("%Y-%m-%dT%H:%M:%S"), os.getpid(), kind, detail, stage]
+                                    + [str(field) for field in fields])
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, buffer.getvalue().encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def reset(self):
+        """ Новый прогон начинается с пустого файла; файл появляется при первом отказе. """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def count(self):
+        """ Число записей в файле (0, если отказов не было). """
+        try:
+            with open(self.path, "r", encoding="utf-8", newline="") as f:
+                return sum(1 for _ in csv.reader(f))
+        except OSError:
+            return 0
+
+
+def _fields(item):
+    return list(item) if isinstance(item, (tuple, list)) else [item]
+
+
+class ContactGuard:
+    """ Вызов классификатора с бюджетом времени и записью отказов. """
+
+    def __init__(self, time_budget_s=DEFAULT_TIME_BUDGET_S, dead_letters=None):
+        self.time_budget_s = time_budget_s
+        self.dead_letters = dead_letters
+        self.timeouts = 0
+        self.errors = 0
+
+    def call(self, fn, item, fallback, stage):
+        """
+        fn(item) либо fallback, если fn упала или не уложилась в бюджет.
+        Сработавший таймер — отказ, даже если fn перехватила прерывание и
+        вернула результат или подняла другое исключение.
+        """
+        alarm = Alarm()
+        try:
+            with time_limit(self.time_budget_s, alarm):
+                result = fn(item)
+        except ContactTimeout:
+            alarm.fired = True
+        except Exception as e:
+            if not alarm.fired:
+                self.errors += 1
+                self._record("error", f"{type(e).__name__}: {e}", stage, item)
+                return fallback
+        else:
+            if not alarm.fired:
+                return result
+        self.timeouts += 1
+        self._record("timeout", f"> {self.time_budget_s:g} s", stage, item)
+        return fallback
+
+    def _record(self, kind, detail, stage, item):
+        metrics.dead_letters_total.inc(kind)
+        if self.dead_letters is not None:
+            self.dead_letters.write(kind, detail, stage, _fields(item))
+
+
+###############################################################################
+# Пул процессов, переживающий падение воркера
+###############################################################################
+def _run_chunk(fn, items, hard_limit_s):
+    """
+    Выполняется в воркере; при hard_limit_s зависший элемент завершает процесс.
+    Возвращает (pid, время работы, счётчики кэшей воркера, приращения метрик, результаты).
+    """
+    started = time.perf_counter()
+    if not hard_limit_s:
+        results = [fn(item) for item in items]
+    else:
+        results = []
+        for item in items:
+            faulthandler.dump_traceback_later(hard_limit_s, exit=True)
+            try:
+                results.append(fn(item))
+            finally:
+                faulthandler.cancel_dump_traceback_later()
+    return os.getpid(), time.perf_counter() - started, progress.cache_counts(), metrics.drain(), results
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class WorkerCrash(RuntimeError):
+    """ Воркер упал на элементе, для функции которого нет запасного результата. """
+
+
+class IsolatedPool:
+    """
+    Пул процессов с map-совместимым imap(fn, items).
+
+    fallbacks — {fn: запасная функция элемента}; запасная функция тоже
+    выполняется в воркере. Для функций из fallbacks действует жёсткий
+    лимит на элемент; для остальных (например, целых партиций hash join)
+    лимита нет, а падение воркера поднимает WorkerCrash после перезапуска.
+    """
+
+    def __init__(self, processes, initializer=None, initargs=(), mp_context=None, fallbacks=None,
+                 time_budget_s=DEFAULT_TIME_BUDGET_S, dead_letters=None, stage=""):
+        self.processes = processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self.mp_context = mp_context
+        self.fallbacks = dict(fallbacks or {})
+        self.hard_limit_s = time_budget_s * HARD_LIMIT_FACTOR + 1 if time_budget_s and time_budget_s > 0 else 0
+        self.dead_letters = dead_letters
+        self.stage = stage
+        self.restarts = 0
+        self.crashes = 0
+        # Статистика по pid воркера: время работы, число элементов, последние счётчики кэшей
+        self.worker_busy = {}
+        self.worker_items = {}
+        self.worker_caches = {}
+        self._started = time.monotonic()
+        self._executor = None
+        self._start()
+        progress.watch_pool(self)
+
+    def _start(self):
+        self._executor = ProcessPoolExecutor(self.processes, mp_context=self.mp_context,
+                                             initializer=self.initializer, initargs=self.initargs)
+
+    def _restart(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.restarts += 1
+        self._start()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def utilisation(self):
+        """ Доля времени с запуска пула, которую каждый воркер был занят. """
+        elapsed = time.monotonic() - self._started
+        return {pid: min(1.0, busy / elapsed) if elapsed > 0 else 0.0 for pid, busy in self.worker_busy.items()}
+
+    def _collect(self, future):
+        pid, busy, caches, worker_metrics, results = future.result()
+        metrics.merge(worker_metrics)
+        self.worker_busy[pid] = self.worker_busy.get(pid, 0.0) + busy
+        self.worker_items[pid] = self.worker_items.get(pid, 0) + len(results)
+        self.worker_caches[pid] = caches
+        return results
+
+    def _submit(self, fn, chunk):
+        hard_limit_s = self.hard_limit_s if fn in self.fallbacks else 0
+        return self._executor.submit(_run_chunk, fn, chunk, hard_limit_s)
+
+    def _isolate(self, fn, chunk):
+        """ Партия, на которой упал пул: по одному элементу, виновник — в отказы. """
+        results = []
+        for item in chunk:
+            try:
+                results += self._collect(self._submit(fn, [item]))
+                continue
+            except BrokenProcessPool:
+                self.crashes += 1
+                self._restart()
+            fallback = self.fallbacks.get(fn)
+            if fallback is None:
+                raise WorkerCrash(f"воркер упал на элементе {item!r} ({getattr(fn, '__name__', fn)})")
+            metrics.dead_letters_total.inc("crash")
+            if self.dead_letters is not None:
+                self.dead_letters.write("crash", f"worker exited (limit {self.hard_limit_s:g} s)", self.stage,
+                                        _fields(item))
+            results += self._collect(self._submit(fallback, [item]))
+        return results
+
+    def imap(self, fn, items, chunksize=256):
+        """ Результаты fn по элементам в исходном порядке. """
+        chunks = _chunks(items, chunksize)
+        window = collections.deque()
+
+        def fill():
+            while len(window) < self.processes * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                window.append((chunk, self._submit(fn, chunk)))
+
+        fill()
+        while window:
+            chunk, future = window.popleft()
+            try:
+                results = self._collect(future)
+            except BrokenProcessPool:
+                # Все партии в работе потеряны вместе с пулом; первая проверяется поштучно
+                self._restart()
+                in_flight = [pending for pending, _ in window]
+                window.clear()
+                results = self._isolate(fn, chunk)
+                window.extend((pending, self._submit(fn, pending)) for pending in in_flight)
+            yield from results
+            fill()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Метрики в текстовом формате Prometheus без внешних зависимостей.
+
+Счётчики и гистограммы — словари «метки -> значение» в памяти процесса;
+serve() отдаёт их по HTTP (GET /metrics) из фонового потока.
+
+Детекторы каскада считаются обёртками, которые instrument_detectors() ставит
+поверх функций модуля только при включённых метриках (--metrics-port),
+поэтому без метрик каскад работает без накладных расходов. Обёртка
+считает вызовы и срабатывания (результат не пустой и не «не
+определено»); доля срабатываний детектора — hits / calls.
+
+Воркеры пула копят свои значения и отдают приращения (drain) вместе с
+результатами каждой партии (см. isolation.py); родительский процесс
+добавляет их к своим (merge), так что /metrics видит весь прогон.
+"""
+
+import bisect
+import contextlib
+import functools
+import threading
+import time
+
+from .nationality import Nationality
+
+DEFAULT_HOST = "127.0.0.1"
+
+# Границы гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_registry = {}
+# Функции, которые при каждом запросе /metrics добавляют вычисляемые метрики
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        _registry[name] = self
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def drain(self):
+        values, self.values = self.values, {}
+        return values
+
+    def merge(self, values):
+        for key, value in values.items():
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        for key, value in list(self.values.items()):
+            yield self.name, _label_text(self.labels, key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+    def drain(self):
+        return {}
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self.values = {}
+        _registry[name] = self
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def drain(self):
+        values, self.values = self.values, {}
+        return values
+
+    def merge(self, values):
+        for key, (counts, total) in values.items():
+            entry = self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+
+    def samples(self):
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _label_text(self.labels + ("le",), key + (bound,)), cumulative
+            yield f"{self.name}_sum", _label_text(self.labels, key), total
+            yield f"{self.name}_count", _label_text(self.labels, key), cumulative
+
+
+contacts_total = Counter("find_nationality_contacts_total", "Classified contact names.", ["mode"])
+detector_calls = Counter("find_nationality_detector_calls_total", "Detector invocations.", ["mode", "detector"])
+detector_hits = Counter("find_nationality_detector_hits_total",
+                        "Detector invocations that returned a nationality.", ["mode", "detector"])
+lookup_seconds = Histogram("find_nationality_lookup_seconds", "Lookup latency.", ["mode", "lookup"])
+dead_letters_total = Counter("find_nationality_dead_letters_total", "Contacts sent to the dead-letter file.",
+                             ["kind"])
+model_load_seconds = Gauge("find_nationality_model_load_seconds", "Time to load a model.", ["model"])
+
+
+def drain():
+    """ Приращения счётчиков и гистограмм процесса с прошлого вызова (для воркеров). """
+    values = {name: metric.drain() for name, metric in _registry.items()}
+    return {name: metric_values for name, metric_values in values.items() if metric_values}
+
+
+def merge(values):
+    for name, metric_values in values.items():
+        _registry[name].merge(metric_values)
+
+
+def register_collector(collect):
+    """ collect() -> [(имя, тип, описание, [({метка: значение}, значение)])] на момент запроса. """
+    _collectors.append(collect)
+
+
+def cache_collector(totals):
+    """ Сборщик попаданий и промахов кэшей; totals() -> {кэш: (попадания, промахи)}. """
+    def collect():
+        counts = totals()
+        return [
+            ("find_nationality_cache_hits_total", "counter", "Cache hits.",
+             [({"cache": name}, hits) for name, (hits, _) in counts.items()]),
+            ("find_nationality_cache_misses_total", "counter", "Cache misses.",
+             [({"cache": name}, misses) for name, (_, misses) in counts.items()]),
+        ]
+    return collect
+
+
+def render():
+    """ Все метрики в текстовом формате Prometheus. """
+    lines = []
+    for metric in list(_registry.values()):
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+        lines += [f"{name}{labels} {value}" for name, labels, value in metric.samples()]
+    for collect in _collectors:
+        for name, kind, help_text, samples in collect():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_label_text(tuple(labels), tuple(labels.values()))} {value}"
+                      for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+@contextlib.contextmanager
+def load_timer(model):
+    """ Время загрузки модели -> find_nationality_model_load_seconds{model=...}. """
+    started = time.perf_counter()
+    yield
+    model_load_seconds.set(model, value=round(time.perf_counter() - started, 6))
+
+
+###############################################################################
+# Обёртки детекторов и поиска
+###############################################################################
+def _is_hit(result):
+    return bool(result) and result != Nationality.UNDETERMINED
+
+
+def instrument_detectors(module, mode, detectors):
+    """ detectors — {имя детектора: имя функции модуля}; функции заменяются считающими обёртками. """
+    for detector, attribute in detectors.items():
+        fn = getattr(module, attribute)
+        if getattr(fn, "__wrapped__", None) is not None:
+            continue
+        key = (mode, detector)
+
+        @functools.wraps(fn)
+        def wrapper(*args, _fn=fn, _key=key, **kwargs):
+            result = _fn(*args, **kwargs)
+            detector_calls.values[_key] = detector_calls.values.get(_key, 0) + 1
+            if _is_hit(result):
+                detector_hits.values[_key] = detector_hits.values.get(_key, 0) + 1
+            return result
+        setattr(module, attribute, wrapper)
+
+
+def instrument_lookups(module, mode, lookups, contact_lookup="name"):
+    """
+    lookups — {имя поиска: имя функции}; задержка -> find_nationality_lookup_seconds.
+    Вызовы поиска contact_lookup (классификация имени) считаются обработанными контактами.
+    """
+    for lookup, attribute in lookups.items():
+        fn = getattr(module, attribute)
+        if getattr(fn, "__wrapped__", None) is not None:
+            continue
+        counts_contacts = lookup == contact_lookup
+
+        @functools.wraps(fn)
+        def wrapper(*args, _fn=fn, _key=(mode, lookup), _count=counts_contacts, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _fn(*args, **kwargs)
+            finally:
+                lookup_seconds.observe(time.perf_counter() - started, *_key)
+                if _count:
+                    contacts_total.inc(_key[0])
+        setattr(module, attribute, wrapper)
+
+
+###############################################################################
+# HTTP
+###############################################################################
+def _handler_class():
+    # http.server импортируется только при запуске сервера: без метрик это лишние ~20 мс импорта
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def serve(port, host=DEFAULT_HOST):
+    """ Запускает HTTP-сервер /metrics в фоновом потоке; возвращает сервер. """
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer((host, port), _handler_class())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
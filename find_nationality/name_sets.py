@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Скомпилированный набор исламских имён (islam_names.json).
+
+islam_names.txt — текст с заголовками «--- Boy Names ---» / «--- Girl Names ---».
+Скрапер (islam_names.py) дополнительно пишет JSON-артефакт, где имена уже
+разобраны по полу и дополнены нормализованными вариантами (нижний регистр,
+ё -> е, латинская транслитерация). Оба классификатора загружают артефакт в
+неизменяемые множества, не разбирая текст при старте.
+
+Пересобрать артефакт из текстового файла:
+    python -m find_nationality.name_sets islam_names.txt islam_names.json
+"""
+
+import json
+import os
+import sys
+from functools import lru_cache
+
+from . import DATA_DIR
+from .transliteration import translit_to_latin
+
+ARTIFACT_VERSION = 1
+GENDERS = ("boy", "girl")
+
+
+def normalise(name: str) -> str:
+    """ Ключ нормализованного сравнения: нижний регистр, ё -> е. """
+    return name.strip().lower().replace("ё", "е")
+
+
+def read_names_text(path):
+    """ Разбирает islam_names.txt в {пол: [имена]} без строк-заголовков. """
+    names = {gender: [] for gender in GENDERS}
+    # Имена до первого заголовка относятся к первой секции (мальчики)
+    current = GENDERS[0]
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("---"):
+                header = line.strip("- ").lower()
+                current = next((g for g in GENDERS if header.startswith(g)), None)
+            elif line and current:
+                names[current].append(line)
+    return names
+
+
+def compile_artifact(names_by_gender):
+    """ Словарь артефакта: имена по полу + отсортированный массив вариантов. """
+    variants = set()
+    for names in names_by_gender.values():
+        for name in names:
+            variants.add(normalise(name))
+            variants.add(normalise(translit_to_latin(name)))
+    return {
+        "version": ARTIFACT_VERSION,
+        "names": {gender: list(dict.fromkeys(names_by_gender.get(gender, []))) for gender in GENDERS},
+        "variants": sorted(variants),
+    }
+
+
+def write_artifact(path, names_by_gender):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(compile_artifact(names_by_gender), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+class NameSet:
+    """
+    Неизменяемый набор имён: точное членство (`name in names`), членство
+    по нормализованному варианту и пол имени.
+    """
+
+    def __init__(self, names_by_gender, variants=None):
+        self.by_gender = {gender: tuple(names) for gender, names in names_by_gender.items()}
+        self.gender = {}
+        for gender, names in self.by_gender.items():
+            for name in names:
+                self.gender.setdefault(name, gender)
+        self.names = frozenset(self.gender)
+        if variants is None:
+            variants = compile_artifact(names_by_gender)["variants"]
+        self.variants = frozenset(variants)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.gender)
+
+    def __len__(self):
+        return len(self.names)
+
+    def contains_normalised(self, word):
+        return normalise(word) in self.variants
+
+
+def load_name_set(artifact_path, text_path=None):
+    """
+    Загружает артефакт; если его нет или текстовый файл новее — разбирает текст.
+    Если нет ни того, ни другого — пустой набор.
+    """
+    artifact_fresh = os.path.exists(artifact_path) and not (
+        text_path and os.path.exists(text_path)
+        and os.path.getmtime(text_path) > os.path.getmtime(artifact_path)
+    )
+    if artifact_fresh:
+        with open(artifact_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == ARTIFACT_VERSION:
+            return NameSet(data["names"], data["variants"])
+    if text_path and os.path.exists(text_path):
+        return NameSet(read_names_text(text_path))
+    return NameSet({gender: [] for gender in GENDERS}, [])
+
+
+@lru_cache(maxsize=None)
+def islamic_names():
+    """
+    Набор исламских имён из каталога данных пакета; загружается при первом
+    вызове и общий для обоих режимов.
+    """
+    return load_name_set(os.path.join(DATA_DIR, "islam_names.json"),
+                         os.path.join(DATA_DIR, "islam_names.txt"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Использование: python -m find_nationality.name_sets islam_names.txt islam_names.json")
+        sys.exit(1)
+    write_artifact(sys.argv[2], read_names_text(sys.argv[1]))
+    print(f"Артефакт сохранён в {sys.argv[2]}")
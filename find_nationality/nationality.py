@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Общее перечисление национальностей для обоих режимов.
+"""
+
+from enum import Enum
+
+
+class Nationality(Enum):
+    RUSSIAN = "Русский"
+    UKRAINIAN = "Украинец"
+    BELARUSIAN = "Белорус"
+    UZBEK = "Узбек"
+    KAZAKH = "Казах"
+    GEORGIAN = "Грузин"
+    ARMENIAN = "Армянин"
+    AZERBAIJANI = "Азербайджанец"
+    TAJIK = "Таджик"
+    MOLDOVAN = "Молдаванин"
+    LITHUANIAN = "Литовец"
+    LATVIAN = "Латыш"
+    ESTONIAN = "Эстонец"
+    TURKMEN = "Туркмен"
+    KYRGYZ = "Киргиз"
+    CHECHEN = "Чеченец"
+    DAGESTANI = "Дагестанец"
+    INGUSH = "Ингуш"
+    TATAR = "Татарин"
+    BURYAT = "Бурят"
+    ISLAM = "Ислам"
+    CAUCASIAN = "Кавказ"
+    ASIAN = "Азия"
+    ANGLO_SAXON = "Англосакс"
+    OSSETIAN = "Осетин"
+    AVAR = "Аварец"
+    UNDETERMINED = "Не определено"
+    SHALAVY = "Шалавы"
+    VULGAR = "Шалопай"
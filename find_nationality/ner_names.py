@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Выделение частей личного имени в имени контакта с помощью spaCy.
+
+В «Ремонт Танк» или «Саша Сбербанк» лишние слова сейчас отбрасываются
+проверкой подстрок non_name_parts. Необязательный этап NER вместо этого
+оставляет токены, которые модель считает частью имени: PROPN или
+сущность PER.
+
+Модель дорогая, поэтому:
+* имена обрабатываются пачками через nlp.pipe (batch_size, n_process);
+* лишние компоненты конвейера (parser, lemmatizer и т.п.) отключены,
+  нужны только tok2vec, морфология (POS) и ner;
+* результат кэшируется по уникальному имени — в alldata одно и то же
+  «как записан» встречается у многих пользователей, и prime() заранее
+  прогоняет все уникальные имена одним потоком пачек.
+"""
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Компоненты, нужные для POS и NER; остальные на время pipe отключаются
+NEEDED_COMPONENTS = ("tok2vec", "morphologizer", "tagger", "attribute_ruler", "ner")
+
+
+def person_parts(doc):
+    """ Токены документа, относящиеся к личному имени (PROPN или сущность PER). """
+    return frozenset(token.text for token in doc if token.pos_ == "PROPN" or token.ent_type_ == "PER")
+
+
+class PersonNameParts:
+    """ Кэш «имя -> части личного имени», заполняемый пачками nlp.pipe. """
+
+    def __init__(self, nlp, batch_size=DEFAULT_BATCH_SIZE, n_process=1):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _unused_components(self):
+        return [name for name in self.nlp.pipe_names if name not in NEEDED_COMPONENTS]
+
+    def prime(self, names):
+        """ Прогоняет ещё не обработанные уникальные имена через nlp.pipe; возвращает их число. """
+        pending = [name for name in dict.fromkeys(names) if name and name not in self._cache]
+        if not pending:
+            return 0
+        with self.nlp.select_pipes(disable=self._unused_components()):
+            docs = self.nlp.pipe(pending, batch_size=self.batch_size, n_process=self.n_process)
+            for name, doc in zip(pending, docs):
+                self._cache[name] = person_parts(doc)
+        return len(pending)
+
+    def get(self, name):
+        """ Части личного имени; имя не из prime() обрабатывается отдельно. """
+        parts = self._cache.get(name)
+        if parts is None:
+            self.misses += 1
+            # Промах кэша: одно имя без пачки, с теми же отключёнными компонентами
+            with self.nlp.select_pipes(disable=self._unused_components()):
+                parts = person_parts(self.nlp(name))
+            self._cache[name] = parts
+        else:
+            self.hits += 1
+        return parts
+
+    def __len__(self):
+        return len(self._cache)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Выходной слой: буферизованные подключаемые приёмники строк результата.
+
+Строки пишутся пачками (writerows / executemany) в файлы с большим
+буфером. Формат выбирается по расширению выходного файла или явно:
+
+    csv      — обычный CSV;
+    csv.gz   — CSV, сжатый gzip;
+    csv.zst  — CSV, сжатый zstd (нужен пакет zstandard);
+    jsonl    — по одному JSON-объекту {заголовок: значение} на строку;
+    sqlite   — таблица results в базе SQLite, вставка пачками в транзакции.
+
+BackgroundWriter переносит запись в отдельный поток: классификатор кладёт
+пачки в ограниченную очередь и не ждёт медленный диск, пока очередь не
+заполнена.
+"""
+
+import csv
+import gzip
+import io
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+
+BUFFER_SIZE = 1024 * 1024
+BATCH_SIZE = 4096
+QUEUE_BATCHES = 8
+
+FORMATS = ("csv", "csv.gz", "csv.zst", "jsonl", "sqlite")
+_SUFFIXES = [
+    (".csv.gz", "csv.gz"), (".csv.zst", "csv.zst"), (".jsonl", "jsonl"),
+    (".sqlite", "sqlite"), (".sqlite3", "sqlite"), (".db", "sqlite"),
+]
+
+
+def detect_format(path):
+    """ Формат по расширению файла; по умолчанию csv. """
+    lowered = path.lower()
+    for suffix, fmt in _SUFFIXES:
+        if lowered.endswith(suffix):
+            return fmt
+    return "csv"
+
+
+def _open_text(path, compression):
+    if compression == "gz":
+        return io.TextIOWrapper(
+            io.BufferedWriter(gzip.open(path, "wb", compresslevel=6), BUFFER_SIZE),
+            encoding="utf-8", newline="")
+    if compression == "zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Для формата csv.zst установите пакет zstandard: pip install zstandard")
+        raw = open(path, "wb", buffering=BUFFER_SIZE)
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw, closefd=True),
+                                encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+
+
+class CsvSink:
+    """ CSV (в том числе сжатый): заголовок и строки через csv.writer.writerows. """
+
+    def __init__(self, path, header, compression=None):
+        self._file = _open_text(path, compression)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    """ JSON Lines: каждая строка — объект с ключами из заголовка. """
+
+    def __init__(self, path, header):
+        self.header = list(header)
+        self._file = _open_text(path, None)
+
+    def write_rows(self, rows):
+        header = self.header
+        self._file.write("".join(
+            json.dumps(dict(zip(header, row)), ensure_ascii=False) + "\n" for row in rows))
+
+    def close(self):
+        self._file.close()
+
+
+class SqliteSink:
+    """ Таблица SQLite с колонками из заголовка; каждая пачка — одна транзакция. """
+
+    def __init__(self, path, header, table="results"):
+        # Пачки может писать поток BackgroundWriter, но всегда только один поток за раз
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f'"{name}" TEXT' for name in header)
+        with self._conn:
+            self._conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self._conn.execute(f'CREATE TABLE "{table}" ({columns})')
+        placeholders = ", ".join("?" for _ in header)
+        self._insert = f'INSERT INTO "{table}" VALUES ({placeholders})'
+
+    def write_rows(self, rows):
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+
+    def close(self):
+        self._conn.close()
+
+
+def open_sink(path, header, fmt=None):
+    """ Приёмник для файла path; fmt — один из FORMATS или None (по расширению). """
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        return CsvSink(path, header)
+    if fmt == "csv.gz":
+        return CsvSink(path, header, compression="gz")
+    if fmt == "csv.zst":
+        return CsvSink(path, header, compression="zst")
+    if fmt == "jsonl":
+        return JsonlSink(path, header)
+    if fmt == "sqlite":
+        return SqliteSink(path, header)
+    raise ValueError(f"Неизвестный формат вывода: {fmt}")
+
+
+class TeeSink:
+    """ Раздаёт каждую пачку нескольким приёмникам (например, CSV и хранилищу результатов). """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write_rows(self, rows):
+        for sink in self.sinks:
+            sink.write_rows(rows)
+
+    def close(self):
+        try:
+            for sink in self.sinks[:-1]:
+                sink.close()
+        finally:
+            self.sinks[-1].close()
+
+
+class BackgroundWriter:
+    """
+    Обёртка над приёмником: пачки пишет отдельный поток. Очередь ограничена
+    max_batches пачками, поэтому память не растёт, если диск не успевает.
+    Ошибка записи пробрасывается в вызывающий поток при следующей пачке
+    или при закрытии.
+    """
+
+    _DONE = object()
+
+    def __init__(self, sink, max_batches=QUEUE_BATCHES):
+        self.sink = sink
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is self._DONE:
+                return
+            if self._error is None:
+                try:
+                    self.sink.write_rows(batch)
+                except Exception as e:
+                    self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def write_rows(self, rows):
+        self._raise_error()
+        self._queue.put(list(rows))
+
+    def close(self):
+        self._queue.put(self._DONE)
+        self._thread.join()
+        self.sink.close()
+        self._raise_error()
+
+
+def write_rows(sink, rows, batch_size=BATCH_SIZE):
+    """ Пишет итератор строк пачками по batch_size и закрывает приёмник; возвращает число строк. """
+    count = 0
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            sink.write_rows(batch)
+            count += len(batch)
+    finally:
+        sink.close()
+    return count
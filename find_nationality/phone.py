@@ -0,0 +1,1486 @@
+"""
+Phone mode: region by phone number and nationality by contact name (alldata.txt).
+
+Importing this module loads nothing heavy: the NamesParser, the contact rules
+and the Islamic names set are loaded on first use.
+"""
+
+import argparse
+import contextlib
+import csv
+import functools
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+
+from . import DATA_DIR
+from . import bloom
+from . import dedup
+from . import detectors
+from . import fastcore
+from . import fuzzy_names
+from . import isolation
+from . import metrics
+from . import name_sets
+from . import ner_names
+from . import output_sinks
+from . import ported_numbers as porting
+from . import prefix_table as prefixes
+from . import profiles
+from . import progress
+from . import result_store
+from . import sampling
+from . import rules
+from . import shared_tables
+from . import startup
+from . import transliteration
+from .nationality import Nationality
+
+_names_parser = None
+
+
+# The Russian NamesParser for ethnic classification, created on first use. Its datasets load on the
+# first query, so one query is run here: callers warm it before the contact guard's alarm is armed
+def get_names_parser():
+    global _names_parser
+    if _names_parser is None:
+        from russiannames.parser import NamesParser
+        with metrics.load_timer("names_parser"):
+            _names_parser = NamesParser()
+            _names_parser.classify("Иванов", "Иван", "Иванович")
+    return _names_parser
+
+
+# Optional spaCy stage that picks the person-name parts of a contact name (see ner_names.py)
+ner_settings = {"enabled": False, "batch_size": ner_names.DEFAULT_BATCH_SIZE, "processes": 1}
+_person_names = None
+
+
+# The Russian spaCy model and the per-name cache, loaded only when --ner is on
+def get_person_names():
+    global _person_names
+    if _person_names is None:
+        import spacy
+        with metrics.load_timer("ru_core_news_md"):
+            nlp = spacy.load("ru_core_news_md")
+        _person_names = ner_names.PersonNameParts(nlp, ner_settings["batch_size"], ner_settings["processes"])
+    return _person_names
+
+
+# Run the NER stage over all unique contact names in large batches before classification
+def prime_person_names(contact_names):
+    return get_person_names().prime(clean_name(name) for name in contact_names if name)
+
+# Surname suffixes checked in this order (the lists themselves are shared with fio, see detectors.py).
+# Suffixes run before the Islamic-name step here, so the Cyrillic feminine endings that also end first
+# names (Амина, Ясмина) are left out
+suffixes = detectors.suffix_table([
+    Nationality.RUSSIAN, Nationality.UKRAINIAN, Nationality.KAZAKH, Nationality.UZBEK, Nationality.BELARUSIAN,
+    Nationality.MOLDOVAN, Nationality.CHECHEN, Nationality.DAGESTANI, Nationality.CAUCASIAN, Nationality.ASIAN,
+    Nationality.ANGLO_SAXON, Nationality.LATVIAN, Nationality.LITHUANIAN, Nationality.ESTONIAN, Nationality.INGUSH,
+    Nationality.TATAR, Nationality.BURYAT,
+], exclude={Nationality.RUSSIAN: ("ева", "ина", "ская", "skaja")})
+
+# Keyword dictionaries and typical first names live in a versioned data file (see rules.py)
+CONTACT_RULES_PATH = detectors.CONTACT_RULES_PATH
+
+
+# One compiled, immutable snapshot of the contact rules; swapped as a whole on reload
+class ContactRules:
+    def __init__(self, data):
+        self.version = data["version"]
+        self.vulgar_words = list(data["vulgar_words"])
+        self.geo_keywords = {country: list(locations) for country, locations in data["geo_keywords"].items()}
+        self.company_keywords = {country: list(companies) for country, companies in data["company_keywords"].items()}
+        self.professions = list(data["professions"])
+        self.family_relationships = list(data["family_relationships"])
+        self.affectionate_nicknames = list(data["affectionate_nicknames"])
+        self.diminutive_to_formal = dict(data["diminutive_to_formal"])
+        self.non_name_parts = list(data["non_name_parts"])
+        # One shared index holds the Cyrillic names, their transliterations and the Latin -> Cyrillic table
+        self.typical_name_index = transliteration.NameIndex(
+            {Nationality[label]: names for label, names in data["typical_names"].items()})
+        self.typical_names = self.typical_name_index.as_flattened_dict()
+        # Indexes derived from the rules (see compile_contact_rules); swapped together with them
+        self.fuzzy_index = None
+        self.name_screen = None
+        self.keyword_index = None
+
+
+# Compile step of the rules watcher: the rules and the indexes the enabled steps derive from them are built
+# here, off the classification path, so a reload never rebuilds anything inside a contact's time budget
+def compile_contact_rules(data):
+    rules_snapshot = ContactRules(data)
+    if fuzzy_settings["enabled"]:
+        rules_snapshot.fuzzy_index = _build_fuzzy_index(rules_snapshot)
+    if screen_settings["enabled"]:
+        rules_snapshot.name_screen = _build_name_screen(rules_snapshot)
+    if scoring_settings["enabled"]:
+        rules_snapshot.keyword_index = _build_keyword_index(rules_snapshot)
+    return rules_snapshot
+
+
+# Compiled snapshot the module-level dictionaries below currently point at
+_active_rules = None
+
+
+# Point the module-level dictionaries at a compiled snapshot
+def apply_contact_rules(rules_snapshot):
+    global _active_rules
+    global vulgar_words, geo_keywords, company_keywords, professions, family_relationships
+    global affectionate_nicknames, diminutive_to_formal, non_name_parts, typical_name_index, typical_names
+    vulgar_words = rules_snapshot.vulgar_words
+    geo_keywords = rules_snapshot.geo_keywords
+    company_keywords = rules_snapshot.company_keywords
+    professions = rules_snapshot.professions
+    family_relationships = rules_snapshot.family_relationships
+    affectionate_nicknames = rules_snapshot.affectionate_nicknames
+    diminutive_to_formal = rules_snapshot.diminutive_to_formal
+    non_name_parts = rules_snapshot.non_name_parts
+    typical_name_index = rules_snapshot.typical_name_index
+    typical_names = rules_snapshot.typical_names
+    _active_rules = rules_snapshot
+
+
+_rule_watcher = None
+
+
+# The watcher loads the rules file on creation, so it is created on first use
+def get_rule_watcher():
+    global _rule_watcher
+    if _rule_watcher is None:
+        _rule_watcher = rules.RuleWatcher(CONTACT_RULES_PATH, compile_contact_rules)
+    return _rule_watcher
+
+
+# Install a snapshot compiled by the watcher thread; called between contacts, never mid-contact
+def refresh_contact_rules():
+    watcher = get_rule_watcher()
+    if watcher.current is not _active_rules:
+        apply_contact_rules(watcher.current)
+
+
+# Entry points call this so the module-level dictionaries exist before any detector runs
+def ensure_contact_rules():
+    if _active_rules is None:
+        refresh_contact_rules()
+
+
+# Detect nationality based on vulgar words
+def detect_vulgar_words(contact_name: str) -> Nationality:
+    if any(vulgar_word in contact_name.lower() for vulgar_word in vulgar_words):
+        return Nationality.VULGAR
+    return None
+
+# Flag emoji and language-specific letters are detected the same way in both modes
+detect_nationality_from_flag = detectors.detect_nationality_from_flag
+detect_nationality_from_letters = detectors.detect_nationality_from_letters
+
+
+# Detect nationality based on geo-location keywords
+def detect_nationality_from_geo(contact_name: str) -> Nationality:
+    return detectors.detect_nationality_from_keywords(contact_name, geo_keywords)
+
+
+# Detect nationality based on patronymics
+def detect_nationality_from_patronymic(patronymic: str) -> Nationality:
+    for nationality, suffixes in patronymic_suffixes.items():
+        if any(patronymic.lower().endswith(suffix.lower()) for suffix in suffixes):
+            return nationality
+    return None
+
+# Detect nationality based on company names
+def detect_nationality_from_company_names(contact_name: str) -> Nationality:
+    return detectors.detect_nationality_from_keywords(contact_name, company_keywords)
+
+# Detect nationality based on professions and family relationships
+def detect_nationality_from_professions_family(contact_name: str) -> Nationality:
+    return detectors.detect_russian_keyword(contact_name, professions + family_relationships)
+
+# Use NamesParser to detect ethnicity
+def detect_ethnicity_using_parser(last_name: str, first_name: str, middle_name: str) -> Nationality:
+    try:
+        result = get_names_parser().classify(last_name, first_name, middle_name)
+        ethnics = result.get("ethnics", [])
+        if "kaz" in ethnics or "tur" in ethnics:
+            return Nationality.KAZAKH
+        elif "geo" in ethnics:
+            return Nationality.GEORGIAN
+        elif "arm" in ethnics:
+            return Nationality.ARMENIAN
+        elif "aze" in ethnics:
+            return Nationality.AZERBAIJANI
+        elif "che" in ethnics:
+            return Nationality.CHECHEN
+        elif "dag" in ethnics:
+            return Nationality.DAGESTANI
+        elif "ing" in ethnics:
+            return Nationality.INGUSH
+        elif "slav" in ethnics:
+            return Nationality.RUSSIAN
+    except Exception:
+        return Nationality.UNDETERMINED
+    return Nationality.UNDETERMINED
+
+# Suffixes for patronymics
+patronymic_suffixes = {
+    Nationality.RUSSIAN: ["ович", "евич", "овна", "евна"],
+    Nationality.UKRAINIAN: ["ович", "евич", "овна", "евна", "івич", "іївна"],
+    Nationality.BELARUSIAN: ["ович", "евич", "овна", "евна", "овіч", "евіч"],
+    Nationality.GEORGIAN: ["швили", "дзе"],
+    Nationality.ARMENIAN: ["ян", "янц"],
+    Nationality.AZERBAIJANI: ["оглы", "кызы"],
+    Nationality.KAZAKH: ["улы", "кызы"],
+    Nationality.UZBEK: ["зода", "заде", "zada"],
+    Nationality.TAJIK: ["зода", "заде", "zada"],
+}
+
+
+def detect_nationality_from_affectionate_nickname(name: str) -> Nationality:
+    # Check if the name contains any affectionate nickname
+    return detectors.detect_russian_keyword(name, affectionate_nicknames)
+
+
+
+ranks = ["Рядовой", "Сержант", "Лейтенант", "Капитан", "Генерал", "Полковник"]
+
+
+def is_non_name_part(part: str) -> bool:
+    """Check if a part of the name is a non-name element like business or service."""
+    return any(non_name.lower() in part.lower() for non_name in non_name_parts)
+
+# Keep the name parts of a cleaned contact name: with the NER stage, the parts spaCy tags as
+# PROPN or PER; otherwise (or if it finds none) the parts that pass the non-name substring check
+def filter_name_parts(cleaned_name, raw_parts, name_parts):
+    if ner_settings["enabled"]:
+        person = get_person_names().get(cleaned_name)
+        if person:
+            return [part for raw, part in zip(raw_parts, name_parts) if raw in person]
+    return [part for part in name_parts if not is_non_name_part(part)]
+
+# Handle diminutives mapping to formal names
+def normalize_diminutive(name: str) -> str:
+    """Replace diminutive forms with their formal names."""
+    return diminutive_to_formal.get(name, name)  # Return formal name if found, otherwise return as is
+
+
+
+
+def detect_nationality_from_first_name(name_parts) -> Nationality:
+    first_name = name_parts[0] if name_parts else ""
+
+    candidates = [first_name]
+    # Latin spellings not in the dictionary are normalised back to Cyrillic
+    if transliteration.is_latin(first_name):
+        candidates.append(typical_name_index.to_cyrillic(first_name))
+
+    for candidate in candidates:
+        # Worker processes look the name up in the shared mmap index instead,
+        # as long as the rules it was built from are still the active ones
+        if _shared_tables is not None and _shared_rules is _active_rules:
+            mask = _shared_tables["first_names"].get(candidate.lower())
+            label = shared_tables.lowest_label(mask, _shared_tables.labels["nationalities"])
+            nationality = Nationality[label] if label else None
+        else:
+            # Matches either the Cyrillic or the Latin version, case-insensitively
+            nationality = typical_name_index.first_label_folded(candidate)
+        if nationality:
+            return nationality
+
+    return None
+
+
+# Bloom pre-screen of the first-name and suffix steps (see bloom.py). Off by default:
+# those steps are a tiny share of a contact and the screen measures within noise
+screen_settings = {"enabled": False}
+NAME_FILTER_PATH = os.path.join(DATA_DIR, "name_filter_phone.bin")
+
+
+# Built from typical names and suffixes
+def _build_name_screen(rules_snapshot):
+    names = [name for names in rules_snapshot.typical_names.values() for name in names]
+    suffix_list = [suffix for suffix_list in suffixes.values() for suffix in suffix_list]
+    return bloom.TokenScreen.build(names, suffix_list, NAME_FILTER_PATH)
+
+
+# The screen of the active rules; built here only if the rules were compiled while the screen was off
+def get_name_screen():
+    ensure_contact_rules()
+    rules_snapshot = _active_rules
+    if rules_snapshot.name_screen is None:
+        rules_snapshot.name_screen = _build_name_screen(rules_snapshot)
+    return rules_snapshot.name_screen
+
+
+# The Cyrillic form of a Latin first name: the first-name step looks it up too.
+# The screen asks for it only when the parts themselves do not pass.
+def _cyrillic_first_name(name_parts):
+    if name_parts and transliteration.is_latin(name_parts[0]):
+        return [typical_name_index.to_cyrillic(name_parts[0])]
+    return []
+
+
+# Match nationality based on name parts
+def match_nationality(name_parts):
+    first_name = name_parts[0] if len(name_parts) > 0 else ""
+    last_name = name_parts[-1] if len(name_parts) > 1 else ""
+    middle_name = name_parts[1] if len(name_parts) == 3 else ""
+
+    # Ethnic classification using NamesParser
+    if len(name_parts) >= 2:
+        ethnicity_nationality = detect_ethnicity_using_parser(last_name, first_name, middle_name)
+        if ethnicity_nationality != Nationality.UNDETERMINED:
+            return ethnicity_nationality
+
+    # No part can be a typical first name or end with a known suffix
+    if screen_settings["enabled"] and not get_name_screen().might_match_any(
+            name_parts, lambda: _cyrillic_first_name(name_parts)):
+        return Nationality.UNDETERMINED
+
+    # Check for nationality based on typical first names
+    name_nationality = detect_nationality_from_first_name(name_parts)
+    if name_nationality:
+        return name_nationality
+
+    # Use suffix matching if ethnicity and name are not determined
+    return match_suffixes(name_parts)
+
+
+# Suffix lists as tuples for str.endswith, in the order of suffixes
+_suffix_nationality_order = list(suffixes)
+_suffix_groups = fastcore.suffix_groups(suffixes.values())
+
+
+# The nationality whose suffixes end the most name parts (the first one on a tie)
+def match_suffixes(name_parts):
+    if _shared_tables is not None:
+        return _match_suffixes_shared(name_parts)
+    best = fastcore.best_suffix_group(name_parts, _suffix_groups)
+    return _suffix_nationality_order[best] if best >= 0 else Nationality.UNDETERMINED
+
+
+# Suffix matching against the shared suffix index (same counting as match_suffixes)
+def _match_suffixes_shared(name_parts):
+    index = _shared_tables["suffixes"]
+    labels = _shared_tables.labels["suffix_nationalities"]
+    lengths = _shared_tables.labels["suffix_lengths"]
+    counts = [0] * len(labels)
+    for part in name_parts:
+        lowered = part.lower()
+        mask = 0
+        for length in lengths:
+            if len(lowered) >= length:
+                mask |= index.get(lowered[-length:])
+        while mask:
+            low_bit = mask & -mask
+            counts[low_bit.bit_length() - 1] += 1
+            mask ^= low_bit
+
+    best = max(range(len(counts)), key=counts.__getitem__)
+    return Nationality[labels[best]] if counts[best] > 0 else Nationality.UNDETERMINED
+
+
+# Function to remove emojis, special characters and digits (see fastcore.py)
+clean_name = fastcore.clean_name
+
+# Detect nationality based on name
+# Updated nationality detection function
+def detect_nationality_from_name(name: str) -> Nationality:
+    ensure_contact_rules()
+
+    # Step 1: Check for flag emoji indicating nationality
+    flag_nationality = detect_nationality_from_flag(name)
+    if flag_nationality:
+        return flag_nationality
+
+    # Step 2: Clean the name by removing non-flag emojis and special characters
+    cleaned_name = clean_name(name)
+
+    # Split the cleaned name into parts
+    raw_parts = cleaned_name.split()
+
+    # Step 3: Normalize diminutives to formal names
+    name_parts = [normalize_diminutive(part) for part in raw_parts]
+
+    # Step 4: Filter out non-name parts (like "Ремонт", "Танк", etc.)
+    name_parts = filter_name_parts(cleaned_name, raw_parts, name_parts)
+
+    # Step 5: Handle first name detection (e.g., "Damir")
+    first_name_nationality = detect_nationality_from_first_name(name_parts)
+    if first_name_nationality:
+        return first_name_nationality
+
+    # Step Check for affectionate nickname
+    affectionate_nickname_nationality = detect_nationality_from_affectionate_nickname(
+        cleaned_name)
+    if affectionate_nickname_nationality:
+        return affectionate_nickname_nationality
+
+    # Step 6: Check for vulgar words in the cleaned name
+    vulgar_nationality = detect_vulgar_words(cleaned_name)
+    if vulgar_nationality:
+        return vulgar_nationality
+
+    # Step 7: Check for special '💦' marker for specific classification
+    if '💦' in name:
+        return Nationality.SHALAVY
+
+    # Step 8: Check for geo-related data in the cleaned name (e.g., locations, countries)
+    geo_nationality = detect_nationality_from_geo(cleaned_name)
+    if geo_nationality:
+        return geo_nationality
+
+    # Step 9: Check for company names indicating nationality
+    company_nationality = detect_nationality_from_company_names(cleaned_name)
+    if company_nationality:
+        return company_nationality
+
+    # Step 10: Check for profession or family relationships
+    prof_rel_nationality = detect_nationality_from_professions_family(cleaned_name)
+    if prof_rel_nationality:
+        # If family relationship is found, still check if first name overrides it
+        if first_name_nationality:
+            return first_name_nationality
+        return prof_rel_nationality
+
+    # Step 11: Check for patronymic-based detection (in the case of full names)
+    if len(name_parts) == 3:
+        patronymic = name_parts[2]
+        patronymic_nationality = detect_nationality_from_patronymic(patronymic)
+        if patronymic_nationality:
+            return patronymic_nationality
+
+    # Step 12: Check for language-specific letters indicating nationality
+    letter_nationality = detect_nationality_from_letters(cleaned_name)
+    if letter_nationality:
+        return letter_nationality
+
+    # Step 13: Use existing surname detection logic to match the nationality
+    nationality = match_nationality(cleaned_name.split())
+
+    # Step 14: Fuzzy match typical and Islamic names once all exact lookups missed
+    if nationality == Nationality.UNDETERMINED and fuzzy_settings["enabled"]:
+        nationality = detect_nationality_fuzzy(name_parts) or nationality
+    return nationality
+
+
+# Fuzzy name matching settings (see fuzzy_names.py)
+fuzzy_settings = {
+    "enabled": True,
+    "threshold": fuzzy_names.DEFAULT_THRESHOLD,
+    "time_budget_ms": fuzzy_names.DEFAULT_TIME_BUDGET_MS,
+    "max_candidates": fuzzy_names.DEFAULT_MAX_CANDIDATES,
+}
+
+
+# The candidate index over typical and Islamic names
+def _build_fuzzy_index(rules_snapshot):
+    groups = {nationality.name: names for nationality, names in rules_snapshot.typical_names.items()}
+    groups[Nationality.ISLAM.name] = list(name_sets.islamic_names())
+    return fuzzy_names.FuzzyNameIndex(groups)
+
+
+# The index of the active rules; built here only if the rules were compiled while fuzzy matching was off
+def get_fuzzy_index():
+    ensure_contact_rules()
+    rules_snapshot = _active_rules
+    if rules_snapshot.fuzzy_index is None:
+        rules_snapshot.fuzzy_index = _build_fuzzy_index(rules_snapshot)
+    return rules_snapshot.fuzzy_index
+
+
+def detect_nationality_fuzzy(name_parts) -> Nationality:
+    hit = get_fuzzy_index().match_parts(name_parts, fuzzy_settings["threshold"], fuzzy_settings["time_budget_ms"],
+                                        fuzzy_settings["max_candidates"])
+    return Nationality[hit[0]] if hit else None
+
+
+# Scoring mode: instead of the first hit of the cascade, every signal adds its weight
+# to a nationality and the result is a ranked distribution with per-signal contributions
+scoring_settings = {"enabled": False}
+
+SIGNAL_WEIGHTS = {
+    "flag": 3.0,
+    "vulgar": 3.0,
+    "marker": 3.0,
+    "first_name": 2.0,
+    "letters": 2.0,
+    "parser": 1.5,
+    "patronymic": 1.5,
+    "islam_name": 1.0,
+    "suffix": 1.0,          # per name part with a matching suffix
+    "geo": 1.0,
+    "fuzzy": 1.0,           # scaled by the fuzzy similarity
+    "company": 0.5,
+    "profession_family": 0.5,
+    "nickname": 0.5,
+}
+
+# The NamesParser call is the most expensive signal; it is skipped once a signal this strong has fired
+PARSER_SKIP_SCORE = 2.0
+
+
+# Token features computed once per contact and shared by all signals
+class NameFeatures:
+    def __init__(self, name):
+        self.raw = name
+        self.cleaned = clean_name(name)
+        self.lowered = self.cleaned.lower()
+        self.parts = self.cleaned.split()
+        name_parts = [normalize_diminutive(part) for part in self.parts]
+        self.name_parts = filter_name_parts(self.cleaned, self.parts, name_parts)
+
+
+class NameScore:
+    def __init__(self, scores, contributions):
+        # Stable sort: equal scores keep the order in which their first signal fired
+        self.ranking = sorted(scores.items(), key=lambda item: -item[1])
+        self.contributions = contributions
+        total = sum(scores.values())
+        self.top = self.ranking[0][0] if self.ranking else Nationality.UNDETERMINED
+        self.confidence = self.ranking[0][1] / total if total else 0.0
+
+    # Compact "signal:nationality+weight" list for the output file
+    def signals_text(self):
+        return ";".join(f"{signal}:{nationality.value}+{weight:g}" for signal, nationality, weight in self.contributions)
+
+
+# All substring keyword lists folded into one regex: (regex, keyword -> [(signal, nationality)])
+def _build_keyword_index(rules_snapshot):
+    keywords = {}
+    groups = [("vulgar", Nationality.VULGAR, rules_snapshot.vulgar_words),
+              ("nickname", Nationality.RUSSIAN, rules_snapshot.affectionate_nicknames)]
+    groups += [("company", detectors.country_to_nationality.get(country), companies)
+               for country, companies in rules_snapshot.company_keywords.items()]
+    groups += [("profession_family", Nationality.RUSSIAN,
+                rules_snapshot.professions + rules_snapshot.family_relationships)]
+    groups += [("geo", detectors.country_to_nationality.get(country), locations)
+               for country, locations in rules_snapshot.geo_keywords.items()]
+    for signal, nationality, words in groups:
+        if nationality is None:
+            continue
+        for word in words:
+            keywords.setdefault(word.lower(), []).append((signal, nationality))
+    # A lookahead finds every keyword start, including keywords nested in longer ones
+    alternation = "|".join(re.escape(word) for word in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))"), keywords
+
+
+# The keyword index of the active rules; built here only if the rules were compiled outside scoring mode
+def _get_keyword_index():
+    ensure_contact_rules()
+    rules_snapshot = _active_rules
+    if rules_snapshot.keyword_index is None:
+        rules_snapshot.keyword_index = _build_keyword_index(rules_snapshot)
+    return rules_snapshot.keyword_index
+
+
+# Lowercased suffix -> nationalities, with the distinct suffix lengths to probe
+_suffix_lookup = {}
+for _nationality, _suffix_list in suffixes.items():
+    for _suffix in _suffix_list:
+        _suffix_lookup.setdefault(_suffix.lower(), []).append(_nationality)
+_suffix_lengths = sorted({len(suffix) for suffix in _suffix_lookup}, reverse=True)
+
+
+def _suffix_nationalities(part):
+    lowered = part.lower()
+    found = []
+    for length in _suffix_lengths:
+        if len(lowered) >= length:
+            for nationality in _suffix_lookup.get(lowered[-length:], ()):
+                if nationality not in found:
+                    found.append(nationality)
+    return found
+
+
+# Evaluate every detector over one shared set of token features
+def score_nationality_from_name(name: str) -> NameScore:
+    ensure_contact_rules()
+    features = NameFeatures(name)
+    scores = {}
+    contributions = []
+
+    def add(signal, nationality, factor=1.0):
+        if nationality and nationality != Nationality.UNDETERMINED:
+            weight = SIGNAL_WEIGHTS[signal] * factor
+            scores[nationality] = scores.get(nationality, 0.0) + weight
+            contributions.append((signal, nationality, round(weight, 2)))
+
+    add("flag", detect_nationality_from_flag(name))
+    if '💦' in name:
+        add("marker", Nationality.SHALAVY)
+    add("first_name", detect_nationality_from_first_name(features.name_parts))
+    add("letters", detect_nationality_from_letters(features.cleaned))
+    if len(features.name_parts) == 3:
+        add("patronymic", detect_nationality_from_patronymic(features.name_parts[2]))
+    if any(name_sets.islamic_names().contains_normalised(part) for part in features.name_parts):
+        add("islam_name", Nationality.ISLAM)
+
+    regex, keywords = _get_keyword_index()
+    seen = set()
+    for match in regex.finditer(features.lowered):
+        for hit in keywords[match.group(1)]:
+            if hit not in seen:
+                seen.add(hit)
+                add(*hit)
+
+    for part in features.parts:
+        for nationality in _suffix_nationalities(part):
+            add("suffix", nationality)
+
+    if len(features.parts) >= 2 and max(scores.values(), default=0.0) < PARSER_SKIP_SCORE:
+        first_name = features.parts[0]
+        last_name = features.parts[-1]
+        middle_name = features.parts[1] if len(features.parts) == 3 else ""
+        add("parser", detect_ethnicity_using_parser(last_name, first_name, middle_name))
+
+    if not scores and fuzzy_settings["enabled"]:
+        hit = get_fuzzy_index().match_parts(features.name_parts, fuzzy_settings["threshold"],
+                                            fuzzy_settings["time_budget_ms"], fuzzy_settings["max_candidates"])
+        if hit:
+            add("fuzzy", Nationality[hit[0]], hit[2] / 100)
+
+    return NameScore(scores, contributions)
+
+
+
+
+# Function to extract country code from phone number
+def extract_country_code(phone_number, country_codes):
+    # Remove '+' or '00' from the beginning
+    if phone_number.startswith('+'):
+        phone_number = phone_number[1:]
+    elif phone_number.startswith('00'):
+        phone_number = phone_number[2:]
+    # Try to find the longest matching country code
+    for code in country_codes:
+        if phone_number.startswith(code):
+            return code, phone_number[len(code):]
+    # If no country code found, return None
+    return None, phone_number
+
+# Function to read mobile patterns from CSV file
+def read_patterns_from_csv(csv_filename):
+    pattern_regions = []
+    with open(csv_filename, 'r', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)  # Skip the header row
+        for row in reader:
+            if len(row) != 4:
+                continue  # Skip rows that don't have exactly 4 columns
+            code, number_pattern, operator, region = row
+            code = code.strip()
+            number_pattern = number_pattern.strip()
+            operator = operator.strip()
+            region = region.strip()
+
+            # Remove 'code-' prefix from number_pattern if present
+            if number_pattern.startswith(code + '-'):
+                number_pattern = number_pattern[len(code) + 1:]
+            # Combine code and number_pattern to get full pattern
+            full_pattern = code + number_pattern
+
+            # Replace 'x' with '\d' in regex
+            regex_pattern = '^' + full_pattern.replace('x', r'\d') + '$'
+
+            # Compile the regex
+            regex = re.compile(regex_pattern)
+
+            # Append to the list; the operator is kept for operator-level routing
+            pattern_regions.append((regex, region, operator))
+    return pattern_regions
+
+# Function to read CIS landline and mobile patterns from CSV file
+def read_patterns_cis(csv_filename):
+    patterns_cis = []
+    country_codes_set = set()
+    country_code_to_name = {}
+    with open(csv_filename, 'r', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)  # Skip header
+        for row in reader:
+            if len(row) != 4:
+                continue  # Skip invalid rows
+            country, country_code, city_code, city = row
+            country = country.strip()
+            country_code = country_code.strip()
+            city_code = city_code.strip()
+            city = city.strip()
+            country_codes_set.add(country_code)
+            country_code_to_name[country_code] = country  # Map country code to country name
+            # Construct a pattern for the remaining number after country code
+            pattern = '^' + city_code + r'\d+$'  # Accept any number of digits after city code
+            regex = re.compile(pattern)
+            patterns_cis.append((regex, country_code, city))
+    # Build ordered list of country codes by length descending
+    country_codes = sorted(country_codes_set, key=lambda x: -len(x))
+    return patterns_cis, country_codes, country_code_to_name
+
+# Function to read contacts from alldata.txt
+def read_contacts(filename, limit=None, user_ids=None, tracker=None):
+    contacts = []
+    with open(filename, 'r', encoding='utf-8') as f, progress.reading(f, tracker):
+        for idx, line in enumerate(f):
+            if limit and idx >= limit:
+                break
+            parsed = parse_contact_line(line)
+            if parsed:
+                phone_number, user_id, contact_name = parsed
+                contacts.append((phone_number, contact_name))
+                # The user id is only needed by the result store and aggregation mode, so it is collected separately
+                if user_ids is not None:
+                    user_ids.append(user_id)
+    return contacts
+
+# Function to split one alldata.txt line into (phone_number, user_id, contact_name); None for empty or short lines
+parse_contact_line = fastcore.split_contact_line
+
+# Function to stream (phone_number, contact_name) pairs without keeping the file in memory
+def iter_contacts(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            parsed = parse_contact_line(line)
+            if parsed:
+                yield parsed[0], parsed[2]
+
+def _parse_contact_pair(line):
+    parsed = parse_contact_line(line)
+    return (parsed[0], parsed[2]) if parsed else None
+
+# Function to determine the region and nationality of a contact
+def process_contact(phone_number, contact_name, pattern_regions, patterns_cis, country_codes, country_code_to_name):
+    route = lookup_phone_route(phone_number, pattern_regions, patterns_cis, country_codes, country_code_to_name)
+    return combine_contact_result(phone_number, contact_name, route, classify_contact_name(contact_name))
+
+# Function to determine the region and country of a phone number
+def lookup_phone_region(phone_number, pattern_regions, patterns_cis, country_codes, country_code_to_name):
+    _, region, country = lookup_phone_route(phone_number, pattern_regions, patterns_cis, country_codes, country_code_to_name)
+    return region, country
+
+# Ported-number overrides (see ported_numbers.py); set from --ported-numbers
+ported_numbers = None
+
+# Longest-prefix-match routing table (see prefix_table.py); set by --routing prefix
+routing_table = None
+
+# Default prefix sources ahead of mobile_codes.csv and city_codes_cis.csv: the Russia / Kazakhstan split of code 7
+DEFAULT_PREFIX_SOURCES = [os.path.join(DATA_DIR, "phone_prefixes.csv")]
+
+# Function to determine the operator, region and country of a phone number in one lookup;
+# the operator is known for Russian mobile ranges only and is "" elsewhere
+def lookup_phone_route(phone_number, pattern_regions, patterns_cis, country_codes, country_code_to_name):
+    operator = ""
+    # Strip the number and remove any '+' or '00' from the beginning; None when there is no number
+    normalised_number = fastcore.normalise_phone(phone_number)
+    if normalised_number is None:
+        region = "No region found"
+        country = "Неизвестная страна"
+    else:
+        phone_number = normalised_number
+        # One lookup of the most specific prefix replaces the three branches below
+        if routing_table is not None:
+            route = routing_table.lookup(phone_number)
+            if route is not None:
+                country, region, operator = route
+            else:
+                region = "No region found"
+                country = "Неизвестная страна"
+        # Handling Kazakhstan numbers
+        elif phone_number.startswith('77'):
+            # Kazakhstan mobile numbers
+            region = "Казахстан"
+            country = "Казахстан"
+        elif phone_number.startswith('7') and _shared_tables is not None:
+            # Russian numbers, looked up in the shared range table
+            row = shared_tables.lookup_mobile_row(
+                phone_number[1:], _shared_tables["mobile_ranges"],
+                _shared_tables["mobile_wildcards"], _shared_tables.labels["mobile_prefix_lengths"])
+            if row is not None:
+                region = f"Россия, {_shared_tables.labels['mobile_regions'][row]}"
+                operator = _shared_tables.labels['mobile_operators'][row]
+            else:
+                region = "Россия, Неизвестный регион"
+            country = "Россия"
+        elif phone_number.startswith('7'):
+            # Russian numbers
+            mobile_number = phone_number[1:]  # Remove '7'
+            region_found = False
+            for regex, region_match, operator_match in pattern_regions:
+                if regex.match(mobile_number):
+                    region = f"Россия, {region_match}"
+                    operator = operator_match
+                    region_found = True
+                    break
+            if not region_found:
+                region = "Россия, Неизвестный регион"
+            country = "Россия"
+        else:
+            # Try to extract country code
+            country_code, remaining_number = extract_country_code(phone_number, country_codes)
+            if country_code:
+                # Try to match the remaining number with patterns_cis
+                region = "No region found"
+                for regex, pattern_country_code, city in patterns_cis:
+                    if country_code == pattern_country_code and regex.match(remaining_number):
+                        country = country_code_to_name.get(country_code, "Unknown country")
+                        region = f"{country}, {city}"
+                        break
+                if region == "No region found":
+                    country = country_code_to_name.get(country_code, "Unknown country")
+                    region = f"{country}, Неизвестный город"
+            else:
+                region = "No region found"
+                country = "Неизвестная страна"
+
+        # A ported number keeps its region but not its range operator
+        if ported_numbers is not None:
+            operator = ported_numbers.get(phone_number, operator)
+
+    return operator, region, country
+
+# Per-contact time budget and dead-letter file of the name classifier (see isolation.py)
+contact_guard = isolation.ContactGuard()
+
+
+# Result of a contact whose name could not be classified
+def _name_fallback():
+    return NameScore({}, []) if scoring_settings["enabled"] else Nationality.UNDETERMINED
+
+
+# Cache hit rates shown in the progress report
+progress.register_cache("translit", lambda: transliteration.latin_to_cyrillic.cache_info()[:2])
+progress.register_cache("ner", lambda: (_person_names.hits, _person_names.misses) if _person_names else (0, 0))
+
+
+# Function to detect the nationality of a contact name; a failing or slow name is dead-lettered
+def classify_contact_name(contact_name) -> Nationality:
+    refresh_contact_rules()
+    return contact_guard.call(_classify_contact_name, contact_name, _name_fallback(), "contact_name")
+
+
+def _classify_contact_name(contact_name):
+    if scoring_settings["enabled"]:
+        return score_nationality_from_name(contact_name or "")
+    if contact_name:
+        return detect_nationality_from_name(contact_name)
+    return Nationality.UNDETERMINED
+
+# Function to build the result of a contact from its phone and name parts
+def combine_contact_result(phone_number, contact_name, route, nationality):
+    operator, region, country = route
+    # In scoring mode the name classifier returns a NameScore; its top nationality is used
+    score = None
+    if isinstance(nationality, NameScore):
+        score, nationality = nationality, nationality.top
+
+    # If nationality is still undetermined, and country is known, set nationality based on country
+    if nationality == Nationality.UNDETERMINED and country in detectors.country_to_nationality:
+        nationality = detectors.country_to_nationality[country]
+
+    result = {
+        "phone_number": phone_number,
+        "contact_name": contact_name,
+        "region": region,
+        "nationality": nationality.value if isinstance(nationality, Nationality) else nationality,
+        "operator": operator,
+    }
+    if score is not None:
+        result["confidence"] = f"{score.confidence:.2f}"
+        result["signals"] = score.signals_text()
+    return result
+
+# Lookup tables shared with pool workers through a read-only mmap file (see shared_tables.py)
+_shared_tables = None
+_shared_rules = None
+_worker_cis = None
+
+
+# Build the static lookup structures once and publish them as a shared tables file
+def build_shared_tables(path, mobile_csv_filename):
+    global _shared_rules
+    ensure_contact_rules()
+    _shared_rules = _active_rules
+    first_name_groups = {nationality.name: names for nationality, names in typical_names.items()}
+    first_name_labels, first_name_index = shared_tables.build_mask_index(first_name_groups, key=str.lower)
+
+    suffix_groups = {nationality.name: names for nationality, names in suffixes.items()}
+    suffix_labels, suffix_index = shared_tables.build_mask_index(suffix_groups)
+
+    ranges, wildcards, regions, operators = shared_tables.compile_mobile_ranges(mobile_csv_filename)
+
+    return shared_tables.write_tables(
+        path,
+        key_tables={
+            "first_names": first_name_index,
+            "suffixes": suffix_index,
+            "mobile_wildcards": wildcards,
+        },
+        range_tables={"mobile_ranges": ranges},
+        labels={
+            "nationalities": first_name_labels,
+            "suffix_nationalities": suffix_labels,
+            "suffix_lengths": shared_tables.suffix_lengths(suffix_index),
+            "mobile_regions": regions,
+            "mobile_operators": operators,
+            "mobile_prefix_lengths": shared_tables.wildcard_prefix_lengths(wildcards),
+        },
+    )
+
+
+# Pool initializer: attach to the tables published by the parent process
+def _init_worker(tables_path, patterns_cis, country_codes, country_code_to_name, watch_rules=False, ported=None,
+                 routing=None, tables_offset=0):
+    global _shared_tables, _worker_cis, ported_numbers, routing_table, _names_parser
+    # Each worker opens its own NamesParser database connection and loads it outside the contact budget
+    _names_parser = None
+    get_names_parser()
+    _shared_tables = shared_tables.SharedTables(tables_path, tables_offset)
+    _worker_cis = (patterns_cis, country_codes, country_code_to_name)
+    ported_numbers = ported
+    routing_table = routing
+    # The watcher thread does not survive fork, each worker runs its own
+    if watch_rules:
+        get_rule_watcher().start()
+
+
+# Data files the --snapshot state is built from; any change rebuilds the snapshot
+def snapshot_sources(mobile_csv_filename, city_csv_filename, prefix_sources=None):
+    sources = [CONTACT_RULES_PATH, os.path.join(DATA_DIR, "islam_names.json"), os.path.join(DATA_DIR, "islam_names.txt"),
+               mobile_csv_filename, city_csv_filename]
+    return sources + list(prefix_sources or [])
+
+
+# All non-model lookup state for --snapshot (see startup.py): the mobile ranges and name tables go to tables_path,
+# the rest is returned for pickling; the NamesParser and spaCy are left out
+def build_snapshot_state(tables_path, mobile_csv_filename, city_csv_filename, prefix_sources=None):
+    build_shared_tables(tables_path, mobile_csv_filename)
+    # The rules carry their fuzzy index, Bloom screen and keyword index
+    get_fuzzy_index()
+    get_name_screen()
+    _get_keyword_index()
+    routing = None
+    if prefix_sources is not None:
+        routing = prefixes.compile_table(prefix_sources, mobile_csv_filename, city_csv_filename)
+    return {
+        "rules": _active_rules,
+        "cis": read_patterns_cis(city_csv_filename),
+        "routing_table": routing,
+    }
+
+
+# Install a loaded snapshot; Russian numbers and name tables are then looked up as in pool workers.
+# Returns (patterns_cis, country_codes, country_code_to_name)
+def apply_snapshot(snapshot):
+    global _rule_watcher, _shared_tables, _shared_rules, routing_table
+    state = snapshot.state
+    # The snapshot was built from the current rules file, so the watcher starts from it without re-reading
+    _rule_watcher = rules.RuleWatcher(CONTACT_RULES_PATH, compile_contact_rules, current=state["rules"],
+                                      version=state["rules"].version)
+    apply_contact_rules(state["rules"])
+    _shared_tables = snapshot.tables
+    _shared_rules = state["rules"]
+    routing_table = state["routing_table"]
+    return state["cis"]
+
+
+# Mobile patterns for the legacy routing; none are needed once a snapshot's range table answers Russian numbers
+def load_mobile_patterns(csv_filename):
+    if _shared_tables is not None:
+        return []
+    return read_patterns_from_csv(csv_filename)
+
+
+def _process_contact_worker(contact):
+    phone_number, contact_name = contact
+    return process_contact(phone_number, contact_name, [], *_worker_cis)
+
+
+def _lookup_phone_route_worker(phone_number):
+    return lookup_phone_route(phone_number, [], *_worker_cis)
+
+
+# Fallbacks for items that crashed a worker: the phone is still routed, the name is left unclassified
+def _unclassified_contact_worker(contact):
+    phone_number, contact_name = contact
+    return combine_contact_result(phone_number, contact_name, _lookup_phone_route_worker(phone_number),
+                                  _name_fallback())
+
+
+def _unclassified_contact_name(contact_name):
+    return _name_fallback()
+
+
+WORKER_FALLBACKS = {
+    _process_contact_worker: _unclassified_contact_worker,
+    classify_contact_name: _unclassified_contact_name,
+}
+
+
+# Dedup key of a phone: numbers that differ only in surrounding spaces or the '+' / '00' prefix route the same
+def phone_dedup_key(phone_number):
+    return fastcore.normalise_phone(phone_number)
+
+
+# Dedup key of a contact name: the cascade reads the cleaned name, except for the flag and the marker emoji,
+# which are taken from the raw name and so are part of the key
+def contact_name_dedup_key(contact_name):
+    if not contact_name:
+        return None
+    return clean_name(contact_name), detect_nationality_from_flag(contact_name), '💦' in contact_name
+
+
+# Dedup mode: classify every unique normalised phone and name once, then fan out to contacts
+def process_contacts_dedup(contacts, phone_fn, name_fn, mapper=map):
+    routes = dedup.classify_unique((phone for phone, _ in contacts), phone_fn, mapper, key=phone_dedup_key)
+    nationalities = dedup.classify_unique((name for _, name in contacts), name_fn, mapper,
+                                          key=contact_name_dedup_key)
+    stats = dedup.DedupStats(len(contacts))
+    stats.add("contact name", len(nationalities))
+    stats.add("phone", len(routes))
+    results = [
+        combine_contact_result(phone, name, routes[phone_dedup_key(phone)], nationalities[contact_name_dedup_key(name)])
+        for phone, name in contacts
+    ]
+    return results, stats
+
+
+# The dedup summary line in English (dedup.py defaults to Russian, as fio prints it)
+def dedup_summary(stats):
+    return stats.summary(title="Deduplication", rows_label="rows", unique_label="unique", ratio_label="ratio")
+
+
+# Prefer fork so workers inherit the already-initialised module instead of re-importing it
+def _pool_context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+OUTPUT_HEADER = ['Phone Number', 'Region', 'contact_name', 'Nationality']
+SCORING_COLUMNS = ['Confidence', 'Signals']
+OPERATOR_COLUMNS = ['Operator']
+
+
+# Result store records for a batch of output rows, user ids taken in contact order
+def _store_records(rows, user_ids):
+    return [(next(user_ids), result_store.phone_key(row[0]), row[2], row[1], row[3], None, None, None)
+            for row in rows]
+
+
+def _output_row(result, scoring=False, operators=False):
+    row = [result['phone_number'], result['region'], result['contact_name'], result['nationality']]
+    if operators:
+        row.append(result['operator'])
+    if scoring:
+        row += [result['confidence'], result['signals']]
+    return row
+
+
+SAMPLE_REPORT_HEADER = ['Dimension', 'Value', 'Sample Count', 'Share', 'CI Low', 'CI High']
+
+
+# Result fields broken down by the sampling and aggregation reports: (dimension, result key)
+def _report_dimensions(args):
+    dimensions = [("Nationality", "nationality"), ("Region", "region")]
+    if args.operators:
+        dimensions.append(("Operator", "operator"))
+    return dimensions
+
+
+# Sampling mode: classify a random sample only and report the nationality and region
+# distribution with 95% confidence intervals (see sampling.py)
+def run_sampling(args, pattern_regions, patterns_cis, country_codes, country_code_to_name):
+    rng = random.Random(args.seed)
+    strata_weights = None
+    if args.sample == "stratified":
+        # Strata are phone country codes, so rare countries are still represented
+        def stratum_of(contact):
+            return extract_country_code(contact[0], country_codes)[0] or "unknown"
+        sample, strata_weights, total = sampling.stratified_sample(
+            iter_contacts(args.alldata_file), stratum_of, args.sample_size, rng)
+    else:
+        if args.sample == "seek":
+            contacts, total = sampling.seek_sample(args.alldata_file, args.sample_size, rng, _parse_contact_pair)
+        else:
+            contacts, total = sampling.reservoir_sample(iter_contacts(args.alldata_file), args.sample_size, rng)
+        sample = [(None, contact) for contact in contacts]
+
+    if args.ner:
+        prime_person_names(contact_name for _, (_, contact_name) in sample)
+
+    dimensions = _report_dimensions(args)
+
+    def classify(entry):
+        stratum, (phone_number, contact_name) = entry
+        result = process_contact(phone_number, contact_name, pattern_regions, patterns_cis, country_codes, country_code_to_name)
+        return stratum, tuple(result[key] for _, key in dimensions)
+
+    estimates = [sampling.DistributionEstimate(strata_weights) for _ in dimensions]
+    done = sampling.classify_until_tight(sample, classify, estimates, args.target_half_width or None)
+
+    rows = [
+        [dimension, value, count, f"{share:.4f}", f"{low:.4f}", f"{high:.4f}"]
+        for (dimension, _), estimate in zip(dimensions, estimates)
+        for value, count, share, low, high in estimate.rows()
+    ]
+    output_sinks.write_rows(output_sinks.open_sink(args.output_file, SAMPLE_REPORT_HEADER, args.output_format), rows)
+    widest = max(estimate.max_half_width() for estimate in estimates)
+    print(f"Classified {done} of {len(sample)} sampled contacts (about {total} in the file); "
+          f"widest 95% interval half-width: {widest:.4f}.")
+
+
+# Aggregation mode: fold contact results into per-user profiles (see profiles.py)
+def write_profiles(args, results, user_ids):
+    work_dir = tempfile.mkdtemp(prefix="find_nationality_profiles_")
+    try:
+        dimensions = _report_dimensions(args)
+        aggregator = profiles.ProfileAggregator([dimension for dimension, _ in dimensions], work_dir, args.max_users)
+        for user_id, result in zip(user_ids, results):
+            aggregator.add(user_id, tuple(result[key] for _, key in dimensions))
+        sink = output_sinks.open_sink(args.output_file, profiles.PROFILE_HEADER, args.output_format)
+        output_sinks.write_rows(sink, aggregator.profile_rows())
+        return aggregator.rows
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Write contact results in batches to the sink chosen by --output-format (see output_sinks.py),
+# and with --store also upsert them into the SQLite result store (see result_store.py)
+def write_results(args, results, user_ids=None):
+    results = progress.counted(results, run_progress)
+    if args.aggregate:
+        return write_profiles(args, results, user_ids)
+    header = OUTPUT_HEADER + (OPERATOR_COLUMNS if args.operators else []) + (SCORING_COLUMNS if args.scoring else [])
+    sink = output_sinks.open_sink(args.output_file, header, args.output_format)
+    if args.store:
+        user_ids = iter(user_ids)
+        store_sink = result_store.StoreSink(result_store.ResultStore(args.store),
+                                            lambda rows: _store_records(rows, user_ids))
+        sink = output_sinks.TeeSink(sink, store_sink)
+    if args.background_writer:
+        sink = output_sinks.BackgroundWriter(sink)
+    return output_sinks.write_rows(sink, (_output_row(result, args.scoring, args.operators) for result in results))
+
+
+# Detectors of the cascade and timed lookups, instrumented only when metrics are on (see metrics.py)
+METRIC_DETECTORS = {
+    "flag": "detect_nationality_from_flag",
+    "typical_names": "detect_nationality_from_first_name",
+    "nickname": "detect_nationality_from_affectionate_nickname",
+    "vulgar": "detect_vulgar_words",
+    "geo": "detect_nationality_from_geo",
+    "company": "detect_nationality_from_company_names",
+    "profession": "detect_nationality_from_professions_family",
+    "patronymic": "detect_nationality_from_patronymic",
+    "letters": "detect_nationality_from_letters",
+    "names_parser": "detect_ethnicity_using_parser",
+    "suffix": "match_suffixes",
+    "fuzzy": "detect_nationality_fuzzy",
+}
+METRIC_LOOKUPS = {"name": "_classify_contact_name", "phone": "lookup_phone_route"}
+
+
+# Start the /metrics endpoint; workers forked afterwards inherit the instrumented detectors
+def start_metrics(port, host=metrics.DEFAULT_HOST):
+    module = sys.modules[__name__]
+    metrics.instrument_detectors(module, "phone", METRIC_DETECTORS)
+    metrics.instrument_lookups(module, "phone", METRIC_LOOKUPS)
+    metrics.register_collector(metrics.cache_collector(progress.cache_totals))
+    return metrics.serve(port, host)
+
+
+# Live progress of the run (see progress.py); set by --progress / --progress-file
+run_progress = None
+PROGRESS_LABELS = progress.LineLabels("[progress]", "rows", "of", "/s", "avg", "read", "MB",
+                                      "eta", "cache", "workers")
+
+
+# End of a run: the final progress snapshot and the dead-letter count
+def _finish_run():
+    if run_progress is not None:
+        run_progress.stop()
+    count = contact_guard.dead_letters.count()
+    if count:
+        print(f"Dead letters: {count} contacts in {contact_guard.dead_letters.path}.")
+
+
+# --profile-startup: build what the first contacts would otherwise build lazily, one phase each, then print the report
+def _report_startup(profile, contact_name=None):
+    if not profile.enabled:
+        return
+    if fuzzy_settings["enabled"]:
+        with profile.phase("fuzzy index"):
+            get_fuzzy_index()
+    if screen_settings["enabled"]:
+        with profile.phase("Bloom screen"):
+            get_name_screen()
+    if scoring_settings["enabled"]:
+        with profile.phase("keyword index"):
+            _get_keyword_index()
+    if contact_name is not None:
+        # Unguarded and unrecorded: a failure here shows up again, dead-lettered, when the contact is processed
+        with profile.phase("first contact"), contextlib.suppress(Exception):
+            _classify_contact_name(contact_name)
+    profile.report()
+
+
+def main(argv=None, prog=None):
+    global ported_numbers, routing_table, run_progress
+    profile = startup.StartupProfile()
+    arg_parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Detect region and nationality for contacts from alldata.txt."
+    )
+    arg_parser.add_argument("-a", "--alldata-file", default="alldata.txt",
+                            help="Path to alldata.txt (default: alldata.txt).")
+    arg_parser.add_argument("-o", "--output-file", default="output_results.csv",
+                            help="Path to the output CSV file (default: output_results.csv).")
+    arg_parser.add_argument("--output-format", choices=output_sinks.FORMATS, default=None,
+                            help="csv, csv.gz, csv.zst, jsonl or sqlite (default: from the output file extension).")
+    arg_parser.add_argument("--background-writer", action="store_true",
+                            help="Write results from a separate thread through a bounded queue.")
+    arg_parser.add_argument("--store", default=None,
+                            help="Also upsert results into this SQLite store keyed by (user_id, phone).")
+    arg_parser.add_argument("--aggregate", action="store_true",
+                            help="Write per-user profiles (contact counts per nationality and region) instead of rows.")
+    arg_parser.add_argument("--max-users", type=int, default=profiles.DEFAULT_MAX_USERS,
+                            help=f"Users kept in memory in aggregation mode before spilling to disk (default: {profiles.DEFAULT_MAX_USERS}).")
+    arg_parser.add_argument("--scoring", action="store_true",
+                            help="Score all name signals instead of taking the first cascade hit; "
+                                 "adds Confidence and Signals columns.")
+    arg_parser.add_argument("--sample", choices=["reservoir", "stratified", "seek"], default=None,
+                            help="Report the nationality/region distribution of a random sample instead of "
+                                 "classifying every row (stratified: by phone country code; seek: random file offsets).")
+    arg_parser.add_argument("--sample-size", type=int, default=2000,
+                            help="Number of contacts to sample (default: 2000).")
+    arg_parser.add_argument("--seed", type=int, default=None,
+                            help="Random seed for reproducible samples.")
+    arg_parser.add_argument("--target-half-width", type=float, default=0.0,
+                            help="Stop sampling early once every 95%% interval is this narrow, e.g. 0.02 (default: off).")
+    arg_parser.add_argument("--ner", action="store_true",
+                            help="Pick person-name parts with spaCy (PROPN / PER) instead of the non-name substring check.")
+    arg_parser.add_argument("--ner-batch-size", type=int, default=ner_names.DEFAULT_BATCH_SIZE,
+                            help=f"Names per nlp.pipe batch in --ner mode (default: {ner_names.DEFAULT_BATCH_SIZE}).")
+    arg_parser.add_argument("--ner-processes", type=int, default=1,
+                            help="nlp.pipe processes in --ner mode (default: 1).")
+    arg_parser.add_argument("--operators", action="store_true",
+                            help="Add an Operator column (and an Operator breakdown to --aggregate and --sample reports).")
+    arg_parser.add_argument("--ported-numbers", default=None,
+                            help="CSV of ported numbers (number,operator) that override the range operator.")
+    arg_parser.add_argument("--routing", choices=["legacy", "prefix"], default="legacy",
+                            help="Phone routing: legacy branches, or one longest-prefix-match table over all sources "
+                                 "(regions for Kazakhstan numbers, the most specific city code wins) (default: legacy).")
+    arg_parser.add_argument("--prefix-source", action="append", default=None,
+                            help="Extra prefix CSV (Префикс,Длина,Страна,Регион,Оператор) for --routing prefix; "
+                                 "may be repeated (default: phone_prefixes.csv).")
+    arg_parser.add_argument("--mobile-codes", default="mobile_codes.csv",
+                            help="Path to mobile_codes.csv (default: mobile_codes.csv).")
+    arg_parser.add_argument("--city-codes", default="city_codes_cis.csv",
+                            help="Path to city_codes_cis.csv (default: city_codes_cis.csv).")
+    arg_parser.add_argument("-l", "--limit", type=int, default=1000,
+                            help="Process only the first N lines, 0 for all (default: 1000).")
+    arg_parser.add_argument("-w", "--workers", type=int, default=1,
+                            help="Number of worker processes (default: 1, no pool).")
+    arg_parser.add_argument("--dedup", action="store_true",
+                            help="Classify every unique contact name and phone only once.")
+    arg_parser.add_argument("--no-fuzzy", action="store_true",
+                            help="Disable fuzzy name matching.")
+    arg_parser.add_argument("--contact-timeout", type=float, default=isolation.DEFAULT_TIME_BUDGET_S,
+                            help="Time budget per contact name in seconds, 0 for none "
+                                 f"(default: {isolation.DEFAULT_TIME_BUDGET_S}).")
+    arg_parser.add_argument("--dead-letters", default=isolation.DEFAULT_DEAD_LETTERS,
+                            help="File for contacts that failed or timed out "
+                                 f"(default: {isolation.DEFAULT_DEAD_LETTERS}).")
+    bloom_group = arg_parser.add_mutually_exclusive_group()
+    bloom_group.add_argument("--bloom", action="store_true",
+                             help="Enable the Bloom filter pre-screen of first names and suffixes.")
+    bloom_group.add_argument("--no-bloom", action="store_true",
+                             help="Do not pre-screen names with the Bloom filter (the default).")
+    arg_parser.add_argument("--fuzzy-threshold", type=int, default=fuzzy_names.DEFAULT_THRESHOLD,
+                            help=f"Fuzzy similarity threshold 0-100 (default: {fuzzy_names.DEFAULT_THRESHOLD}).")
+    arg_parser.add_argument("--fuzzy-max-candidates", type=int, default=fuzzy_names.DEFAULT_MAX_CANDIDATES,
+                            help="Candidates compared per word in fuzzy matching, 0 for all "
+                                 f"(default: {fuzzy_names.DEFAULT_MAX_CANDIDATES}).")
+    arg_parser.add_argument("--fuzzy-budget-ms", type=float, default=fuzzy_names.DEFAULT_TIME_BUDGET_MS,
+                            help="Time budget per fuzzy lookup in ms, 0 for none "
+                                 f"(default: {fuzzy_names.DEFAULT_TIME_BUDGET_MS:g}); "
+                                 "a budget makes results depend on machine speed.")
+    arg_parser.add_argument("--progress", action="store_true",
+                            help="Print rows/s, bytes read, ETA, cache hit rates and worker utilisation to stderr.")
+    arg_parser.add_argument("--progress-file", default=None,
+                            help="Append the same progress snapshots as JSON lines to this file.")
+    arg_parser.add_argument("--progress-interval", type=float, default=progress.DEFAULT_INTERVAL,
+                            help=f"Seconds between progress snapshots (default: {progress.DEFAULT_INTERVAL}).")
+    arg_parser.add_argument("--metrics-port", type=int, default=None,
+                            help="Serve Prometheus metrics on this port at /metrics while the run lasts.")
+    arg_parser.add_argument("--metrics-host", default=metrics.DEFAULT_HOST,
+                            help=f"Address for the metrics endpoint (default: {metrics.DEFAULT_HOST}).")
+    arg_parser.add_argument("--watch-rules", action="store_true",
+                            help=f"Reload {os.path.relpath(CONTACT_RULES_PATH, DATA_DIR)} when it changes, without restarting.")
+    arg_parser.add_argument("--rules-interval", type=float, default=rules.DEFAULT_INTERVAL,
+                            help=f"Seconds between rules file checks (default: {rules.DEFAULT_INTERVAL}).")
+    arg_parser.add_argument("--snapshot", default=None,
+                            help="Load rules, name indexes, phone tables and patterns from this one file, "
+                                 "building it first when it is missing or its sources changed.")
+    arg_parser.add_argument("--profile-startup", action="store_true",
+                            help="Print the time spent on imports and on each initialisation phase to stderr.")
+    args = arg_parser.parse_args(argv)
+    profile.enabled = args.profile_startup
+    profile.add(f"import {__name__}", startup.import_seconds(__name__))
+    profile.mark("argument parsing")
+
+    # Settings first: the rules watcher compiles the indexes of the enabled steps together with the rules
+    fuzzy_settings.update(enabled=not args.no_fuzzy, threshold=args.fuzzy_threshold,
+                          time_budget_ms=args.fuzzy_budget_ms, max_candidates=args.fuzzy_max_candidates)
+    scoring_settings["enabled"] = args.scoring
+    screen_settings["enabled"] = args.bloom
+
+    snapshot = None
+    if args.snapshot:
+        prefix_sources = (args.prefix_source or DEFAULT_PREFIX_SOURCES) if args.routing == "prefix" else None
+        fingerprint = startup.fingerprint(snapshot_sources(args.mobile_codes, args.city_codes, prefix_sources),
+                                          extra=[args.routing])
+        with profile.phase("snapshot"):
+            snapshot, built = startup.load_or_build(args.snapshot, fingerprint, functools.partial(
+                build_snapshot_state, mobile_csv_filename=args.mobile_codes, city_csv_filename=args.city_codes,
+                prefix_sources=prefix_sources))
+            patterns_cis, country_codes, country_code_to_name = apply_snapshot(snapshot)
+        print(f"Snapshot: {'built' if built else 'loaded'} {args.snapshot}.")
+
+    if args.watch_rules:
+        get_rule_watcher().interval = args.rules_interval
+        get_rule_watcher().start()
+
+    contact_guard.time_budget_s = args.contact_timeout
+    contact_guard.dead_letters = isolation.DeadLetters(args.dead_letters)
+    contact_guard.dead_letters.reset()
+    ner_settings.update(enabled=args.ner, batch_size=args.ner_batch_size, processes=args.ner_processes)
+    if args.ported_numbers:
+        ported_numbers = porting.PortedNumbers.from_csv(args.ported_numbers)
+        print(f"Ported numbers: {len(ported_numbers)} from {args.ported_numbers}.")
+    if snapshot is None:
+        if args.routing == "prefix":
+            with profile.phase("prefix routing table"):
+                routing_table = prefixes.compile_table(args.prefix_source or DEFAULT_PREFIX_SOURCES,
+                                                       args.mobile_codes, args.city_codes)
+
+        # Read CIS landline and mobile patterns from city_codes_cis.csv
+        with profile.phase("CIS patterns"):
+            patterns_cis, country_codes, country_code_to_name = read_patterns_cis(args.city_codes)
+
+        with profile.phase("contact rules"):
+            ensure_contact_rules()
+
+    if args.store and args.aggregate:
+        arg_parser.error("--store and --aggregate cannot be combined")
+
+    if args.metrics_port:
+        start_metrics(args.metrics_port, args.metrics_host)
+        print(f"Metrics: http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+    run_progress = progress.from_args(args, args.alldata_file, PROGRESS_LABELS)
+    if run_progress is not None:
+        run_progress.start()
+
+    if args.sample:
+        with profile.phase("mobile patterns"):
+            pattern_regions = load_mobile_patterns(args.mobile_codes)
+        with profile.phase("NamesParser"):
+            get_names_parser()
+        _report_startup(profile)
+        run_sampling(args, pattern_regions, patterns_cis, country_codes, country_code_to_name)
+        _finish_run()
+        return
+
+    # Read contacts from alldata.txt (processing top entries)
+    user_ids = [] if args.store or args.aggregate else None
+    contacts = read_contacts(args.alldata_file, limit=args.limit or None, user_ids=user_ids, tracker=run_progress)
+    if run_progress is not None:
+        run_progress.total_rows = len(contacts)
+
+    if args.ner:
+        with profile.phase("spaCy model"):
+            get_person_names()
+        # Batched before any worker starts, so forked workers inherit the filled cache
+        print(f"NER: {prime_person_names(name for _, name in contacts)} unique contact names processed.")
+
+    if args.workers > 1:
+        # Tables are built once here; workers only mmap the file
+        tables_dir = tempfile.mkdtemp(prefix="find_nationality_")
+        try:
+            if snapshot is not None:
+                # Workers map the tables part of the snapshot instead
+                tables_path, tables_offset = snapshot.path, snapshot.tables_offset
+            else:
+                with profile.phase("shared tables"):
+                    tables_path = build_shared_tables(os.path.join(tables_dir, "tables.bin"), args.mobile_codes)
+                tables_offset = 0
+            _report_startup(profile, contacts[0][1] if contacts else None)
+            if fuzzy_settings["enabled"]:
+                get_fuzzy_index()  # build before forking so workers inherit it
+            if screen_settings["enabled"]:
+                get_name_screen()
+            # A crashed or hung worker is restarted and the contact that caused it is dead-lettered
+            with isolation.IsolatedPool(
+                args.workers,
+                initializer=_init_worker,
+                initargs=(tables_path, patterns_cis, country_codes, country_code_to_name, args.watch_rules,
+                          ported_numbers, routing_table, tables_offset),
+                mp_context=_pool_context(),
+                fallbacks=WORKER_FALLBACKS,
+                time_budget_s=contact_guard.time_budget_s,
+                dead_letters=contact_guard.dead_letters,
+                stage="contact",
+            ) as pool:
+                def pool_map(fn, items):
+                    return pool.imap(fn, items, chunksize=256)
+                if args.dedup:
+                    results, stats = process_contacts_dedup(
+                        contacts, _lookup_phone_route_worker, classify_contact_name, pool_map)
+                    print(dedup_summary(stats))
+                else:
+                    results = pool_map(_process_contact_worker, contacts)
+                write_results(args, results, user_ids)
+            if pool.restarts:
+                print(f"Worker pool restarted {pool.restarts} times after {pool.crashes} crashed contacts.")
+            _finish_run()
+        finally:
+            shutil.rmtree(tables_dir, ignore_errors=True)
+        return
+
+    # Read mobile patterns from mobile_codes.csv
+    with profile.phase("mobile patterns"):
+        pattern_regions = load_mobile_patterns(args.mobile_codes)
+    # Loaded before the first contact, so the datasets never load inside a contact's time budget
+    with profile.phase("NamesParser"):
+        get_names_parser()
+    _report_startup(profile, contacts[0][1] if contacts else None)
+
+    if args.dedup:
+        phone_fn = functools.partial(lookup_phone_route, pattern_regions=pattern_regions, patterns_cis=patterns_cis,
+                                     country_codes=country_codes, country_code_to_name=country_code_to_name)
+        results, stats = process_contacts_dedup(contacts, phone_fn, classify_contact_name)
+        print(dedup_summary(stats))
+        write_results(args, results, user_ids)
+        _finish_run()
+        return
+
+    # Process each contact and save the region and nationality
+    results = (
+        process_contact(phone_number, contact_name, pattern_regions, patterns_cis, country_codes, country_code_to_name)
+        for phone_number, contact_name in contacts
+    )
+    write_results(args, results, user_ids)
+    _finish_run()
+
+
+# End of the module import: the first line of the --profile-startup report
+startup.module_imported(__name__)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Переопределения оператора для перенесённых номеров (MNP).
+
+mobile_codes.csv задаёт оператора по диапазону номеров, но номер,
+перенесённый к другому оператору, остаётся в старом диапазоне. Таблица
+переносов — локальный CSV «номер,оператор» (строка заголовка допускается),
+например выгрузка базы перенесённых номеров. Регион при переносе не
+меняется (перенос возможен только внутри региона), поэтому таблица хранит
+только оператора.
+
+Номера хранятся отсортированным массивом array('q') целых чисел (8 байт на
+номер) с параллельным массивом индексов операторов (4 байта); поиск —
+bisect за O(log n). Массивы компактны, копируются воркерам при fork без
+накладных расходов на объекты и дёшево сериализуются для spawn.
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+
+
+def number_key(phone_number):
+    """
+    Целочисленный ключ номера: только цифры, без «+» и «00» в начале;
+    российские 11-значные номера с «8» приводятся к «7». None для пустых.
+    """
+    digits = "".join(ch for ch in phone_number if ch.isascii() and ch.isdigit())
+    if phone_number.strip().startswith("00"):
+        digits = digits[2:]
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return int(digits) if digits else None
+
+
+class PortedNumbers:
+    """ Отсортированная таблица «номер -> оператор» с поиском через bisect. """
+
+    def __init__(self, overrides=()):
+        """ overrides — пары (номер, оператор); при повторах побеждает последняя. """
+        latest = {}
+        for phone_number, operator in overrides:
+            key = number_key(phone_number)
+            if key is not None:
+                latest[key] = operator
+        self.operators = sorted(set(latest.values()))
+        operator_index = {operator: i for i, operator in enumerate(self.operators)}
+        self._numbers = array("q", sorted(latest))
+        self._values = array("I", (operator_index[latest[key]] for key in self._numbers))
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = (row for row in csv.reader(f) if len(row) >= 2)
+            return cls((row[0], row[1].strip()) for row in rows if any(ch.isdigit() for ch in row[0]))
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def get(self, phone_number, default=None):
+        """ Оператор, к которому перенесён номер, либо default. """
+        key = number_key(phone_number)
+        if key is None:
+            return default
+        i = bisect_left(self._numbers, key)
+        if i < len(self._numbers) and self._numbers[i] == key:
+            return self.operators[self._values[i]]
+        return default
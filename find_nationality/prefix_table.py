@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Маршрутизация номеров по наибольшему совпадающему префиксу (longest-prefix match).
+
+Вместо трёх веток (короткое замыкание «77» для Казахстана, диапазоны
+mobile_codes.csv для России, код страны + первый подходящий код города из
+city_codes_cis.csv) все источники компилируются в одну таблицу
+«префикс -> маршрут», и один поиск возвращает самое точное совпадение:
+код города или оператора точнее кода страны.
+
+Источники:
+* phone_prefixes.csv и любые файлы того же формата (произвольные CSV):
+  Префикс,Длина,Страна,Регион,Оператор — префикс полного номера с кодом
+  страны; Длина — точная длина номера или пусто (любая);
+* mobile_codes.csv — шаблоны российских номеров (префикс «7» + код +
+  цифры, длина номера фиксирована шаблоном);
+* city_codes_cis.csv — код страны (как запасной маршрут страны) и код
+  страны + код города (номер должен быть длиннее префикса).
+
+При одинаковом префиксе и ограничении длины побеждает строка, добавленная
+раньше: источники перечисляются от более приоритетного к менее, внутри
+файла — первая строка (как при переборе регулярных выражений).
+
+Поиск: словарь префиксов и список встречающихся длин префиксов по
+убыванию — не больше одного обращения к словарю на длину.
+"""
+
+import csv
+from collections import namedtuple
+
+PREFIX_HEADER = ["Префикс", "Длина", "Страна", "Регион", "Оператор"]
+
+# region — подпись региона в формате вывода: «Страна, Регион» или просто «Страна»
+Route = namedtuple("Route", ["country", "region", "operator"])
+
+
+def region_label(country, region):
+    return f"{country}, {region}" if region else country
+
+
+class PrefixTable:
+    """ Таблица «префикс -> маршрут» с поиском наибольшего совпадения. """
+
+    def __init__(self):
+        self.routes = []
+        self._route_index = {}
+        self._entries = {}
+        self._lengths = []
+
+    def add(self, prefix, country, region="", operator="", length=None, min_length=None):
+        """
+        Добавляет префикс. length — точная длина номера (None — любая);
+        min_length — минимальная длина номера (по умолчанию длина префикса).
+        """
+        route = Route(country, region_label(country, region), operator)
+        index = self._route_index.setdefault(route, len(self.routes))
+        if index == len(self.routes):
+            self.routes.append(route)
+        constraint = (length, len(prefix) if min_length is None else min_length)
+        entries = self._entries.setdefault(prefix, [])
+        # Первая строка с тем же ограничением уже задаёт маршрут
+        if all(entry[:2] != constraint for entry in entries):
+            entries.append(constraint + (index,))
+        if len(prefix) not in self._lengths:
+            self._lengths = sorted(self._lengths + [len(prefix)], reverse=True)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, number):
+        """ Маршрут самого длинного подходящего префикса номера (без «+»/«00») либо None. """
+        length = len(number)
+        for plen in self._lengths:
+            if plen > length:
+                continue
+            for exact, minimum, index in self._entries.get(number[:plen], ()):
+                if (exact is None or exact == length) and length >= minimum:
+                    return self.routes[index]
+        return None
+
+
+###############################################################################
+# Источники
+###############################################################################
+def prefix_rows(csv_filename):
+    """ Строки файла формата PREFIX_HEADER: (префикс, длина, страна, регион, оператор). """
+    with open(csv_filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if len(row) != len(PREFIX_HEADER):
+                continue
+            prefix, length, country, region, operator = (x.strip() for x in row)
+            yield prefix, int(length) if length else None, country, region, operator
+
+
+def add_prefix_file(table, csv_filename):
+    for prefix, length, country, region, operator in prefix_rows(csv_filename):
+        table.add(prefix, country, region, operator, length=length)
+
+
+def add_mobile_codes(table, csv_filename, country_code="7", country="Россия"):
+    """ Шаблоны mobile_codes.csv: «код-цифрыxxx» -> префикс с точной длиной номера. """
+    with open(csv_filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if len(row) != 4:
+                continue
+            code, number_pattern, operator, region = (x.strip() for x in row)
+            if number_pattern.startswith(code + "-"):
+                number_pattern = number_pattern[len(code) + 1:]
+            full_pattern = code + number_pattern
+            # Цифры до первого 'x' или '.' — префикс, остальное — произвольные символы
+            fixed = len(full_pattern) - len(full_pattern.lstrip("0123456789"))
+            table.add(country_code + full_pattern[:fixed], country, region, operator,
+                      length=len(country_code) + len(full_pattern))
+
+
+def add_city_codes(table, csv_filename, fallback_region="Неизвестный город"):
+    """ city_codes_cis.csv: код страны -> запасной маршрут, код страны + код города -> город. """
+    with open(csv_filename, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        rows = [[x.strip() for x in row] for row in reader if len(row) == 4]
+    for country, country_code, _, _ in rows:
+        table.add(country_code, country, fallback_region)
+    for country, country_code, city_code, city in rows:
+        prefix = country_code + city_code
+        table.add(prefix, country, city, min_length=len(prefix) + 1)
+
+
+def compile_table(sources=(), mobile_codes=None, city_codes=None):
+    """ Таблица из файлов формата PREFIX_HEADER, затем mobile_codes.csv и city_codes_cis.csv. """
+    table = PrefixTable()
+    for source in sources:
+        add_prefix_file(table, source)
+    if mobile_codes:
+        add_mobile_codes(table, mobile_codes)
+    if city_codes:
+        add_city_codes(table, city_codes)
+    return table
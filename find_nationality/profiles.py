@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Режим агрегации: профили пользователей за один проход.
+
+Вместо построчного результата копятся счётчики по каждому user_id:
+сколько контактов с каждой национальностью, каждым Geo_byPhone, каждым
+регионом и т.д. (набор измерений задаёт вызывающий скрипт). На выходе —
+длинная таблица профилей (user_id, измерение, значение, число),
+отсортированная по user_id.
+
+Если пользователей больше max_users, накопленные счётчики сбрасываются
+на диск отсортированным прогоном, а в конце прогоны сливаются через
+heapq.merge с суммированием одинаковых ключей — память ограничена
+max_users пользователями.
+"""
+
+import csv
+import heapq
+import itertools
+import os
+
+DEFAULT_MAX_USERS = 500000
+PROFILE_HEADER = ["ID_Telegram", "Dimension", "Value", "Count"]
+
+
+class ProfileAggregator:
+    """
+    dimensions — названия измерений; add() получает значения в том же
+    порядке. Пустые значения не считаются.
+    """
+
+    def __init__(self, dimensions, directory, max_users=DEFAULT_MAX_USERS):
+        self.dimensions = list(dimensions)
+        self.directory = directory
+        self.max_users = max(1, max_users)
+        self.rows = 0
+        self._users = {}        # user_id -> {(номер измерения, значение): число}
+        self._run_paths = []
+
+    def add(self, user_id, values):
+        counters = self._users.get(user_id)
+        if counters is None:
+            if len(self._users) >= self.max_users:
+                self._spill()
+            counters = self._users[user_id] = {}
+        for dim_index, value in enumerate(values):
+            if value:
+                key = (dim_index, value)
+                counters[key] = counters.get(key, 0) + 1
+        self.rows += 1
+
+    def _sorted_entries(self):
+        for user_id in sorted(self._users):
+            counters = self._users[user_id]
+            for dim_index, value in sorted(counters):
+                yield user_id, dim_index, value, counters[dim_index, value]
+
+    def _spill(self):
+        path = os.path.join(self.directory, f"profiles_{len(self._run_paths):04d}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(self._sorted_entries())
+        self._run_paths.append(path)
+        self._users = {}
+
+    @property
+    def spilled_runs(self):
+        return len(self._run_paths)
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for user_id, dim_index, value, count in csv.reader(f):
+                yield user_id, int(dim_index), value, int(count)
+
+    def profile_rows(self):
+        """ Итератор строк PROFILE_HEADER по возрастанию user_id, затем измерения и значения. """
+        streams = [self._read_run(path) for path in self._run_paths]
+        streams.append(self._sorted_entries())
+        merged = heapq.merge(*streams, key=lambda entry: entry[:3])
+        for (user_id, dim_index, value), group in itertools.groupby(merged, key=lambda entry: entry[:3]):
+            yield [user_id, self.dimensions[dim_index], value, sum(entry[3] for entry in group)]
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ход длинного прогона: строки в секунду, прочитанные байты, оставшееся
+время, доля попаданий в кэши и загрузка воркеров.
+
+Основной цикл только увеличивает счётчик строк (Progress.count); всё
+остальное раз в interval секунд собирает отдельный поток: позицию во
+входном файле (reading), счётчики кэшей (register_cache) и
+статистику воркеров (IsolatedPool, см. isolation.py). Снимок печатается
+строкой в stderr и/или дописывается объектом JSON в файл (JSON Lines) —
+по нему планировщик следит за скоростью и замечает остановку
+(stalled_s — сколько секунд не было новых строк).
+
+Оставшееся время считается по строкам, если их общее число известно
+(контакты прочитаны целиком), иначе по доле прочитанных байтов файла.
+
+Строка в stderr печатается на языке режима: подписи (LineLabels) режим
+передаёт в from_args, по умолчанию — русские (fio).
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_INTERVAL = 5.0
+
+# Подписи строки хода в stderr; снимок JSON от них не зависит
+LineLabels = namedtuple("LineLabels", ["prefix", "rows", "of", "per_s", "average", "read", "megabytes",
+                                       "eta", "cache", "workers"])
+DEFAULT_LABELS = LineLabels("[ход]", "строк", "из", "/с", "в среднем", "прочитано", "МБ",
+                            "осталось", "кэш", "воркеры")
+
+# Источники счётчиков кэшей: имя -> функция () -> (попадания, промахи)
+_cache_sources = {}
+
+
+def register_cache(name, counts):
+    _cache_sources[name] = counts
+
+
+def cache_counts():
+    """ Текущие (попадания, промахи) всех зарегистрированных кэшей этого процесса. """
+    return {name: tuple(counts()) for name, counts in _cache_sources.items()}
+
+
+# Пулы воркеров прогона (isolation.IsolatedPool): их статистику видят отчёт о ходе и метрики
+_pools = []
+
+
+def watch_pool(pool):
+    _pools.append(pool)
+
+
+def cache_totals():
+    """ (попадания, промахи) по кэшам: сумма по воркерам, если они есть, иначе этого процесса. """
+    if not _pools:
+        return cache_counts()
+    totals = {}
+    for pool in _pools:
+        for counts in list(pool.worker_caches.values()):
+            for name, (hits, misses) in counts.items():
+                total = totals.setdefault(name, [0, 0])
+                total[0] += hits
+                total[1] += misses
+    return totals
+
+
+def worker_stats():
+    """ {pid: (доля занятости, число элементов)} по воркерам всех пулов. """
+    return {pid: (utilisation, pool.worker_items[pid])
+            for pool in _pools for pid, utilisation in pool.utilisation().items()}
+
+
+def counted(rows, tracker=None):
+    """ Строки, учтённые в tracker (без учёта, если tracker — None). """
+    return rows if tracker is None else tracker.count(rows)
+
+
+@contextlib.contextmanager
+def reading(f, tracker=None):
+    """ Учитывает позицию файла f в прочитанных байтах tracker (None — без учёта). """
+    if tracker is None:
+        yield f
+        return
+    tracker._files.append(f)
+    try:
+        yield f
+    finally:
+        tracker._files.remove(f)
+        tracker._closed_bytes += _position(f)
+
+
+def _position(f):
+    try:
+        return (f.buffer if hasattr(f, "buffer") else f).tell()
+    except (ValueError, OSError):
+        return 0
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """ Счётчики прогона и поток, который раз в interval секунд сообщает снимок. """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, stream=None, json_path=None, labels=DEFAULT_LABELS):
+        self.interval = interval
+        self.stream = stream
+        self.json_path = json_path
+        self.labels = labels
+        self.rows = 0
+        self.total_rows = None
+        self.total_bytes = None
+        self._files = []
+        self._closed_bytes = 0
+        self._started = time.monotonic()
+        self._last_tick = (self._started, 0)
+        self._last_change = self._started
+        self._stop = threading.Event()
+        self._thread = None
+
+    def count(self, rows):
+        """ Пропускает строки через себя, считая их. """
+        for row in rows:
+            self.rows += 1
+            yield row
+
+    def bytes_read(self):
+        return self._closed_bytes + sum(_position(f) for f in list(self._files))
+
+    @staticmethod
+    def _cache_hit_rates():
+        return {name: round(hits / (hits + misses), 4)
+                for name, (hits, misses) in cache_totals().items() if hits + misses}
+
+    def snapshot(self):
+        now = time.monotonic()
+        rows = self.rows
+        last_time, last_rows = self._last_tick
+        if rows != last_rows:
+            self._last_change = now
+        self._last_tick = (now, rows)
+        elapsed = now - self._started
+        rate = (rows - last_rows) / (now - last_time) if now > last_time else 0.0
+        average = rows / elapsed if elapsed > 0 else 0.0
+        bytes_read = self.bytes_read()
+
+        eta = None
+        if self.total_rows:
+            if average > 0:
+                eta = max(0.0, (self.total_rows - rows) / average)
+        elif self.total_bytes and bytes_read:
+            eta = max(0.0, elapsed * (self.total_bytes - bytes_read) / bytes_read)
+
+        workers = {str(pid): {"utilisation": round(utilisation, 4), "items": items}
+                   for pid, (utilisation, items) in worker_stats().items()}
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_s": round(elapsed, 3),
+            "rows": rows,
+            "total_rows": self.total_rows,
+            "rows_per_s": round(rate, 1),
+            "avg_rows_per_s": round(average, 1),
+            "bytes_read": bytes_read,
+            "total_bytes": self.total_bytes,
+            "eta_s": None if eta is None else round(eta, 1),
+            "stalled_s": round(now - self._last_change, 1),
+            "cache_hit_rate": self._cache_hit_rates(),
+            "workers": workers,
+        }
+
+    def report(self, snapshot):
+        if self.stream is not None:
+            print(self.format_line(snapshot), file=self.stream, flush=True)
+        if self.json_path:
+            with open(self.json_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+
+    def format_line(self, snapshot):
+        labels = self.labels
+        parts = [f"{labels.rows}: {snapshot['rows']:,}"
+                 + (f" {labels.of} {snapshot['total_rows']:,}" if snapshot["total_rows"] else ""),
+                 f"{snapshot['rows_per_s']:,.0f}{labels.per_s} "
+                 f"({labels.average} {snapshot['avg_rows_per_s']:,.0f}{labels.per_s})",
+                 f"{labels.read} {snapshot['bytes_read'] / 2 ** 20:.1f} {labels.megabytes}"
+                 + (f" {labels.of} {snapshot['total_bytes'] / 2 ** 20:.1f} {labels.megabytes}"
+                    if snapshot["total_bytes"] else "")]
+        if snapshot["eta_s"] is not None:
+            parts.append(f"{labels.eta} ~{_format_duration(snapshot['eta_s'])}")
+        if snapshot["cache_hit_rate"]:
+            parts.append(f"{labels.cache} "
+                         + ", ".join(f"{name} {rate:.0%}" for name, rate in snapshot["cache_hit_rate"].items()))
+        if snapshot["workers"]:
+            parts.append(f"{labels.workers} "
+                         + " ".join(f"{worker['utilisation']:.0%}" for worker in snapshot["workers"].values()))
+        return f"{labels.prefix} " + "; ".join(parts)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report(self.snapshot())
+
+    def start(self):
+        if self.json_path:
+            open(self.json_path, "w").close()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Останавливает поток и сообщает итоговый снимок. """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.report(self.snapshot())
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def from_args(args, total_bytes_path=None, labels=DEFAULT_LABELS):
+    """ Progress по флагам --progress / --progress-file / --progress-interval, либо None. """
+    if not args.progress and not args.progress_file:
+        return None
+    tracker = Progress(args.progress_interval, sys.stderr if args.progress else None, args.progress_file, labels)
+    if total_bytes_path and os.path.exists(total_bytes_path):
+        tracker.total_bytes = os.path.getsize(total_bytes_path)
+    return tracker
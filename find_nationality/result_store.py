@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Хранилище результатов в SQLite.
+
+Оба классификатора могут (флаг --store) дописывать строки результата в
+одну базу. Таблица results проиндексирована по user_id (первая колонка
+первичного ключа), телефону и национальности. Запись идёт пачками в
+больших транзакциях. Повторный запуск обновляет строки по ключу
+(user_id, phone) — upsert, поэтому базу можно наполнять инкрементально.
+Пустые (NULL) значения новой строки не затирают уже сохранённые: строка
+main_nationality_number.py не сотрёт адрес и ФИО, записанные main.py.
+
+Запросы из командной строки:
+    python -m find_nationality.result_store results.sqlite --user-id 131
+    python -m find_nationality.result_store results.sqlite --nationality Русский --limit 20
+    python -m find_nationality.result_store results.sqlite --user-id 131 --counts
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+
+STORE_COLUMNS = ("user_id", "phone", "contact_name", "region", "nationality",
+                 "address", "fio_nationality", "fio")
+KEY_COLUMNS = ("user_id", "phone")
+COMMIT_ROWS = 50000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    user_id TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    contact_name TEXT,
+    region TEXT,
+    nationality TEXT,
+    address TEXT,
+    fio_nationality TEXT,
+    fio TEXT,
+    PRIMARY KEY (user_id, phone)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_phone ON results (phone);
+CREATE INDEX IF NOT EXISTS results_nationality ON results (nationality);
+"""
+
+
+def phone_key(phone):
+    """ Телефон для ключа: отсутствующий (None, "None", "") хранится как "". """
+    if not phone or phone.strip().lower() == "none":
+        return ""
+    return phone
+
+
+class ResultStore:
+    def __init__(self, path, commit_rows=COMMIT_ROWS):
+        # Пачки может писать поток BackgroundWriter, но всегда только один поток за раз
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.commit_rows = commit_rows
+        self._pending = 0
+        updates = ", ".join(f"{name} = COALESCE(excluded.{name}, {name})"
+                            for name in STORE_COLUMNS if name not in KEY_COLUMNS)
+        self._upsert = (
+            f"INSERT INTO results ({', '.join(STORE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in STORE_COLUMNS)}) "
+            f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET {updates}"
+        )
+
+    def upsert(self, records):
+        """
+        records — кортежи в порядке STORE_COLUMNS (None — нет значения).
+        Транзакция фиксируется раз в commit_rows строк и при закрытии.
+        """
+        records = list(records)
+        self._conn.executemany(self._upsert, records)
+        self._pending += len(records)
+        if self._pending >= self.commit_rows:
+            self.commit()
+
+    def commit(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    def query(self, user_id=None, phone=None, nationality=None, limit=None):
+        """ Строки results (кортежи по STORE_COLUMNS), отфильтрованные по заданным полям. """
+        where, params = self._filters(user_id, phone, nationality)
+        sql = f"SELECT {', '.join(STORE_COLUMNS)} FROM results{where} ORDER BY user_id, phone"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._conn.execute(sql, params).fetchall()
+
+    def counts(self, user_id=None, phone=None, nationality=None):
+        """ [(национальность, число строк)] по убыванию числа. """
+        where, params = self._filters(user_id, phone, nationality)
+        sql = (f"SELECT nationality, COUNT(*) FROM results{where} "
+               "GROUP BY nationality ORDER BY COUNT(*) DESC, nationality")
+        return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _filters(user_id, phone, nationality):
+        conditions, params = [], []
+        for column, value in (("user_id", user_id), ("phone", phone), ("nationality", nationality)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+class StoreSink:
+    """
+    Приёмник для output_sinks: выходные строки превращаются в записи
+    хранилища функцией to_records (пачка строк -> пачка кортежей).
+    """
+
+    def __init__(self, store, to_records):
+        self.store = store
+        self.to_records = to_records
+
+    def write_rows(self, rows):
+        self.store.upsert(self.to_records(rows))
+
+    def close(self):
+        self.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запросы к хранилищу результатов (SQLite).")
+    parser.add_argument("store", help="Путь к базе, созданной флагом --store.")
+    parser.add_argument("--user-id", help="Только строки этого user_id.")
+    parser.add_argument("--phone", help="Только строки с этим телефоном.")
+    parser.add_argument("--nationality", help="Только строки с этой национальностью.")
+    parser.add_argument("--counts", action="store_true",
+                        help="Вместо строк вывести число строк по национальностям.")
+    parser.add_argument("--limit", type=int, default=0,
+                        help="Не больше N строк (по умолчанию: все).")
+    args = parser.parse_args()
+
+    store = ResultStore(args.store)
+    try:
+        writer = csv.writer(sys.stdout)
+        if args.counts:
+            writer.writerow(["nationality", "count"])
+            writer.writerows(store.counts(args.user_id, args.phone, args.nationality))
+        else:
+            writer.writerow(STORE_COLUMNS)
+            writer.writerows(store.query(args.user_id, args.phone, args.nationality, args.limit or None))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
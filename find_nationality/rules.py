@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Горячая перезагрузка словарей правил без перезапуска процесса.
+
+Словари ключевых слов хранятся в версионированных JSON-файлах
+(json_data/*.json, обязательное поле "version"). RuleWatcher держит
+скомпилированный набор правил в атрибуте `current` и в фоновом потоке
+следит за файлом (mtime + размер). При изменении новый набор читается и
+компилируется в том же фоновом потоке, а затем подменяется одной
+операцией присваивания ссылки — классификация в основном потоке не
+блокируется и всегда видит либо старый, либо новый набор целиком.
+Если новый файл не читается или не компилируется, остаётся старый набор.
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_INTERVAL = 2.0
+
+
+def load_rules_file(path):
+    """ Читает файл правил; без целочисленного поля "version" — ValueError. """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("version"), int):
+        raise ValueError(f"{path}: нет целочисленного поля \"version\"")
+    return data
+
+
+class RuleWatcher:
+    """
+    compile_rules — функция (словарь из файла) -> скомпилированный набор
+    правил; вызывается один раз при создании и затем при каждом изменении.
+    current и version — уже скомпилированный набор текущего файла
+    (например, из снимка состояния, см. startup.py); тогда файл при
+    создании не читается.
+    """
+
+    def __init__(self, path, compile_rules, interval=DEFAULT_INTERVAL, log=None, current=None, version=None):
+        self.path = path
+        self.compile_rules = compile_rules
+        self.interval = interval
+        self.log = log or print
+        self.generation = 0
+        self._signature = self._stat()
+        if current is None:
+            data = load_rules_file(path)
+            version, current = data["version"], compile_rules(data)
+        self.version = version
+        self.current = current
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def check(self):
+        """ Перечитывает файл, если он изменился. True — если набор заменён. """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            data = load_rules_file(self.path)
+            compiled = self.compile_rules(data)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.log(f"Правила {self.path} не перезагружены, остаётся версия {self.version}: {e}")
+            return False
+        # Присваивание ссылки атомарно: читатели видят старый или новый набор целиком
+        self.current = compiled
+        self.version = data["version"]
+        self.generation += 1
+        self.log(f"Правила {self.path} перезагружены, версия {self.version}")
+        return True
+
+    def start(self):
+        """ Запускает фоновый поток (в том числе заново в дочернем процессе после fork). """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rule-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Выборочные отчёты по распределению национальностей и регионов.
+
+Вместо полного прохода классифицируется случайная выборка контактов:
+
+* reservoir  — равномерная выборка размера k за один потоковый проход
+  по файлу (алгоритм R); классифицируется только выборка;
+* stratified — резервуар на каждый слой (например, код страны телефона),
+  затем пропорциональное размещение: n_h ~ k * N_h / N;
+* seek       — k случайных смещений в файле без полного чтения; строка
+  берётся следующая за смещением (вероятность строки пропорциональна
+  длине предыдущей — небольшое смещение оценки ради скорости на огромных
+  файлах).
+
+Доли оцениваются потоково с доверительными интервалами (Уилсона для
+простой выборки, нормальное приближение со стратифицированной дисперсией
+для слоёв). Классификацию можно остановить досрочно, как только
+полуширина всех интервалов не превышает заданной.
+"""
+
+import math
+import os
+
+Z_95 = 1.959964
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """ Доверительный интервал Уилсона для доли successes / n. """
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+class DistributionEstimate:
+    """
+    Потоковая оценка распределения значений. strata_weights — {слой: доля
+    слоя в генеральной совокупности} для стратифицированной выборки или
+    None для простой случайной выборки.
+    """
+
+    def __init__(self, strata_weights=None, z=Z_95):
+        self.strata_weights = strata_weights
+        self.z = z
+        self.n = 0
+        self.counts = {}
+        self._strata = {}       # слой -> [n_h, {значение: число}]
+
+    def add(self, value, stratum=None):
+        self.n += 1
+        self.counts[value] = self.counts.get(value, 0) + 1
+        if self.strata_weights is not None:
+            entry = self._strata.setdefault(stratum, [0, {}])
+            entry[0] += 1
+            entry[1][value] = entry[1].get(value, 0) + 1
+
+    def estimate(self, value):
+        """ (доля, нижняя граница, верхняя граница) для значения. """
+        if self.strata_weights is None:
+            count = self.counts.get(value, 0)
+            low, high = wilson_interval(count, self.n, self.z)
+            return (count / self.n if self.n else 0.0), low, high
+        # Слои без наблюдений пока не учитываются: веса остальных перенормируются
+        total_weight = sum(self.strata_weights.get(s, 0.0) for s in self._strata)
+        if not total_weight:
+            return 0.0, 0.0, 1.0
+        share = variance = 0.0
+        for stratum, (n_h, counts) in self._strata.items():
+            weight = self.strata_weights.get(stratum, 0.0) / total_weight
+            p_h = counts.get(value, 0) / n_h
+            share += weight * p_h
+            variance += weight * weight * p_h * (1 - p_h) / n_h
+        half = self.z * math.sqrt(variance)
+        return share, max(0.0, share - half), min(1.0, share + half)
+
+    def rows(self):
+        """ [(значение, число в выборке, доля, нижняя, верхняя)] по убыванию доли. """
+        rows = [(value, count) + self.estimate(value) for value, count in self.counts.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def max_half_width(self):
+        widest = 0.0
+        for value in self.counts:
+            _, low, high = self.estimate(value)
+            widest = max(widest, (high - low) / 2)
+        return widest
+
+
+def reservoir_sample(items, k, rng):
+    """ Равномерная выборка k элементов за один проход; возвращает (выборка, всего элементов). """
+    reservoir = []
+    total = 0
+    for item in items:
+        total += 1
+        if len(reservoir) < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(total)
+            if j < k:
+                reservoir[j] = item
+    rng.shuffle(reservoir)
+    return reservoir, total
+
+
+def stratified_sample(items, key, k, rng):
+    """
+    Резервуар на каждый слой key(элемент), затем пропорциональное
+    размещение k мест (не меньше одного на слой).
+    Возвращает (выборка пары (слой, элемент), {слой: доля слоя}, всего).
+    """
+    reservoirs = {}
+    sizes = {}
+    for item in items:
+        stratum = key(item)
+        size = sizes[stratum] = sizes.get(stratum, 0) + 1
+        reservoir = reservoirs.setdefault(stratum, [])
+        if len(reservoir) < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(size)
+            if j < k:
+                reservoir[j] = item
+    total = sum(sizes.values())
+    sample = []
+    for stratum, reservoir in reservoirs.items():
+        rng.shuffle(reservoir)
+        allocation = max(1, round(k * sizes[stratum] / total))
+        sample.extend((stratum, item) for item in reservoir[:allocation])
+    rng.shuffle(sample)
+    weights = {stratum: size / total for stratum, size in sizes.items()}
+    return sample, weights, total
+
+
+def seek_sample(path, k, rng, parse_line, max_attempts_factor=3):
+    """
+    k строк по случайным смещениям в файле без полного чтения.
+    parse_line(строка) -> элемент или None (строка пропускается).
+    Возвращает (выборка, оценка числа строк по средней длине строки).
+    """
+    size = os.path.getsize(path)
+    sample = []
+    read_bytes = 0
+    if size == 0:
+        return sample, 0
+    with open(path, "rb") as f:
+        for _ in range(k * max_attempts_factor):
+            if len(sample) >= k:
+                break
+            f.seek(rng.randrange(size))
+            f.readline()  # дочитываем строку, в которую попало смещение
+            line = f.readline()
+            if not line:
+                f.seek(0)  # после последней строки продолжаем с начала файла
+                line = f.readline()
+            read_bytes += len(line)
+            item = parse_line(line.decode("utf-8", errors="replace"))
+            if item is not None:
+                sample.append(item)
+    average = read_bytes / max(1, len(sample))
+    return sample, round(size / average) if average else 0
+
+
+def classify_until_tight(sample, classify, estimates, target_half_width=None,
+                         min_samples=100, check_every=50):
+    """
+    Классифицирует выборку по порядку. classify(элемент) -> (слой,
+    значения по измерениям); значения добавляются в estimates (список
+    DistributionEstimate в том же порядке). Если задан target_half_width,
+    останавливается, когда после min_samples полуширина всех интервалов
+    не больше цели. Возвращает число классифицированных элементов.
+    """
+    done = 0
+    for item in sample:
+        stratum, values = classify(item)
+        for estimate, value in zip(estimates, values):
+            estimate.add(value, stratum)
+        done += 1
+        if (target_half_width and done >= min_samples and done % check_every == 0
+                and max(estimate.max_half_width() for estimate in estimates) <= target_half_width):
+            break
+    return done
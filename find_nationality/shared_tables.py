@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Общие таблицы поиска для воркеров пула процессов.
+
+Родительский процесс один раз собирает индексы (имена, суффиксы, диапазоны
+телефонных номеров) и записывает их в один файл. Воркеры открывают этот файл
+через mmap только на чтение: страницы разделяются через page cache ОС, их не
+трогает подсчёт ссылок Python, поэтому RSS не растёт с числом воркеров, а
+инициализация воркера сводится к одному open() + mmap().
+
+Формат файла:
+    MAGIC (8 байт) | длина заголовка (u64) | JSON-заголовок | секции
+
+Каждая секция выровнена по 8 байтам и хранит массивы в нативном порядке байт
+(файл предназначен для процессов одной машины).
+"""
+
+import csv
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_right
+
+MAGIC = b"FNTABLE1"
+_ALIGN = 8
+
+
+###############################################################################
+# Таблица строковых ключей: ключ -> битовая маска меток
+###############################################################################
+class KeyTable:
+    """ Отсортированные (по UTF-8) ключи с двоичным поиском поверх mmap. """
+
+    def __init__(self, buf, meta):
+        self._count = meta["count"]
+        self._offsets = buf[meta["offsets"]:meta["offsets"] + 4 * (self._count + 1)].cast("I")
+        self._blob = buf[meta["blob"]:meta["blob"] + meta["blob_size"]]
+        self._masks = buf[meta["masks"]:meta["masks"] + 8 * self._count].cast("Q")
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def _key_at(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def _find(self, key):
+        raw = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._key_at(lo) == raw:
+            return lo
+        return -1
+
+    def get(self, key, default=0):
+        """ Маска меток для ключа (0, если ключа нет). """
+        idx = self._find(key)
+        return self._masks[idx] if idx >= 0 else default
+
+
+def _pack_key_table(mapping):
+    keys = sorted((key.encode("utf-8"), mask) for key, mask in mapping.items())
+    offsets = array("I", [0])
+    blob = bytearray()
+    masks = array("Q")
+    for raw, mask in keys:
+        blob += raw
+        offsets.append(len(blob))
+        masks.append(mask)
+    return {"count": len(keys)}, [
+        ("offsets", offsets.tobytes()),
+        ("blob", bytes(blob)),
+        ("masks", masks.tobytes()),
+    ]
+
+
+###############################################################################
+# Таблица непересекающихся диапазонов: число -> значение
+###############################################################################
+class RangeTable:
+    """ Отсортированные диапазоны [start, end] с поиском через bisect. """
+
+    def __init__(self, buf, meta):
+        count = meta["count"]
+        self._starts = buf[meta["starts"]:meta["starts"] + 8 * count].cast("q")
+        self._ends = buf[meta["ends"]:meta["ends"] + 8 * count].cast("q")
+        self._values = buf[meta["values"]:meta["values"] + 4 * count].cast("I")
+
+    def __len__(self):
+        return len(self._starts)
+
+    def get(self, number, default=None):
+        i = bisect_right(self._starts, number) - 1
+        if i >= 0 and number <= self._ends[i]:
+            return self._values[i]
+        return default
+
+
+def _pack_range_table(ranges):
+    """
+    ranges: список (start, end, value). При пересечениях побеждает диапазон с
+    меньшим value — так сохраняется семантика «первое совпадение в файле»,
+    если value — номер строки исходного CSV.
+    """
+    starts, ends, values = array("q"), array("q"), array("I")
+    for start, end, value in _disjoint_ranges(ranges):
+        if values and values[-1] == value and ends[-1] + 1 == start:
+            ends[-1] = end
+            continue
+        starts.append(start)
+        ends.append(end)
+        values.append(value)
+    return {"count": len(starts)}, [
+        ("starts", starts.tobytes()),
+        ("ends", ends.tobytes()),
+        ("values", values.tobytes()),
+    ]
+
+
+def _disjoint_ranges(ranges):
+    """ Разбивает пересекающиеся диапазоны на непересекающиеся отрезки. """
+    events = sorted(ranges)
+    active = []  # куча (value, end)
+    i = 0
+    point = None
+    while i < len(events) or active:
+        if not active:
+            point = events[i][0]
+        while i < len(events) and events[i][0] <= point:
+            start, end, value = events[i]
+            heapq.heappush(active, (value, end))
+            i += 1
+        while active and active[0][1] < point:
+            heapq.heappop(active)
+        if not active:
+            continue
+        value, end = active[0]
+        next_start = events[i][0] if i < len(events) else end + 1
+        seg_end = min(end, next_start - 1)
+        yield point, seg_end, value
+        point = seg_end + 1
+        while active and active[0][1] < point:
+            heapq.heappop(active)
+
+
+###############################################################################
+# Запись и открытие файла таблиц
+###############################################################################
+def write_tables(path, key_tables=None, range_tables=None, labels=None):
+    """
+    Записывает таблицы в файл `path` (атомарно, через временный файл).
+
+    key_tables:   {имя: {ключ: маска}}
+    range_tables: {имя: [(start, end, value), ...]}
+    labels:       {имя: [строка, ...]} — произвольные JSON-совместимые данные
+    """
+    sections = {}
+    payloads = []
+    for name, mapping in (key_tables or {}).items():
+        meta, parts = _pack_key_table(mapping)
+        sections[name] = dict(meta, kind="keys")
+        payloads.append((name, parts))
+    for name, ranges in (range_tables or {}).items():
+        meta, parts = _pack_range_table(ranges)
+        sections[name] = dict(meta, kind="ranges")
+        payloads.append((name, parts))
+
+    # Смещения в заголовке считаются от начала области данных
+    data = bytearray()
+    for name, parts in payloads:
+        for part_name, raw in parts:
+            data += b"\0" * (-len(data) % _ALIGN)
+            sections[name][part_name] = len(data)
+            if part_name == "blob":
+                sections[name]["blob_size"] = len(raw)
+            data += raw
+
+    header = {"labels": labels or {}, "sections": sections}
+    raw_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    raw_header += b" " * (-(len(MAGIC) + 8 + len(raw_header)) % _ALIGN)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(raw_header)))
+        f.write(raw_header)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class SharedTables:
+    """
+    Открытый только на чтение файл таблиц (см. write_tables). offset —
+    начало таблиц внутри большего файла (снимок состояния, см. startup.py);
+    должен быть кратен 8, чтобы массивы оставались выровненными.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[offset:offset + len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: не файл таблиц find_nationality")
+        (header_len,) = struct.unpack_from("<Q", self._mm, offset + len(MAGIC))
+        start = offset + len(MAGIC) + 8
+        header = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        self.labels = header["labels"]
+        buf = memoryview(self._mm)[start + header_len:]
+        self._tables = {}
+        for name, meta in header["sections"].items():
+            cls = KeyTable if meta["kind"] == "keys" else RangeTable
+            self._tables[name] = cls(buf, meta)
+
+    def __getitem__(self, name):
+        return self._tables[name]
+
+    def __contains__(self, name):
+        return name in self._tables
+
+
+###############################################################################
+# Вспомогательные функции для построения индексов
+###############################################################################
+def build_mask_index(groups, key=None):
+    """
+    groups: упорядоченный словарь {метка: список строк}.
+    Возвращает (метки, {ключ: маска}), где бит i маски означает, что строка
+    встречается в i-й группе. Младший бит = первая по порядку группа, что
+    сохраняет семантику каскада «первая подходящая национальность».
+    """
+    labels = list(groups)
+    if len(labels) > 64:
+        raise ValueError("Не более 64 групп в одной таблице")
+    index = {}
+    for bit, label in enumerate(labels):
+        for item in groups[label]:
+            k = key(item) if key else item
+            index[k] = index.get(k, 0) | (1 << bit)
+    return labels, index
+
+
+def lowest_label(mask, labels):
+    """ Метка младшего установленного бита маски (или None для 0). """
+    if not mask:
+        return None
+    return labels[(mask & -mask).bit_length() - 1]
+
+
+def suffix_lengths(index):
+    """ Отсортированные по убыванию длины ключей индекса суффиксов. """
+    return sorted({len(k) for k in index}, reverse=True)
+
+
+_DIGIT_RANGE_RE = re.compile(r"^(\d+)(x*)$")
+_WILDCARD_RE = re.compile(r"^(\d+)(\.+)$")
+
+
+def compile_mobile_ranges(csv_filename):
+    """
+    Переводит шаблоны mobile_codes.csv (см. read_patterns_from_csv) в
+    диапазоны номеров вместо 55 тыс. регулярных выражений.
+
+    Возвращает (ranges, wildcards, regions, operators):
+      ranges    — [(start, end, номер_строки)] для 10-значных шаблонов вида 900000xxxx;
+      wildcards — {"префикс|длина": номер_строки} для шаблонов вида 901...;
+      regions   — [регион] по номеру строки (в порядке файла);
+      operators — [оператор] по номеру строки.
+    Номер строки играет роль приоритета: меньший номер = раньше в файле.
+    """
+    ranges = []
+    wildcards = {}
+    regions = []
+    operators = []
+    with open(csv_filename, "r", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        for row in reader:
+            if len(row) != 4:
+                continue
+            code, number_pattern, operator, region = (x.strip() for x in row)
+            if number_pattern.startswith(code + "-"):
+                number_pattern = number_pattern[len(code) + 1:]
+            full_pattern = code + number_pattern
+            idx = len(regions)
+            regions.append(region)
+            operators.append(operator)
+
+            m = _DIGIT_RANGE_RE.match(full_pattern)
+            if m and len(full_pattern) == 10:
+                width = len(m.group(2))
+                base = int(m.group(1)) * 10 ** width
+                ranges.append((base, base + 10 ** width - 1, idx))
+                continue
+            m = _WILDCARD_RE.match(full_pattern)
+            if m:
+                wildcards.setdefault(f"{m.group(1)}|{len(full_pattern)}", idx)
+                continue
+            raise ValueError(f"Неподдерживаемый шаблон номера: {full_pattern!r}")
+    return ranges, wildcards, regions, operators
+
+
+def wildcard_prefix_lengths(wildcards):
+    """ Длины префиксов, встречающиеся в шаблонах вида 901... """
+    return sorted({len(key.split("|", 1)[0]) for key in wildcards})
+
+
+def lookup_mobile_row(mobile_number, range_table, wildcards, prefix_lengths):
+    """
+    Номер строки mobile_codes.csv, шаблон которой первым совпадает с номером
+    (та же семантика, что у перебора регулярных выражений), либо None.
+
+    range_table — RangeTable, wildcards — словарь или KeyTable с ключами
+    "префикс|длина". Учитываются только ASCII-цифры (\\d в исходных шаблонах
+    пропускал бы и, например, арабские цифры, но в номерах они не встречаются).
+    """
+    best = None
+    if len(mobile_number) == 10 and mobile_number.isascii() and mobile_number.isdigit():
+        best = range_table.get(int(mobile_number))
+    if prefix_lengths and "\n" not in mobile_number:
+        length = len(mobile_number)
+        for plen in prefix_lengths:
+            if plen >= length:
+                continue
+            idx = wildcards.get(f"{mobile_number[:plen]}|{length}", None)
+            if idx is not None and (best is None or idx < best):
+                best = idx
+    return best
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Стоимость запуска: профиль импорта и инициализации и снимок состояния.
+
+Короткий прогон (сотня контактов, проверка в контейнере) тратит большую
+часть времени не на классификацию, а на импорт модулей и построение
+словарей: правила контактов, нечёткий индекс, фильтр Блума, шаблоны
+номеров (55 тыс. регулярных выражений mobile_codes.csv), таблица
+маршрутизации по префиксам.
+
+Профиль (--profile-startup): пакет запоминает начало своего импорта
+(IMPORT_STARTED в __init__), модуль режима — конец своего, а main()
+отмечает этапы инициализации (StartupProfile.phase). Отчёт — таблица
+«этап, секунды, доля» в stderr перед обработкой контактов. Подробности импорта по
+модулям показывает сам интерпретатор: python -X importtime.
+
+Снимок (--snapshot): всё построенное состояние, кроме моделей (spaCy,
+NamesParser), в одном файле, который загружается за один шаг:
+
+    MAGIC (8 байт) | длина заголовка (u64) | JSON-заголовок | pickle | таблицы
+
+Заголовок хранит отпечаток источников (размер и mtime файлов данных и
+исходников пакета, версия Python) — при любом изменении снимок
+перестраивается и перезаписывается, как фильтр Блума (bloom.load_or_build).
+Словари и индексы лежат в pickle; таблицы — файл shared_tables целиком,
+выровненный по 8 байтам: диапазоны номеров вместо регулярных выражений
+не десериализуются, а открываются через mmap, и воркеры пула (-w N)
+разделяют их страницы так же, как временный файл таблиц.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import platform
+import struct
+import sys
+import time
+
+from . import IMPORT_STARTED
+from . import shared_tables
+
+_imported = {}
+
+
+def module_imported(name):
+    """ Отмечает конец импорта модуля режима (вызывается в конце модуля). """
+    _imported.setdefault(name, time.perf_counter())
+
+
+def import_seconds(name):
+    """ Время от импорта пакета до конца импорта модуля name. """
+    return _imported.get(name, IMPORT_STARTED) - IMPORT_STARTED
+
+
+###############################################################################
+# Профиль запуска
+###############################################################################
+class StartupProfile:
+    """
+    Этапы запуска по порядку: (название, секунды). Пока enabled ложно,
+    phase() и mark() ничего не замеряют, поэтому вызовы можно оставлять
+    в основном пути.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self._last = time.perf_counter()
+
+    def add(self, name, seconds):
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    def mark(self, name):
+        """ Этап, закончившийся сейчас и начавшийся с предыдущей отметки. """
+        now = time.perf_counter()
+        self.add(name, now - self._last)
+        self._last = now
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.add(name, self._last - started)
+
+    def report(self, title="Startup profile (python -X importtime shows every module import):", total_label="total",
+               stream=None):
+        """ Таблица этапов с долей от суммы; печатается в stderr на языке режима. """
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        total = sum(seconds for _, seconds in self.phases)
+        width = max([len(name) for name, _ in self.phases] + [len(total_label)])
+        print(title, file=stream)
+        for name, seconds in self.phases:
+            share = seconds / total * 100 if total else 0.0
+            print(f"  {name:<{width}}  {seconds:8.3f} s  {share:5.1f}%", file=stream)
+        print(f"  {total_label:<{width}}  {total:8.3f} s", file=stream)
+
+
+###############################################################################
+# Снимок состояния
+###############################################################################
+MAGIC = b"FNSNAP01"
+_ALIGN = 8
+
+
+def fingerprint(paths, extra=()):
+    """
+    Отпечаток источников снимка: путь, размер и mtime каждого файла
+    данных и каждого модуля пакета, версия Python, параметры extra.
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    modules = sorted(os.path.join(package_dir, name) for name in os.listdir(package_dir) if name.endswith(".py"))
+    entries = [platform.python_version(), list(extra)]
+    for path in list(paths) + modules:
+        try:
+            st = os.stat(path)
+            entries.append([os.path.abspath(path), st.st_size, st.st_mtime_ns])
+        except OSError:
+            entries.append([os.path.abspath(path), None, None])
+    return hashlib.blake2b(json.dumps(entries).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def write_snapshot(path, snapshot_fingerprint, state, tables_path):
+    """ Атомарная запись: заголовок, pickle состояния, затем файл таблиц как есть. """
+    raw_state = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(tables_path, "rb") as f:
+        raw_tables = f.read()
+    header = {"fingerprint": snapshot_fingerprint, "state_size": len(raw_state)}
+    raw_header = json.dumps(header).encode("utf-8")
+    raw_header += b" " * (-(len(MAGIC) + 8 + len(raw_header)) % _ALIGN)
+    padding = -len(raw_state) % _ALIGN
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(raw_header)))
+        f.write(raw_header)
+        f.write(raw_state)
+        f.write(b"\0" * padding)
+        f.write(raw_tables)
+    os.replace(tmp_path, path)
+    return path
+
+
+class Snapshot:
+    """ Загруженный снимок: state — словарь из pickle, tables — SharedTables поверх mmap. """
+
+    def __init__(self, path, state, tables_offset):
+        self.path = path
+        self.state = state
+        self.tables_offset = tables_offset
+        self.tables = shared_tables.SharedTables(path, tables_offset)
+
+
+def load_snapshot(path, snapshot_fingerprint):
+    """ Снимок из файла, если он построен из тех же источников; иначе None. """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+            if header.get("fingerprint") != snapshot_fingerprint:
+                return None
+            state = pickle.loads(f.read(header["state_size"]))
+    except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError):
+        return None
+    tables_offset = len(MAGIC) + 8 + header_len + header["state_size"] + (-header["state_size"] % _ALIGN)
+    return Snapshot(path, state, tables_offset)
+
+
+def load_or_build(path, snapshot_fingerprint, build):
+    """
+    Снимок из path либо новый: build(путь_таблиц) строит состояние,
+    записывает файл таблиц и возвращает словарь для pickle.
+    Возвращает (Snapshot, построен_ли заново).
+    """
+    snapshot = load_snapshot(path, snapshot_fingerprint)
+    if snapshot is not None:
+        return snapshot, False
+    tables_path = f"{path}.tables{os.getpid()}"
+    try:
+        state = build(tables_path)
+        write_snapshot(path, snapshot_fingerprint, state, tables_path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tables_path)
+    return load_snapshot(path, snapshot_fingerprint), True
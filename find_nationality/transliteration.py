@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Слой транслитерации для словарей имён и входящих имён контактов.
+
+* translit_to_latin — кэшированная обёртка над transliterate.translit
+  (кириллица -> латиница), чтобы одно и то же имя/суффикс не
+  транслитерировалось повторно при импорте обоих скриптов.
+* latin_to_cyrillic — быстрый транслитератор латиница -> кириллица по
+  таблице буквосочетаний для имён контактов, записанных латиницей
+  (Yuriy, Aleksey, Zhanna).
+* NameIndex — общий индекс словарных имён: для каждого имени хранится
+  кириллический и латинский вариант, плюс обратная таблица латиница ->
+  кириллица. Заменяет «удвоенные» списки [имя, translit(имя), ...].
+"""
+
+import re
+from functools import lru_cache
+
+from transliterate import translit
+
+
+###############################################################################
+# Кириллица -> латиница (для словарей)
+###############################################################################
+@lru_cache(maxsize=None)
+def translit_to_latin(name: str) -> str:
+    return translit(name, 'ru', reversed=True)
+
+
+def generate_transliterated_names_flatten(cyrillic_names):
+    """ Создаём список, содержащий и кириллический, и транслитерированный варианты. """
+    flattened_list = []
+    for name in cyrillic_names:
+        flattened_list.append(name)
+        flattened_list.append(translit_to_latin(name))
+    return flattened_list
+
+
+###############################################################################
+# Латиница -> кириллица (для входящих имён контактов)
+###############################################################################
+# Порядок важен: сначала длинные буквосочетания
+_LATIN_TO_CYRILLIC = [
+    ("shch", "щ"), ("sch", "щ"),
+    ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("yu", "ю"), ("ju", "ю"), ("ya", "я"), ("ja", "я"),
+    ("yo", "ё"), ("jo", "ё"), ("ye", "е"), ("je", "е"),
+    ("ay", "ай"), ("ey", "ей"), ("oy", "ой"), ("uy", "уй"), ("iy", "ий"), ("yy", "ый"),
+    ("ij", "ий"),
+    ("a", "а"), ("b", "б"), ("v", "в"), ("w", "в"), ("g", "г"), ("d", "д"),
+    ("e", "е"), ("z", "з"), ("i", "и"), ("j", "й"), ("k", "к"), ("l", "л"),
+    ("m", "м"), ("n", "н"), ("o", "о"), ("p", "п"), ("r", "р"), ("s", "с"),
+    ("t", "т"), ("u", "у"), ("f", "ф"), ("h", "х"), ("c", "к"), ("x", "кс"),
+    ("q", "к"), ("y", "ы"), ("'", "ь"),
+]
+_LATIN_MAP = dict(_LATIN_TO_CYRILLIC)
+_LATIN_RE = re.compile("|".join(re.escape(k) for k, _ in _LATIN_TO_CYRILLIC), re.IGNORECASE)
+
+
+def _replace_latin(match):
+    chunk = match.group(0)
+    cyr = _LATIN_MAP[chunk.lower()]
+    if chunk[0].isupper():
+        return cyr[0].upper() + cyr[1:]
+    return cyr
+
+
+def is_latin(word: str) -> bool:
+    """ Слово целиком из латинских букв (допускается апостроф). """
+    return word.isascii() and word.replace("'", "").isalpha()
+
+
+@lru_cache(maxsize=65536)
+def latin_to_cyrillic(word: str) -> str:
+    """ Yuriy -> Юрий, Aleksey -> Алексей; регистр первой буквы сохраняется. """
+    return _LATIN_RE.sub(_replace_latin, word)
+
+
+###############################################################################
+# Общий индекс имён
+###############################################################################
+class NameIndex:
+    """
+    Индекс словарных имён {метка: [имена в кириллице]}.
+
+    Для каждого имени хранятся кириллический и латинский (translit) варианты.
+    Метка с меньшим порядковым номером имеет приоритет — как в каскадах,
+    где национальности перебираются по порядку словаря.
+    """
+
+    def __init__(self, groups):
+        self.labels = list(groups)
+        self._groups = {}
+        self._exact = {}        # вариант -> ранг первой метки
+        self._folded = {}       # вариант.lower() -> ранг первой метки
+        self.latin_to_name = {}  # латинский вариант (lower) -> кириллическое имя
+        for rank, label in enumerate(self.labels):
+            variants = generate_transliterated_names_flatten(groups[label])
+            self._groups[label] = variants
+            for i in range(0, len(variants), 2):
+                name, latin = variants[i], variants[i + 1]
+                self.latin_to_name.setdefault(latin.lower(), name)
+            for variant in variants:
+                self._exact.setdefault(variant, rank)
+                self._folded.setdefault(variant.lower(), rank)
+
+    def variants(self, label):
+        """ Список [имя, translit(имя), ...] — прежний «удвоенный» формат. """
+        return self._groups[label]
+
+    def as_flattened_dict(self):
+        return {label: self._groups[label] for label in self.labels}
+
+    def first_label(self, parts):
+        """
+        Первая по порядку метка, в списке которой есть любая из частей
+        (точное сравнение с учётом регистра).
+        """
+        best = None
+        for part in parts:
+            rank = self._exact.get(part)
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return self.labels[best] if best is not None else None
+
+    def first_label_folded(self, word):
+        """ Метка для слова без учёта регистра. """
+        rank = self._folded.get(word.lower())
+        return self.labels[rank] if rank is not None else None
+
+    def to_cyrillic(self, word):
+        """
+        Латинское написание -> кириллица: сначала по таблице словарных
+        вариантов, затем по буквенной таблице.
+        """
+        name = self.latin_to_name.get(word.lower())
+        if name is not None:
+            return name
+        return latin_to_cyrillic(word)
@@ -0,0 +1,93 @@
+"""
+Local stand-in for islam-mama.com that serves saved fixture pages.
+
+    python fixture_server.py fixtures/islam_mama --port 8765
+    python islam_names.py --base-url http://127.0.0.1:8765 -o /tmp/islam_names.txt
+
+/names/<gender>?page=N is answered with <directory>/<gender>_<N>.html, or 404
+when there is no such file. Responses carry ETag and Last-Modified headers and
+conditional requests get 304, so the scraper's HTTP cache can be exercised.
+"""
+import argparse
+import hashlib
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PATH_RE = re.compile(r"^/names/(?P<gender>[a-z]+)$")
+
+
+def make_handler(directory):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            match = PATH_RE.match(parts.path)
+            page = parse_qs(parts.query).get("page", ["1"])[0]
+            fixture = None
+            if match and page.isdigit():
+                fixture = os.path.join(directory, f"{match.group('gender')}_{int(page)}.html")
+            if not fixture or not os.path.exists(fixture):
+                self.send_error(404)
+                return
+
+            with open(fixture, "rb") as f:
+                body = f.read()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            mtime = int(os.path.getmtime(fixture))
+            if self._not_modified(etag, mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_modified(self, etag, mtime):
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match is not None:
+                return if_none_match == etag
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    return parsedate_to_datetime(if_modified_since).timestamp() >= mtime
+                except (TypeError, ValueError):
+                    return False
+            return False
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def serve(directory, host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(directory))
+    print(f"Serving {directory} on http://{host}:{server.server_address[1]}")
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve saved islam-mama.com fixture pages locally.")
+    arg_parser.add_argument("directory", help="Directory with <gender>_<page>.html files.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    args = arg_parser.parse_args()
+    server = serve(args.directory, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
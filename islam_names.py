@@ -1,69 +1,212 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
+import hashlib
+import json
+import os
 import time
+from urllib.parse import urlsplit
 
-# Base URLs for boy and girl names
-base_urls = {
-    "boy": "https://islam-mama.com/names/boy",
-    "girl": "https://islam-mama.com/names/girl"
-}
+import aiohttp
+from bs4 import BeautifulSoup
+
+from find_nationality import name_sets
 
-# Dictionary to store the extracted names for both categories
-names = {
-    "boy": [],
-    "girl": []
+# Base URL of the site and the paths for boy and girl names
+DEFAULT_BASE_URL = "https://islam-mama.com"
+gender_paths = {
+    "boy": "/names/boy",
+    "girl": "/names/girl"
 }
 
-# Loop through both boy and girl base URLs
-for gender, base_url in base_urls.items():
-    page = 1
-    while True:
-        # Construct the URL with the current page number
-        url = f"{base_url}?page={page}"
-
-        # Fetch the page content
-        response = requests.get(url)
-
-        # Check if the request was successful
-        if response.status_code != 200:
-            print(f"Failed to retrieve page {page} for {gender}.")
-            break
-
-        # Parse the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find all list items with class 'names-list-item'
-        list_items = soup.find_all('li', class_='names-list-item')
-
-        # If no names are found, we've reached the last page
-        if not list_items:
-            print(f"No more names found for {gender}. Exiting.")
-            break
-
-        # Extract names from the current page
-        for item in list_items:
-            main_tag = item.find('main')
-            if main_tag:
-                name_tag = main_tag.find('a', title=True)
-                if name_tag:
-                    name = name_tag.get_text(strip=True)
-                    names[gender].append(name)
-
-        print(f"Page {page} for {gender} processed.")
-
-        # Increment the page counter to move to the next page
-        page += 1
-
-        # Optional: Pause between requests to be respectful to the server
-        time.sleep(1)
-
-# Save the names to a single text file
-with open("islam_names.txt", "w", encoding="utf-8") as file:
-    for gender in names:
-        # Add a section header for each gender
-        file.write(f"--- {gender.capitalize()} Names ---\n")
-        for name in names[gender]:
-            file.write(f"{name}\n")  # Write each name on a new line
-        file.write("\n")  # Add an empty line between sections
-
-print("Names saved to islam_names.txt.")
+DEFAULT_OUTPUT = "islam_names.txt"
+DEFAULT_ARTIFACT = "islam_names.json"
+DEFAULT_CACHE_DIR = ".http_cache"
+
+
+# Per-host rate limiter: at most `rate` requests per second to each host
+class HostRateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_allowed = {}
+        self._locks = {}
+
+    async def wait(self, url):
+        host = urlsplit(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            next_allowed = self._next_allowed.get(host, now)
+            if next_allowed > now:
+                await asyncio.sleep(next_allowed - now)
+            self._next_allowed[host] = max(now, next_allowed) + self.interval
+
+
+# On-disk HTTP cache keyed by URL, revalidated with ETag / If-Modified-Since
+class HttpCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + ".html"), os.path.join(self.directory, key + ".json")
+
+    def load(self, url):
+        body_path, meta_path = self._paths(url)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None, {}
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "r", encoding="utf-8") as f:
+            return f.read(), meta
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, body, headers):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        # Write body first so a crash never leaves metadata pointing at a missing body
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta, ensure_ascii=False))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+
+class Scraper:
+    def __init__(self, session, cache, limiter, concurrency):
+        self.session = session
+        self.cache = cache
+        self.limiter = limiter
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.stats = {"downloaded": 0, "not_modified": 0, "failed": 0}
+
+    # Fetch a page, revalidating the cached copy; returns the HTML or None
+    async def fetch(self, url):
+        cached_body, meta = self.cache.load(url)
+        headers = self.cache.conditional_headers(meta) if cached_body is not None else {}
+        async with self.semaphore:
+            await self.limiter.wait(url)
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached_body is not None:
+                        self.stats["not_modified"] += 1
+                        return cached_body
+                    if response.status != 200:
+                        self.stats["failed"] += 1
+                        return None
+                    body = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.stats["failed"] += 1
+                return None
+        self.cache.store(url, body, response.headers)
+        self.stats["downloaded"] += 1
+        return body
+
+    # Fetch pages of one gender in windows of `concurrency` pages until an empty page
+    async def scrape_gender(self, base_url, gender):
+        names = []
+        page = 1
+        while True:
+            pages = range(page, page + self.concurrency)
+            urls = [f"{base_url}{gender_paths[gender]}?page={p}" for p in pages]
+            bodies = await asyncio.gather(*(self.fetch(url) for url in urls))
+            for p, body in zip(pages, bodies):
+                if body is None:
+                    print(f"Failed to retrieve page {p} for {gender}.")
+                    return names
+                page_names = parse_names(body)
+                # If no names are found, we've reached the last page
+                if not page_names:
+                    print(f"No more names found for {gender}. Exiting.")
+                    return names
+                names.extend(page_names)
+                print(f"Page {p} for {gender} processed.")
+            page += self.concurrency
+
+
+# Extract names from list items with class 'names-list-item'
+def parse_names(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    names = []
+    for item in soup.find_all('li', class_='names-list-item'):
+        main_tag = item.find('main')
+        if main_tag:
+            name_tag = main_tag.find('a', title=True)
+            if name_tag:
+                names.append(name_tag.get_text(strip=True))
+    return names
+
+
+# Merge freshly scraped names into the names file; rewrites it only when something changed
+def update_names_file(path, scraped):
+    existing = name_sets.read_names_text(path) if os.path.exists(path) else {gender: [] for gender in gender_paths}
+    added = 0
+    merged = {}
+    for gender in gender_paths:
+        known = set(existing[gender])
+        new_names = [name for name in dict.fromkeys(scraped.get(gender, [])) if name not in known]
+        added += len(new_names)
+        merged[gender] = existing[gender] + new_names
+    if added == 0 and os.path.exists(path):
+        return 0, merged
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        for gender in merged:
+            # Add a section header for each gender
+            file.write(f"--- {gender.capitalize()} Names ---\n")
+            for name in merged[gender]:
+                file.write(f"{name}\n")  # Write each name on a new line
+            file.write("\n")  # Add an empty line between sections
+    os.replace(tmp_path, path)
+    return added, merged
+
+
+async def scrape(base_url, concurrency, rate, cache_dir):
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        scraper = Scraper(session, HttpCache(cache_dir), HostRateLimiter(rate), concurrency)
+        results = await asyncio.gather(*(scraper.scrape_gender(base_url, gender) for gender in gender_paths))
+        return dict(zip(gender_paths, results)), scraper.stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Scrape Islamic names from islam-mama.com.")
+    arg_parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                            help=f"Site base URL, e.g. a local fixture server (default: {DEFAULT_BASE_URL}).")
+    arg_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                            help=f"Names file to update (default: {DEFAULT_OUTPUT}).")
+    arg_parser.add_argument("--artifact", default=DEFAULT_ARTIFACT,
+                            help=f"Compiled names artifact used by the classifiers (default: {DEFAULT_ARTIFACT}).")
+    arg_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                            help=f"HTTP cache directory (default: {DEFAULT_CACHE_DIR}).")
+    arg_parser.add_argument("-c", "--concurrency", type=int, default=4,
+                            help="Maximum number of requests in flight (default: 4).")
+    arg_parser.add_argument("-r", "--rate", type=float, default=1.0,
+                            help="Maximum requests per second per host, 0 for no limit (default: 1).")
+    args = arg_parser.parse_args()
+
+    names, stats = asyncio.run(scrape(args.base_url.rstrip("/"), max(1, args.concurrency), args.rate, args.cache_dir))
+    added, merged = update_names_file(args.output, names)
+    # The compiled artifact is always rewritten so it is never older than the text file
+    name_sets.write_artifact(args.artifact, merged)
+    print(f"Downloaded: {stats['downloaded']}, not modified: {stats['not_modified']}, failed: {stats['failed']}.")
+    print(f"Names saved to {args.output} ({added} new), compiled set saved to {args.artifact}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Слияние шардов --split phone (cluster.py): _ordered_rows по order.bin
+восстанавливает исходный порядок записей alldata.
+"""
+
+import contextlib
+import csv
+
+import pytest
+
+from find_nationality import cluster
+
+SHARDS = 4
+
+ROWS = [[f"7900{i % 29:07d}", str(i), f"Контакт {i}, «{i % 7}»"] for i in range(300)]
+ROWS[5][0] = ""
+ROWS[17][2] = "имя\nс переводом строки"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    alldata_file = tmp_path / "alldata.txt"
+    with open(alldata_file, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(ROWS)
+    queue = cluster.WorkQueue(str(tmp_path / "queue"))
+    queue.create(SHARDS)
+    counts = cluster.split_alldata(queue, "fio", str(alldata_file), SHARDS, "phone")
+    assert sum(counts) == len(ROWS)
+    assert all(counts), "телефоны должны разойтись по всем шардам"
+    return queue
+
+
+def _merge_inputs(queue, drop_last_of=None):
+    """ Входы шардов (alldata.txt) в порядке order.bin; drop_last_of — шард без последней строки. """
+    with contextlib.ExitStack() as stack:
+        readers = []
+        for shard in range(SHARDS):
+            f, reader = cluster._shard_rows(f"{queue.shard_dir(shard)}/alldata.txt")
+            stack.enter_context(f)
+            rows = list(reader)
+            if shard == drop_last_of:
+                rows.pop()
+            readers.append(iter(rows))
+        return list(cluster._ordered_rows(readers, cluster._order(queue)))
+
+
+def test_ordered_rows_restore_input_order(queue):
+    assert _merge_inputs(queue) == ROWS
+
+
+def test_short_shard_is_an_error(queue):
+    with pytest.raises(cluster.ClusterError):
+        _merge_inputs(queue, drop_last_of=2)
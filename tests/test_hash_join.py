@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Grace hash join (hash_join.py) против соединения в памяти, как в fio без
+--join-mode hash: одинаковые строки в одинаковом порядке.
+"""
+
+import pytest
+
+from find_nationality import hash_join
+
+
+def _citizen(fname):
+    cdata = {field: "" for field in hash_join.CITIZEN_FIELDS}
+    cdata["fname"] = fname
+    return cdata
+
+
+CITIZENS = [
+    ("79001000001", _citizen("Иван")),
+    ("79001000002", _citizen("Пётр, \"Петя\"")),
+    ("77011234567", _citizen("Айгерим\nвторая строка")),
+    # Дубль телефона: побеждает последняя запись
+    ("79001000001", _citizen("Иван Второй")),
+]
+
+ALLDATA = [
+    ("79001000001", "10", "Ваня"),
+    (None, "11", "Без телефона"),
+    ("79001000002", "3", "Петя, сосед"),
+    ("79009999999", "abc", "Гражданина нет"),
+    ("77011234567", "2", "Айгерим"),
+    ("79001000001", "10", "Ваня ещё раз"),
+    (None, "1", ""),
+] + [(f"7900{i % 13:07d}", str(100 - i), f"Контакт {i}") for i in range(60)]
+
+
+def _echo_rows(tasks):
+    return [[user_id, phone or "", how_recorded, cdata["fname"] if cdata else ""]
+            for phone, user_id, how_recorded, cdata in tasks]
+
+
+def _memory_join(citizens, alldata):
+    citizen_dict = dict(citizens)
+    return _echo_rows([(phone, user_id, how_recorded, citizen_dict.get(phone) if phone else None)
+                       for phone, user_id, how_recorded in alldata])
+
+
+def _hash_join(tmp_path, partitions, order):
+    rows, count = hash_join.run_hash_join(iter(CITIZENS), iter(ALLDATA), str(tmp_path), partitions,
+                                          _echo_rows, order)
+    return list(rows), count
+
+
+@pytest.mark.parametrize("partitions", [1, 3, 8])
+def test_hash_join_matches_memory_join(tmp_path, partitions):
+    rows, count = _hash_join(tmp_path, partitions, hash_join.ORDER_BY_POSITION)
+    assert count == len(ALLDATA)
+    assert rows == _memory_join(CITIZENS, ALLDATA)
+
+
+def test_hash_join_orders_by_user_id(tmp_path):
+    rows, _ = _hash_join(tmp_path, 4, hash_join.ORDER_BY_USER_ID)
+    expected = _memory_join(CITIZENS, ALLDATA)
+    # Числовые user_id по возрастанию числа, затем остальные по строке; при равенстве — порядок входа
+    expected.sort(key=lambda row: (0, int(row[0]), "") if row[0].isdigit() else (1, 0, row[0]))
+    assert rows == expected
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+IsolatedPool (isolation.py): упавший и зависший воркер не останавливают
+imap — виновник уходит в отказы, вместо его результата считается
+запасная функция, порядок результатов сохраняется.
+"""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from find_nationality import isolation
+
+CRASH = -1
+HANG = -2
+
+
+def _square(item):
+    if item == CRASH:
+        os._exit(3)
+    if item == HANG:
+        time.sleep(60)
+    return item * item
+
+
+def _unclassified(item):
+    return None
+
+
+@pytest.fixture
+def fork_context():
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("нужен старт процессов через fork")
+    return multiprocessing.get_context("fork")
+
+
+def test_crash_and_hang_fall_back_in_order(tmp_path, fork_context):
+    dead_letters = isolation.DeadLetters(str(tmp_path / "dead_letters.csv"))
+    items = [1, 2, CRASH, 4, HANG, 6, 7]
+    # Бюджет 0.2 с -> жёсткий лимит воркера 0.2 * 3 + 1 = 1.6 с
+    with isolation.IsolatedPool(2, mp_context=fork_context, fallbacks={_square: _unclassified},
+                                time_budget_s=0.2, dead_letters=dead_letters, stage="тест") as pool:
+        results = list(pool.imap(_square, items, chunksize=2))
+        crashes = pool.crashes
+
+    assert results == [1, 4, None, 16, None, 36, 49]
+    assert crashes == 2
+    assert dead_letters.count() == 2
+
+
+def test_crash_without_fallback_raises(fork_context):
+    with isolation.IsolatedPool(1, mp_context=fork_context, time_budget_s=0.2) as pool:
+        with pytest.raises(isolation.WorkerCrash):
+            list(pool.imap(_square, [1, CRASH, 3], chunksize=3))